@@ -0,0 +1,213 @@
+import asyncio
+import json
+import logging
+import os
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from audio_store import IMMUTABLE_CACHE_CONTROL, serve_file
+from cache import content_hash
+from cancellation import JOB_DEADLINE
+from chapters import OUTPUTS
+from languages import SUPPORTED_LANGUAGES
+from page_index import parse_page_spec
+from profiler import is_admin
+from scheduler import RateLimited
+
+logger = logging.getLogger(__name__)
+
+API_PREFIX = "/podkaast/api/v1"
+TONES = ("Fun", "Formal")
+LENGTHS = ("Short (1-2 min)", "Medium (3-5 min)")
+STYLES = ("Monologue", "Dialogue")
+# how often an event stream looks for job updates and for a client that went away
+EVENT_POLL_INTERVAL = 0.25
+
+
+def _choice(value, choices, default, field):
+    if value in (None, ""):
+        return default
+    if value not in choices:
+        raise HTTPException(status_code=422, detail=f"{field} must be one of {list(choices)}")
+    return value
+
+
+def _seconds(value, default, limit):
+    if value in (None, ""):
+        return default
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=422, detail="deadline must be a number of seconds")
+    if seconds <= 0:
+        raise HTTPException(status_code=422, detail="deadline must be positive")
+    return min(seconds, limit)
+
+
+def _pages(value):
+    value = value or ""
+    if isinstance(value, list):
+        value = ", ".join(str(part) for part in value)
+    try:
+        parse_page_spec(str(value))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"pages: {e}")
+    return str(value).strip()
+
+
+def _flag(value, default=True):
+    if value in (None, ""):
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).lower() in ("1", "true", "yes", "on")
+
+
+async def _read_request(request):
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        pdfs = [await upload.read() for upload in form.getlist("files")]
+        fields = dict(form)
+        fields.pop("files", None)
+        upload_ids = form.getlist("upload_ids")
+    else:
+        try:
+            fields = await request.json()
+        except json.JSONDecodeError:
+            raise HTTPException(status_code=400, detail="Body must be JSON or multipart/form-data")
+        if not isinstance(fields, dict):
+            raise HTTPException(status_code=400, detail="JSON body must be an object")
+        pdfs = []
+        upload_ids = fields.get("upload_ids") or []
+
+    urls = fields.get("urls") or fields.get("url") or ""
+    if isinstance(urls, list):
+        urls = "\n".join(urls)
+
+    return pdfs + list(upload_ids), urls, fields
+
+
+def api_user(request):
+    """Scheduling identity: the API key (hashed, so it never reaches logs) or the client address"""
+    key = request.headers.get("x-api-key")
+    authorization = request.headers.get("authorization", "")
+    if not key and authorization.lower().startswith("bearer "):
+        key = authorization[7:].strip()
+    if key:
+        return "key:" + content_hash(key.encode())[:16]
+    return f"client:{request.client.host}" if request.client else "anonymous"
+
+
+def create_api_router(jobs, convert, upload_registry, audio_store):
+    """REST endpoints sharing the UI's conversion pipeline, caches and worker pool"""
+    router = APIRouter(prefix=API_PREFIX)
+
+    def lookup(job_id):
+        job = jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Unknown job")
+        return job
+
+    def describe(job):
+        state = job.to_dict()
+        state["audio_url"] = audio_store.url_for(job.audio_path) if job.audio_path else None
+        return state
+
+    @router.post("/conversions", status_code=202)
+    async def submit_conversion(request: Request):
+        pdfs, urls, fields = await _read_request(request)
+
+        for source in pdfs:
+            if isinstance(source, str) and upload_registry.get(source) is None:
+                raise HTTPException(status_code=404, detail=f"Unknown upload {source}")
+        if not pdfs and not urls.strip():
+            raise HTTPException(status_code=422, detail="Provide files, upload_ids or urls")
+        # profiling slows the whole process down, so only admins may ask for it; profiled jobs run on this replica
+        options = {}
+        if _flag(fields.get("profile"), default=False):
+            if not is_admin(request):
+                raise HTTPException(status_code=403, detail="profile requires the admin token")
+            options["profile"] = True
+
+        try:
+            job = jobs.submit(
+                convert,
+                pdfs,
+                urls,
+                fields.get("question") or "",
+                _choice(fields.get("tone"), TONES, "Fun", "tone"),
+                _choice(fields.get("length"), LENGTHS, "Medium (3-5 min)", "length"),
+                _choice(fields.get("language"), SUPPORTED_LANGUAGES, "English", "language"),
+                _flag(fields.get("advanced_audio")),
+                _choice(fields.get("format"), STYLES, "Monologue", "format"),
+                _pages(fields.get("pages")),
+                _choice(fields.get("output"), OUTPUTS, "Episode", "output"),
+                user=api_user(request),
+                deadline=_seconds(fields.get("deadline"), JOB_DEADLINE, JOB_DEADLINE),
+                **options
+            )
+        except RateLimited as e:
+            raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(int(e.retry_after) + 1)})
+        base = f"{API_PREFIX}/conversions/{job.job_id}"
+        return JSONResponse(
+            status_code=202,
+            content={
+                "job_id": job.job_id,
+                "status_url": base,
+                "events_url": f"{base}/events",
+                "audio_url": f"{base}/audio",
+            },
+            headers={"Location": base}
+        )
+
+    @router.get("/conversions/{job_id}")
+    async def conversion_status(job_id: str):
+        return describe(lookup(job_id))
+
+    @router.delete("/conversions/{job_id}")
+    async def cancel_conversion(job_id: str):
+        job = lookup(job_id)
+        if not job.cancel("cancelled through the API"):
+            raise HTTPException(status_code=409, detail=f"Job is already {job.status}")
+        return describe(job)
+
+    @router.get("/conversions/{job_id}/events")
+    async def conversion_events(job_id: str, request: Request):
+        job = lookup(job_id)
+
+        async def events():
+            # polled on the event loop, so an open stream holds no worker thread and a
+            # disconnected client is noticed within one interval
+            refresh = getattr(job, "refresh", None)
+            version = -1
+            while True:
+                if refresh is not None:
+                    # a job on another replica is read from the shared store
+                    await run_in_threadpool(refresh)
+                state = describe(job)
+                if job.version != version:
+                    version = job.version
+                    yield f"data: {json.dumps(state)}\n\n"
+                if job.done or await request.is_disconnected():
+                    break
+                await asyncio.sleep(EVENT_POLL_INTERVAL)
+
+        return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+    @router.get("/conversions/{job_id}/audio")
+    async def conversion_audio(job_id: str, request: Request):
+        job = lookup(job_id)
+        if not job.done:
+            raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+        if not job.audio_path or not os.path.exists(job.audio_path):
+            raise HTTPException(status_code=404, detail="No audio for this job")
+
+        digest = audio_store.digest_of(job.audio_path)
+        if digest is None:
+            return serve_file(request, job.audio_path)
+        return serve_file(request, job.audio_path, etag=f'"{digest}"', cache_control=IMMUTABLE_CACHE_CONTROL)
+
+    return router
@@ -0,0 +1,215 @@
+import hashlib
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from pathlib import Path
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_AUDIO_DIR = Path(os.environ.get("PODKAAST_CACHE_DIR", Path.home() / ".cache" / "podkaast")) / "audio"
+AUDIO_ROUTE = "/podkaast/audio"
+# chapterized episodes add an HLS-style playlist and a JSON manifest next to their chapter files
+MEDIA_TYPES = {".mp3": "audio/mpeg", ".wav": "audio/wav", ".m3u8": "application/vnd.apple.mpegurl",
+               ".json": "application/json"}
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+STREAM_BLOCK_SIZE = 64 * 1024
+HASH_BLOCK_SIZE = 1024 * 1024
+# finished audio is capped in size and age like saved page indexes; the least recently used go first
+MAX_AUDIO_BYTES = int(float(os.environ.get("PODKAAST_AUDIO_STORE_MB", "2000")) * 1024 * 1024)
+MAX_AUDIO_AGE = float(os.environ.get("PODKAAST_AUDIO_STORE_DAYS", "30")) * 86400
+
+_RANGE = re.compile(r"bytes=(\d*)-(\d*)$")
+_AUDIO_NAME = re.compile(r"^([0-9a-f]{64})(\.mp3|\.wav|\.m3u8|\.json)$")
+
+
+def media_type_for(path):
+    return MEDIA_TYPES.get(os.path.splitext(path)[1], "application/octet-stream")
+
+
+def _iter_file(path, start, end):
+    with open(path, "rb") as audio:
+        audio.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            block = audio.read(min(STREAM_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+
+
+class _WholeFileResponse(FileResponse):
+    """FileResponse that always sends the whole file; serve_file has already decided against a range"""
+
+    async def __call__(self, scope, receive, send):
+        headers = [(name, value) for name, value in scope["headers"] if name not in (b"range", b"if-range")]
+        await super().__call__(dict(scope, headers=headers), receive, send)
+
+
+def _etag_matches(header, etag):
+    return any(tag.strip() in (etag, "*") for tag in header.split(","))
+
+
+def serve_file(request, path, media_type=None, etag=None, cache_control=None):
+    """File response with conditional GET and single-range support.
+
+    Malformed and multi-range headers are ignored in favour of the full body.
+    Full bodies go through FileResponse, which hands the path to the server for
+    zero-copy transmission when it supports the ASGI pathsend extension.
+    """
+    media_type = media_type or media_type_for(path)
+    size = os.path.getsize(path)
+    headers = {"Accept-Ranges": "bytes"}
+    if etag:
+        headers["ETag"] = etag
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+
+    if etag and _etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and if_range and etag and if_range.strip() != etag:
+        range_header = None
+
+    if not range_header:
+        return _WholeFileResponse(path, media_type=media_type, headers=headers)
+
+    match = _RANGE.match(range_header.strip())
+    first, last = match.groups() if match else ("", "")
+    if not (first or last) or (first and last and int(first) > int(last)):
+        return _WholeFileResponse(path, media_type=media_type, headers=headers)
+
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        start = max(0, size - int(last))
+        end = size - 1
+
+    if start >= size or start > end:
+        return Response(status_code=416, headers=dict(headers, **{"Content-Range": f"bytes */{size}"}))
+
+    headers.update({
+        "Content-Range": f"bytes {start}-{end}/{size}",
+        "Content-Length": str(end - start + 1),
+    })
+    return StreamingResponse(_iter_file(path, start, end), status_code=206, media_type=media_type, headers=headers)
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as audio:
+        for block in iter(lambda: audio.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class AudioStore:
+    """Content-addressed home for finished episodes.
+
+    Identical episodes collapse to one file, and because a name can never
+    change content the delivery route can hand out immutable cache headers.
+    Files not served for ``max_age`` seconds, and the least recently used
+    beyond ``max_bytes`` on disk, are deleted whenever a new one is stored.
+    """
+
+    def __init__(self, root=DEFAULT_AUDIO_DIR, max_bytes=MAX_AUDIO_BYTES, max_age=MAX_AUDIO_AGE):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+
+    def _touch(self, path):
+        try:
+            # the modification time records the last use, for pruning
+            os.utime(path)
+        except OSError:
+            pass
+
+    def path_for(self, digest, suffix):
+        return self.root / digest[:2] / f"{digest}{suffix}"
+
+    def store(self, path):
+        """Move a generated file into the store and return its new path"""
+        suffix = os.path.splitext(path)[1]
+        digest = file_digest(path)
+        destination = self.path_for(digest, suffix)
+
+        with self._lock:
+            if destination.exists():
+                os.unlink(path)
+                self._touch(destination)
+            else:
+                # the root may be shared by several replicas: land the bytes next to the
+                # destination first so nobody ever serves a half-copied file
+                destination.parent.mkdir(parents=True, exist_ok=True)
+                staging = destination.with_name(f".{destination.name}.{os.getpid()}.{threading.get_ident()}")
+                shutil.move(path, staging)
+                os.replace(staging, destination)
+        self.prune()
+        return str(destination)
+
+    def prune(self, now=None):
+        """Delete expired files, then the least recently used until the rest fit in ``max_bytes``"""
+        now = now or time.time()
+        entries = []
+        try:
+            for path in self.root.glob("*/*"):
+                # staging files of stores still in progress start with a dot and are left alone
+                if not _AUDIO_NAME.match(path.name):
+                    continue
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        except OSError:
+            return
+        entries.sort(key=lambda entry: entry[0], reverse=True)
+        total = 0
+        for used, size, path in entries:
+            total += size
+            if now - used <= self.max_age and total <= self.max_bytes:
+                continue
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            total -= size
+
+    def digest_of(self, path):
+        match = _AUDIO_NAME.match(os.path.basename(path or ""))
+        return match.group(1) if match else None
+
+    def url_for(self, path):
+        return f"{AUDIO_ROUTE}/{os.path.basename(path)}" if self.digest_of(path) else None
+
+    def resolve(self, name):
+        match = _AUDIO_NAME.match(name)
+        if not match:
+            return None
+        path = self.path_for(match.group(1), match.group(2))
+        if not path.exists():
+            return None
+        self._touch(path)
+        return str(path)
+
+    def router(self):
+        router = APIRouter(prefix=AUDIO_ROUTE)
+
+        @router.api_route("/{name}", methods=["GET", "HEAD"])
+        async def serve_audio(name: str, request: Request):
+            path = self.resolve(name)
+            if path is None:
+                raise HTTPException(status_code=404, detail="Unknown audio")
+            return serve_file(request, path, etag=f'"{self.digest_of(path)}"', cache_control=IMMUTABLE_CACHE_CONTROL)
+
+        return router
@@ -0,0 +1,53 @@
+import os
+import threading
+import time
+
+JOB_DEADLINE = float(os.environ.get("PODKAAST_JOB_DEADLINE", "900"))
+
+
+class Cancelled(Exception):
+    def __init__(self, reason="cancelled"):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class CancelToken:
+    """Cooperative cancellation flag with an optional deadline.
+
+    Pipeline stages call ``check()`` between units of work (pages, sources,
+    audio segments) so an abandoned conversion frees its worker promptly.
+    """
+
+    def __init__(self, deadline=None):
+        self.deadline = time.monotonic() + deadline if deadline else None
+        self.reason = None
+        self._event = threading.Event()
+
+    def cancel(self, reason="cancelled"):
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self):
+        if self._event.is_set():
+            return True
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel("deadline exceeded")
+            return True
+        return False
+
+    def remaining(self):
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def check(self):
+        if self.cancelled:
+            raise Cancelled(self.reason)
+
+
+def check(token):
+    """``token.check()`` that tolerates callers without a token"""
+    if token is not None:
+        token.check()
@@ -0,0 +1,210 @@
+import json
+import logging
+import math
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHAPTER_DIR = Path(os.environ.get("PODKAAST_CACHE_DIR", Path.home() / ".cache" / "podkaast")) / "chapters"
+
+OUTPUTS = ["Episode", "Chapters"]
+# starts a paragraph holding a chapter title inside extracted text; a private-use character, so
+# no real text contains it and whitespace handling leaves it alone
+CHAPTER_MARK = "\ue000"
+MIN_CHAPTER_CHARS = int(os.environ.get("PODKAAST_MIN_CHAPTER_CHARS", "400"))
+MAX_CHAPTERS = int(os.environ.get("PODKAAST_MAX_CHAPTERS", "12"))
+# chapters synthesized at once; pyttsx3 drives a single local engine
+CHAPTER_WORKERS = {"gtts": 2, "pyttsx3": 1}
+MANIFEST_VERSION = 1
+MAX_CHAPTER_CACHE_BYTES = int(float(os.environ.get("PODKAAST_CHAPTER_CACHE_MB", "50")) * 1024 * 1024)
+MAX_CHAPTER_CACHE_AGE = float(os.environ.get("PODKAAST_CHAPTER_CACHE_DAYS", "30")) * 86400
+
+_NAMED_HEADING = re.compile(r"^(chapter|section|part|appendix)\b\s*[\w.:-]*", re.IGNORECASE)
+_NUMBERED_HEADING = re.compile(r"^\d{1,2}(\.\d{1,2})*\.?\s+[^\W\d_]")
+_SENTENCE_END = re.compile(r"[.,;:!?。！？]$")
+
+
+def chapter_marker(title):
+    return f"\n\n{CHAPTER_MARK}{' '.join(title.split())}\n\n"
+
+
+def is_heading(line):
+    """Whether a line of extracted text looks like a section heading"""
+    line = line.strip()
+    if not 3 <= len(line) <= 80 or _SENTENCE_END.search(line):
+        return False
+    if _NAMED_HEADING.match(line) or _NUMBERED_HEADING.match(line):
+        return True
+    letters = [char for char in line if char.isalpha()]
+    return len(letters) >= 4 and line.isupper()
+
+
+def mark_headings(text):
+    """Insert chapter markers before detected headings; unchanged when fewer than two are found"""
+    lines = text.split("\n")
+    headings = [index for index, line in enumerate(lines) if is_heading(line)]
+    if len(headings) < 2:
+        return text
+    for index in headings:
+        lines[index] = chapter_marker(lines[index])
+    return "\n".join(lines)
+
+
+def split_chapters(text, default_title):
+    """``[(title, text)]`` at the chapter markers; text before the first one joins the first chapter"""
+    chapters = []
+    leading = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if paragraph.startswith(CHAPTER_MARK):
+            chapters.append([paragraph[len(CHAPTER_MARK):].strip() or default_title, []])
+        elif paragraph:
+            (chapters[-1][1] if chapters else leading).append(paragraph)
+    if not chapters:
+        return [(default_title, "\n\n".join(leading))]
+    chapters[0][1][:0] = leading
+    return [(title, "\n\n".join(paragraphs)) for title, paragraphs in chapters]
+
+
+def balance_chapters(chapters, min_chars=MIN_CHAPTER_CHARS, max_chapters=MAX_CHAPTERS):
+    """Fold chapters too short to narrate into their neighbour, then merge until at most ``max_chapters``"""
+    chapters = [[title, body] for title, body in chapters]
+    index = 0
+    while len(chapters) > 1 and index < len(chapters):
+        if len(chapters[index][1]) >= min_chars:
+            index += 1
+            continue
+        # a short chapter joins the one before it; a short first chapter absorbs the next
+        if index == 0:
+            chapters[0][1] = "\n\n".join(part for part in (chapters[0][1], chapters[1][1]) if part)
+            del chapters[1]
+        else:
+            chapters[index - 1][1] = "\n\n".join(part for part in (chapters[index - 1][1], chapters[index][1]) if part)
+            del chapters[index]
+    while len(chapters) > max(1, max_chapters):
+        sizes = [len(chapters[i][1]) + len(chapters[i + 1][1]) for i in range(len(chapters) - 1)]
+        smallest = sizes.index(min(sizes))
+        chapters[smallest][1] += "\n\n" + chapters[smallest + 1][1]
+        del chapters[smallest + 1]
+    return [(title, body) for title, body in chapters if body.strip()]
+
+
+def write_playlist(entries):
+    """HLS-style VOD playlist text for ``[(title, seconds, uri)]``"""
+    lines = [
+        "#EXTM3U",
+        "#EXT-X-VERSION:3",
+        "#EXT-X-PLAYLIST-TYPE:VOD",
+        f"#EXT-X-TARGETDURATION:{max([math.ceil(seconds or 0) for _, seconds, _ in entries] + [1])}",
+        "#EXT-X-MEDIA-SEQUENCE:0",
+    ]
+    for title, seconds, uri in entries:
+        lines.append(f"#EXTINF:{seconds or 0:.3f},{' '.join(title.replace(',', ' ').split())}")
+        lines.append(uri)
+    lines.append("#EXT-X-ENDLIST")
+    return "\n".join(lines) + "\n"
+
+
+def write_temp(text, suffix):
+    with tempfile.NamedTemporaryFile("w", delete=False, suffix=suffix, encoding="utf-8") as tmp_file:
+        tmp_file.write(text)
+        return tmp_file.name
+
+
+def build_manifest(title, language, style, chapters, playlist_url):
+    """Episode manifest: ``chapters`` are dicts with title, audio (URL), duration and transcript"""
+    offset = 0.0
+    entries = []
+    for index, chapter in enumerate(chapters):
+        duration = chapter["duration"] or 0.0
+        entries.append(dict(chapter, index=index, offset=round(offset, 3), duration=round(duration, 3)))
+        offset += duration
+    return {
+        "version": MANIFEST_VERSION,
+        "title": title,
+        "language": language,
+        "style": style,
+        "duration": round(offset, 3),
+        "playlist": playlist_url,
+        "chapters": entries,
+    }
+
+
+def load_manifest(path):
+    """Manifest written by a chapterized conversion, or None for any other output"""
+    if not path or not str(path).endswith(".json"):
+        return None
+    try:
+        with open(path, encoding="utf-8") as manifest:
+            return json.load(manifest)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read chapter manifest: {e}")
+        return None
+
+
+class ChapterCache:
+    """Finished chapters keyed on their source text and settings, so an edited document only re-renders what changed.
+
+    Entries unused for ``max_age`` seconds, and the least recently used beyond
+    ``max_bytes`` on disk, are deleted whenever a new one is stored.
+    """
+
+    def __init__(self, root=DEFAULT_CHAPTER_DIR, max_bytes=MAX_CHAPTER_CACHE_BYTES, max_age=MAX_CHAPTER_CACHE_AGE):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+
+    def get(self, key):
+        path = self.root / f"{key}.json"
+        try:
+            chapter = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(chapter["path"]):
+            return None
+        try:
+            # the modification time records the last use, for pruning
+            os.utime(path)
+        except OSError:
+            pass
+        return chapter
+
+    def put(self, key, chapter):
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile("w", dir=self.root, delete=False, encoding="utf-8") as tmp_file:
+                json.dump(chapter, tmp_file)
+            os.replace(tmp_file.name, self.root / f"{key}.json")
+        except OSError as e:
+            logger.warning(f"Could not cache chapter: {e}")
+            return
+        self.prune()
+
+    def prune(self, now=None):
+        """Delete expired entries, then the least recently used until the rest fit in ``max_bytes``"""
+        now = now or time.time()
+        entries = []
+        try:
+            for path in self.root.glob("*.json"):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        except OSError:
+            return
+        entries.sort(key=lambda entry: entry[0], reverse=True)
+        total = 0
+        for used, size, path in entries:
+            total += size
+            if now - used <= self.max_age and total <= self.max_bytes:
+                continue
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            total -= size
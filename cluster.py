@@ -0,0 +1,478 @@
+import json
+import logging
+import os
+import re
+import shutil
+import socket
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+from cancellation import JOB_DEADLINE
+from jobs import ANONYMOUS, TERMINAL_STATES
+
+logger = logging.getLogger(__name__)
+
+SHARED_DIR = os.environ.get("PODKAAST_SHARED_DIR")
+REPLICA_ID = os.environ.get("PODKAAST_REPLICA_ID") or f"{socket.gethostname()}-{os.getpid()}"
+REPLICA_URL = os.environ.get("PODKAAST_REPLICA_URL", "")
+HEARTBEAT_INTERVAL = 1.0
+REPLICA_TTL = 10.0
+RECORD_TTL = 24 * 3600
+POLL_INTERVAL = 0.25
+PRUNE_EVERY = 300
+MAX_DISPATCHED = 1000
+
+_JOB_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+class SharedStore:
+    """Directory every replica mounts (NFS, a bucket mount, or a plain local dir on one host).
+
+    Values are written to a temp file and renamed into place, so a reader on
+    any replica sees either the old or the new content, never a partial file.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path(self, key):
+        return self.root / key
+
+    def write_bytes(self, key, data):
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        staging = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+        with open(staging, "wb") as output:
+            output.write(data)
+        os.replace(staging, path)
+        return path
+
+    def read_bytes(self, key):
+        try:
+            return self.path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def write_json(self, key, value):
+        return self.write_bytes(key, json.dumps(value).encode("utf-8"))
+
+    def read_json(self, key):
+        data = self.read_bytes(key)
+        if data is None:
+            return None
+        try:
+            return json.loads(data)
+        except ValueError:
+            return None
+
+    def list(self, prefix):
+        try:
+            return sorted(entry.name for entry in self.path(prefix).iterdir() if not entry.name.startswith("."))
+        except FileNotFoundError:
+            return []
+
+    def move(self, key, new_key):
+        """Atomic hand-over: when several replicas race for ``key`` exactly one gets True"""
+        destination = self.path(new_key)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.rename(self.path(key), destination)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def delete(self, key):
+        path = self.path(key)
+        try:
+            if path.is_dir():
+                shutil.rmtree(path)
+            else:
+                path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def age(self, key):
+        try:
+            return time.time() - self.path(key).stat().st_mtime
+        except FileNotFoundError:
+            return None
+
+
+def _encode(value, store, prefix, files=None):
+    # PDF bytes travel as files next to the queue entry, everything else as JSON
+    files = [] if files is None else files
+    if isinstance(value, (bytes, bytearray)):
+        key = f"{prefix}/{len(files)}.bin"
+        store.write_bytes(key, bytes(value))
+        files.append(key)
+        return {"$file": key}
+    if isinstance(value, (list, tuple)):
+        return [_encode(item, store, prefix, files) for item in value]
+    return value
+
+
+def _decode(value, store):
+    if isinstance(value, dict) and "$file" in value:
+        return store.read_bytes(value["$file"])
+    if isinstance(value, list):
+        return [_decode(item, store) for item in value]
+    return value
+
+
+class RemoteJob:
+    """A job owned by another replica, read through its shared record.
+
+    Offers the parts of ``jobs.Job`` the UI and the API use, so callers do
+    not care which replica is doing the work.
+    """
+
+    def __init__(self, cluster, record):
+        self.cluster = cluster
+        self.record = record
+
+    def __getattr__(self, name):
+        if name in ("job_id", "user", "status", "stage", "error", "transcript", "created", "started", "finished",
+                    "version"):
+            return self.__dict__["record"].get(name)
+        raise AttributeError(name)
+
+    @property
+    def done(self):
+        return self.record["status"] in TERMINAL_STATES
+
+    @property
+    def audio_path(self):
+        name = self.record.get("audio")
+        return self.cluster.resolve_audio(name) if name else None
+
+    def refresh(self):
+        record = self.cluster.store.read_json(f"jobs/{self.job_id}.json")
+        if record is not None:
+            # a job still waiting in some queue will be adopted; anything else on a dead replica is lost
+            if (record["status"] not in TERMINAL_STATES and not self.cluster.alive(record["replica"])
+                    and not self.cluster.queued(self.job_id)):
+                record.update(status="failed", error=f"Replica {record['replica']} stopped responding")
+            self.record = record
+        return self.version
+
+    def wait_for_change(self, version, timeout=None):
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while self.refresh() == version and not self.done:
+            remaining = POLL_INTERVAL if deadline is None else min(POLL_INTERVAL, deadline - time.monotonic())
+            if remaining <= 0:
+                break
+            time.sleep(remaining)
+        return self.version
+
+    def cancel(self, reason="cancelled"):
+        self.refresh()
+        if self.done:
+            return False
+        self.cluster.request_cancel(self.job_id, reason)
+        return True
+
+    def result(self, timeout=None):
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while not self.done:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"Job {self.job_id} is still {self.status}")
+            self.wait_for_change(self.version, POLL_INTERVAL * 4)
+        if self.status == "done":
+            return self.audio_path, self.transcript
+        return None, self.transcript or f"Error: {self.error}"
+
+    def to_dict(self):
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "stage": self.stage,
+            "error": self.error,
+            "transcript": self.transcript if self.done else None,
+            "has_audio": bool(self.record.get("audio")),
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+        }
+
+
+class Cluster:
+    """One replica of a multi-replica deployment, coordinated through a SharedStore.
+
+    Every replica heartbeats its free conversion slots to ``replicas/``, mirrors
+    its jobs to ``jobs/<id>.json`` so any replica can answer for them, and
+    takes work from its own ``queue/<replica>/`` directory. A submission goes
+    to whichever live replica has the most free slots (ties stay local); work
+    queued for a replica that stopped heartbeating is adopted by the others.
+    Jobs that reference a replica-local upload always run where they landed.
+
+    Wraps a ``JobManager`` and offers the same ``submit``/``get``/``cancel_user``.
+    """
+
+    def __init__(self, store, jobs, convert, replica_id=REPLICA_ID, url=REPLICA_URL, resolve_audio=None,
+                 local_only=None, interval=HEARTBEAT_INTERVAL):
+        self.store = store
+        self.jobs = jobs
+        self.convert = convert
+        self.replica_id = replica_id
+        self.url = url
+        self.resolve_audio = resolve_audio or (lambda name: name)
+        self.local_only = local_only
+        self.interval = interval
+        self.scheduler = jobs.scheduler
+        self._dispatched = OrderedDict()
+        self._replicas = {}
+        self._publish_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._ticks = 0
+        jobs.on_update = self._publish
+
+    def start(self):
+        self.tick()
+        self._thread = threading.Thread(target=self._loop, name=f"cluster-{self.replica_id}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.store.delete(f"replicas/{self.replica_id}.json")
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.tick()
+            except Exception as e:
+                logger.warning(f"Cluster heartbeat failed: {e}")
+
+    def tick(self):
+        self.heartbeat()
+        self._refresh_replicas()
+        self._adopt_orphans()
+        self._claim()
+        self._apply_cancels()
+        self._ticks += 1
+        if self._ticks % PRUNE_EVERY == 0:
+            self._prune()
+
+    # --- membership and capacity ---
+
+    def _local_load(self):
+        stats = self.scheduler.stats()
+        return stats["workers"], stats["running"] + stats["queued"]
+
+    def heartbeat(self):
+        capacity, load = self._local_load()
+        self.store.write_json(f"replicas/{self.replica_id}.json", {
+            "replica": self.replica_id,
+            "url": self.url,
+            "capacity": capacity,
+            "load": load,
+            "updated": time.time(),
+        })
+
+    def _refresh_replicas(self):
+        replicas = {}
+        now = time.time()
+        for name in self.store.list("replicas"):
+            record = self.store.read_json(f"replicas/{name}")
+            if record and now - record["updated"] <= REPLICA_TTL:
+                replicas[record["replica"]] = record
+        with self._lock:
+            self._replicas = replicas
+
+    def replicas(self):
+        with self._lock:
+            return list(self._replicas.values())
+
+    def alive(self, replica_id):
+        if replica_id == self.replica_id:
+            return True
+        with self._lock:
+            if replica_id in self._replicas:
+                return True
+        # a replica that started heartbeating since the last refresh
+        record = self.store.read_json(f"replicas/{replica_id}.json")
+        return record is not None and time.time() - record["updated"] <= REPLICA_TTL
+
+    def queued(self, job_id):
+        """Whether ``job_id`` still waits in the queue of any replica"""
+        name = f"{job_id}.json"
+        return any(name in self.store.list(f"queue/{replica_id}") for replica_id in self.store.list("queue"))
+
+    def free_slots(self, record):
+        # heartbeat load is up to one interval old; the queue directory is counted live
+        pending = len(self.store.list(f"queue/{record['replica']}"))
+        return record["capacity"] - record["load"] - pending
+
+    def choose_replica(self):
+        capacity, load = self._local_load()
+        best = self.replica_id
+        best_free = capacity - load - len(self.store.list(f"queue/{self.replica_id}"))
+        for record in self.replicas():
+            if record["replica"] == self.replica_id:
+                continue
+            free = self.free_slots(record)
+            if free > best_free:
+                best, best_free = record["replica"], free
+        return best
+
+    # --- submission and lookup ---
+
+    def admit(self, user):
+        self.jobs.admit(user)
+
+    def submit(self, convert, *args, user=ANONYMOUS, deadline=JOB_DEADLINE, **kwargs):
+        if convert is not self.convert or kwargs or (self.local_only and self.local_only(*args)):
+            return self.jobs.submit(convert, *args, user=user, deadline=deadline, **kwargs)
+
+        target = self.choose_replica()
+        if target == self.replica_id:
+            return self.jobs.submit(convert, *args, user=user, deadline=deadline)
+
+        # rate limits are charged where the request arrived
+        self.jobs.admit(user)
+        return self._dispatch(target, args, user, deadline)
+
+    def _dispatch(self, target, args, user, deadline):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        record = {
+            "job_id": job_id,
+            "replica": target,
+            "user": user,
+            "status": "queued",
+            "stage": None,
+            "error": None,
+            "transcript": None,
+            "audio": None,
+            "created": now,
+            "started": None,
+            "finished": None,
+            "version": 0,
+        }
+        self.store.write_json(f"jobs/{job_id}.json", record)
+        self.store.write_json(f"queue/{target}/{job_id}.json", {
+            "job_id": job_id,
+            "user": user,
+            "args": _encode(list(args), self.store, f"inputs/{job_id}"),
+            "expires": now + deadline,
+        })
+        logger.info(f"Job {job_id} dispatched to replica {target}")
+
+        with self._lock:
+            self._dispatched[job_id] = user
+            while len(self._dispatched) > MAX_DISPATCHED:
+                self._dispatched.popitem(last=False)
+        return RemoteJob(self, record)
+
+    def get(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is not None or not _JOB_ID.match(job_id or ""):
+            return job
+        record = self.store.read_json(f"jobs/{job_id}.json")
+        if record is None:
+            return None
+        job = RemoteJob(self, record)
+        job.refresh()
+        return job
+
+    def request_cancel(self, job_id, reason):
+        self.store.write_json(f"cancels/{job_id}.json", {"reason": reason, "requested": time.time()})
+
+    def cancel_user(self, user, reason="cancelled"):
+        cancelled = self.jobs.cancel_user(user, reason)
+        with self._lock:
+            job_ids = [job_id for job_id, owner in self._dispatched.items() if owner == user]
+        for job_id in job_ids:
+            job = self.get(job_id)
+            if job is not None and job.cancel(reason):
+                cancelled += 1
+            else:
+                with self._lock:
+                    self._dispatched.pop(job_id, None)
+        return cancelled
+
+    # --- work owned by this replica ---
+
+    def _publish(self, job):
+        # snapshot under the lock so a slow writer can never replace a newer record with an older one
+        with self._publish_lock:
+            record = job.to_dict()
+            record.update(
+                replica=self.replica_id,
+                user=job.user,
+                version=job.version,
+                transcript=job.transcript if job.done else None,
+                audio=os.path.basename(job.audio_path) if job.audio_path else None
+            )
+            record.pop("has_audio")
+            try:
+                self.store.write_json(f"jobs/{job.job_id}.json", record)
+            except OSError as e:
+                logger.warning(f"Could not publish job {job.job_id}: {e}")
+
+    def _claim(self):
+        queue = f"queue/{self.replica_id}"
+        for name in self.store.list(queue):
+            entry = self.store.read_json(f"{queue}/{name}")
+            if entry is None:
+                self.store.delete(f"{queue}/{name}")
+                continue
+
+            job_id = entry["job_id"]
+            # the entry stays queued until the job is submitted, so a crash in between does not lose it
+            try:
+                args = _decode(entry["args"], self.store)
+                # an expired deadline still goes through the job so its record ends up "cancelled"
+                remaining = max(entry["expires"] - time.time(), 0.001)
+                self.jobs.submit(self.convert, *args, user=entry["user"], deadline=remaining, job_id=job_id,
+                                 admitted=True)
+            except Exception as e:
+                logger.error(f"Replica {self.replica_id} could not take job {job_id}: {e}")
+                continue
+            self.store.delete(f"{queue}/{name}")
+            self.store.delete(f"inputs/{job_id}")
+            logger.info(f"Replica {self.replica_id} took job {job_id}")
+
+    def _adopt_orphans(self):
+        for replica_id in self.store.list("queue"):
+            if self.alive(replica_id):
+                continue
+            for name in self.store.list(f"queue/{replica_id}"):
+                if self.store.move(f"queue/{replica_id}/{name}", f"queue/{self.replica_id}/{name}"):
+                    logger.warning(f"Adopted job {name[:-5]} from unresponsive replica {replica_id}")
+
+    def _apply_cancels(self):
+        for name in self.store.list("cancels"):
+            job_id = name[:-5]
+            job = self.jobs.get(job_id)
+            if job is not None:
+                request = self.store.read_json(f"cancels/{name}") or {}
+                job.cancel(request.get("reason", "cancelled"))
+                self.store.delete(f"cancels/{name}")
+                continue
+            record = self.store.read_json(f"jobs/{job_id}.json")
+            if record is None or record["status"] in TERMINAL_STATES:
+                self.store.delete(f"cancels/{name}")
+
+    def _prune(self):
+        for name in self.store.list("jobs"):
+            age = self.store.age(f"jobs/{name}")
+            if age is not None and age > RECORD_TTL:
+                self.store.delete(f"jobs/{name}")
+
+    def stats(self):
+        capacity, load = self._local_load()
+        return {
+            "replica": self.replica_id,
+            "capacity": capacity,
+            "load": load,
+            "replicas": {record["replica"]: self.free_slots(record) for record in self.replicas()},
+        }
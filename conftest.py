@@ -0,0 +1,13 @@
+import os
+import shutil
+import tempfile
+
+# every cache directory is read from PODKAAST_CACHE_DIR at import time, so the tests get a
+# fresh one before any test module imports the app and never touch ~/.cache/podkaast
+CACHE_DIR = tempfile.mkdtemp(prefix="podkaast-test-")
+os.environ["PODKAAST_CACHE_DIR"] = CACHE_DIR
+os.environ.pop("PODKAAST_SHARED_DIR", None)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(CACHE_DIR, ignore_errors=True)
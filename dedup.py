@@ -0,0 +1,166 @@
+import hashlib
+import logging
+import re
+from collections import Counter
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SPEECH_WORDS_PER_MINUTE = 150
+MINHASH_PERMUTATIONS = 64
+MINHASH_BANDS = 16
+SIMILARITY_THRESHOLD = 0.7
+SHINGLE_SIZE = 3
+MIN_PARAGRAPH_WORDS = 8
+MIN_LINE_REPEATS = 3
+MAX_BOILERPLATE_LINE_LENGTH = 120
+
+_ROWS_PER_BAND = MINHASH_PERMUTATIONS // MINHASH_BANDS
+_rng = np.random.default_rng(20240917)
+_PERM_A = _rng.integers(1, 2 ** 63, size=MINHASH_PERMUTATIONS, dtype=np.uint64) | np.uint64(1)
+_PERM_B = _rng.integers(0, 2 ** 63, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+_PAGE_NUMBER = re.compile(r"^[-–—\s]*(page\s*)?#+(\s*(of|/)\s*#+)?[-–—\s]*$")
+
+
+class DedupStats:
+    __slots__ = ("chars_before", "chars_after", "words_saved", "lines_dropped", "paragraphs_dropped")
+
+    def __init__(self):
+        self.chars_before = 0
+        self.chars_after = 0
+        self.words_saved = 0
+        self.lines_dropped = 0
+        self.paragraphs_dropped = 0
+
+    @property
+    def chars_saved(self):
+        return self.chars_before - self.chars_after
+
+    @property
+    def audio_seconds_saved(self):
+        return self.words_saved * 60.0 / SPEECH_WORDS_PER_MINUTE
+
+    def summary(self):
+        return (
+            f"Dedup removed {self.lines_dropped} repeated lines and {self.paragraphs_dropped} near-duplicate paragraphs, "
+            f"saving {self.chars_saved} characters (~{self.audio_seconds_saved:.0f}s of audio)"
+        )
+
+
+def _normalize(text):
+    return re.sub(r"\d+", "#", " ".join(text.lower().split()))
+
+
+def minhash_signature(words):
+    if len(words) < SHINGLE_SIZE:
+        shingles = [" ".join(words)]
+    else:
+        shingles = [" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)]
+
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little") for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles)
+    )
+    # multiply-shift hashing: uint64 arithmetic wraps, which is exactly what we want here
+    permuted = hashes[:, None] * _PERM_A + _PERM_B
+    return (permuted >> np.uint64(32)).min(axis=0).astype(np.uint32)
+
+
+def signature_similarity(a, b):
+    return float(np.count_nonzero(a == b)) / MINHASH_PERMUTATIONS
+
+
+class MinHashIndex:
+    """LSH over MinHash signatures: near duplicates collide in at least one band"""
+
+    def __init__(self, threshold=SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        self.bands = [dict() for _ in range(MINHASH_BANDS)]
+
+    def _keys(self, signature):
+        return [signature[i * _ROWS_PER_BAND:(i + 1) * _ROWS_PER_BAND].tobytes() for i in range(MINHASH_BANDS)]
+
+    def find(self, signature):
+        for band, key in zip(self.bands, self._keys(signature)):
+            for candidate in band.get(key, ()):
+                if signature_similarity(candidate, signature) >= self.threshold:
+                    return candidate
+        return None
+
+    def add(self, signature):
+        for band, key in zip(self.bands, self._keys(signature)):
+            band.setdefault(key, []).append(signature)
+
+
+def _drop_boilerplate_lines(lines, stats):
+    normalized = [" ".join(line.lower().split()) for line in lines]
+    counts = Counter(n for n in normalized if n and len(n) <= MAX_BOILERPLATE_LINE_LENGTH)
+
+    kept = []
+    seen = set()
+    for line, norm in zip(lines, normalized):
+        # the first copy of a repeated line stays, in case it is a heading or a sentence of the text
+        repeat = counts.get(norm, 0) >= MIN_LINE_REPEATS
+        if repeat and norm not in seen:
+            seen.add(norm)
+            repeat = False
+        if norm and (repeat or _PAGE_NUMBER.match(_normalize(norm))):
+            stats.lines_dropped += 1
+            stats.words_saved += len(line.split())
+            continue
+        kept.append(line)
+    return kept
+
+
+def _split_paragraphs(lines):
+    # pypdf rarely emits blank lines, so a short line ending a sentence also closes a paragraph
+    lengths = sorted(len(line) for line in lines if line.strip())
+    short_line = lengths[len(lengths) // 2] * 0.8 if lengths else 0
+
+    paragraphs = []
+    current = []
+    for line in lines:
+        stripped = line.strip()
+        if stripped:
+            current.append(line)
+            if len(line) < short_line and stripped[-1] in ".!?:":
+                paragraphs.append("\n".join(current))
+                current = []
+        elif current:
+            paragraphs.append("\n".join(current))
+            current = []
+    if current:
+        paragraphs.append("\n".join(current))
+    return paragraphs
+
+
+def deduplicate_text(text):
+    """Drop repeated header/footer lines and near-duplicate paragraphs.
+
+    Returns ``(text, DedupStats)``. Each paragraph gets one MinHash signature
+    and is looked up in a banded LSH index, so the pass is roughly linear in
+    the text size.
+    """
+    stats = DedupStats()
+    stats.chars_before = len(text)
+
+    lines = _drop_boilerplate_lines(text.split("\n"), stats)
+
+    index = MinHashIndex()
+    kept = []
+    for paragraph in _split_paragraphs(lines):
+        words = paragraph.lower().split()
+        if len(words) >= MIN_PARAGRAPH_WORDS:
+            signature = minhash_signature(words)
+            if index.find(signature) is not None:
+                stats.paragraphs_dropped += 1
+                stats.words_saved += len(words)
+                continue
+            index.add(signature)
+        kept.append(paragraph)
+
+    result = "\n\n".join(kept)
+    stats.chars_after = len(result)
+    return result, stats
@@ -0,0 +1,156 @@
+import re
+from array import array
+from itertools import chain
+
+from languages import DEFAULT_LANGUAGE, get_language
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+
+class Segment:
+    """A page, paragraph or sentence: byte offsets into the document buffer, no text copy"""
+
+    __slots__ = ("document", "start", "end")
+
+    def __init__(self, document, start, end):
+        self.document = document
+        self.start = start
+        self.end = end
+
+    def __len__(self):
+        return self.end - self.start
+
+    def view(self):
+        """Zero-copy memoryview of the UTF-8 bytes; release it before adding more pages"""
+        return memoryview(self.document.buffer)[self.start:self.end]
+
+    @property
+    def text(self):
+        with self.view() as view:
+            return str(view, "utf-8")
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return f"Segment({self.start}, {self.end})"
+
+
+class _SegmentTable:
+    """Sequence of segments over a pair of start/end offset arrays"""
+
+    __slots__ = ("document", "starts", "ends")
+
+    def __init__(self, document):
+        self.document = document
+        self.starts = array("I")
+        self.ends = array("I")
+
+    def append(self, start, end):
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(len(self)))]
+        return Segment(self.document, self.starts[index], self.ends[index])
+
+    def __iter__(self):
+        for start, end in zip(self.starts, self.ends):
+            yield Segment(self.document, start, end)
+
+    def nbytes(self):
+        return (len(self.starts) + len(self.ends)) * self.starts.itemsize
+
+
+class Document:
+    """Extracted text as one UTF-8 buffer plus offset tables.
+
+    Pages, paragraphs and sentences are recorded once, when a page is added,
+    as 32-bit byte offsets; every stage after that slices the shared buffer
+    through ``Segment`` views instead of re-splitting or copying strings.
+    Non-empty pages are separated by a blank line; empty pages keep their
+    slot in the page table as zero-length segments.
+    """
+
+    __slots__ = ("language", "buffer", "pages", "paragraphs", "sentences", "_resources")
+
+    def __init__(self, language=DEFAULT_LANGUAGE):
+        self.language = language
+        self.buffer = bytearray()
+        self.pages = _SegmentTable(self)
+        self.paragraphs = _SegmentTable(self)
+        self.sentences = _SegmentTable(self)
+        self._resources = get_language(language)
+
+    @classmethod
+    def from_pages(cls, pages, language=DEFAULT_LANGUAGE):
+        document = cls(language)
+        for page in pages:
+            document.add_page(page)
+        return document
+
+    @classmethod
+    def from_text(cls, text, language=DEFAULT_LANGUAGE):
+        return cls.from_pages([text], language)
+
+    @staticmethod
+    def _byte_offsets(text, positions):
+        """UTF-8 byte offsets of ascending character ``positions`` in ``text``, in one pass"""
+        if text.isascii():
+            return positions
+        offsets = []
+        previous_char = previous_byte = 0
+        for position in positions:
+            previous_byte += len(text[previous_char:position].encode("utf-8"))
+            previous_char = position
+            offsets.append(previous_byte)
+        return offsets
+
+    def add_page(self, text):
+        """Append a page and index its paragraphs and sentences; returns the new sentence range"""
+        text = (text or "").strip()
+        if text and self.buffer:
+            self.buffer += b"\n\n"
+        page_start = len(self.buffer)
+        first_sentence = len(self.sentences)
+
+        breaks = [(match.start(), match.end()) for match in _PARAGRAPH_BREAK.finditer(text)]
+        paragraph_starts = [0] + [end for _, end in breaks]
+        paragraph_ends = [start for start, _ in breaks] + [len(text)]
+        positions = []
+        sentence_counts = []
+        for paragraph_start, paragraph_end in zip(paragraph_starts, paragraph_ends):
+            spans = self._resources.sentence_spans(text, paragraph_start, paragraph_end)
+            if spans:
+                positions.extend(chain.from_iterable(spans))
+                sentence_counts.append(len(spans))
+
+        # the page is encoded once; sentence offsets are its character offsets, shifted to bytes
+        offsets = array("I", [page_start + offset for offset in self._byte_offsets(text, positions)])
+        self.buffer += text.encode("utf-8")
+        self.sentences.starts.extend(offsets[0::2])
+        self.sentences.ends.extend(offsets[1::2])
+        index = 0
+        for count in sentence_counts:
+            self.paragraphs.append(offsets[index], offsets[index + 2 * count - 1])
+            index += 2 * count
+        self.pages.append(page_start, len(self.buffer))
+        return first_sentence, len(self.sentences)
+
+    @property
+    def text(self):
+        return self.buffer.decode("utf-8")
+
+    def __len__(self):
+        return len(self.buffer)
+
+    def join(self, segments):
+        return self._resources.join_sentences([segment.text for segment in segments])
+
+    def nbytes(self):
+        """Buffer plus offset tables, the whole footprint of the indexed text"""
+        return len(self.buffer) + self.pages.nbytes() + self.paragraphs.nbytes() + self.sentences.nbytes()
@@ -0,0 +1,191 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import wave
+from collections import namedtuple
+from pathlib import Path
+
+from languages import get_language
+from summarizer import TOKEN
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CALIBRATION_PATH = Path(os.environ.get("PODKAAST_CACHE_DIR", Path.home() / ".cache" / "podkaast")) / "durations.json"
+MAX_AUDIO_SECONDS = float(os.environ.get("PODKAAST_MAX_AUDIO_SECONDS", "1200"))
+MAX_SYNTHESIS_SECONDS = float(os.environ.get("PODKAAST_MAX_SYNTHESIS_SECONDS", "600"))
+# what happens to a script predicted to run past MAX_AUDIO_SECONDS: "truncate" or "reject"
+OVER_BUDGET_POLICY = os.environ.get("PODKAAST_OVER_BUDGET", "truncate")
+# scheduler cost multiplier for jobs predicted to take longer than MAX_SYNTHESIS_SECONDS
+OVER_BUDGET_PENALTY = 4.0
+# synthesis wall-clock seconds per second of audio before any run has been measured
+DEFAULT_SYNTHESIS_RATIO = {"gtts": 0.2, "pyttsx3": 0.5}
+SMOOTHING = 0.2
+
+Estimate = namedtuple("Estimate", ["words", "audio_seconds", "synthesis_seconds"])
+
+# Layer III bitrates (kbit/s) and sample rates per MPEG version bits
+_MP3_BITRATES = {
+    3: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def count_words(text):
+    """Spoken units: words, or single characters in scripts written without spaces"""
+    return len(TOKEN.findall(text or ""))
+
+
+def _mp3_seconds(data):
+    position = 0
+    if data[:3] == b"ID3" and len(data) >= 10:
+        position = 10 + ((data[6] & 0x7F) << 21 | (data[7] & 0x7F) << 14 | (data[8] & 0x7F) << 7 | (data[9] & 0x7F))
+
+    seconds = 0.0
+    while position + 4 <= len(data):
+        b1, b2 = data[position + 1], data[position + 2]
+        version, layer = (b1 >> 3) & 3, (b1 >> 1) & 3
+        bitrate_index, rate_index = b2 >> 4, (b2 >> 2) & 3
+        if data[position] != 0xFF or (b1 & 0xE0) != 0xE0 or layer != 1 or version == 1 \
+                or bitrate_index in (0, 15) or rate_index == 3:
+            position += 1
+            continue
+        bitrate = _MP3_BITRATES[3 if version == 3 else 2][bitrate_index] * 1000
+        sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+        samples = 1152 if version == 3 else 576
+        position += samples // 8 * bitrate // sample_rate + ((b2 >> 1) & 1)
+        seconds += samples / sample_rate
+    return seconds
+
+
+def audio_seconds(path):
+    """Playing time of a WAV or MP3 file, or None if it cannot be read"""
+    try:
+        if str(path).endswith(".wav"):
+            with wave.open(str(path), "rb") as audio:
+                return audio.getnframes() / audio.getframerate()
+        with open(path, "rb") as audio:
+            return _mp3_seconds(audio.read()) or None
+    except (OSError, wave.Error, EOFError) as e:
+        logger.warning(f"Could not measure audio length: {e}")
+        return None
+
+
+class DurationEstimator:
+    """Predicts audio length and synthesis time of a script per engine and language.
+
+    Until a combination has been measured, speech runs at the language's
+    ``chars_per_minute`` and synthesis at ``DEFAULT_SYNTHESIS_RATIO`` of the
+    audio; every finished conversion then moves the per-word rates towards
+    what was observed, and the rates persist across restarts.
+    """
+
+    def __init__(self, path=DEFAULT_CALIBRATION_PATH, smoothing=SMOOTHING):
+        self.path = Path(path)
+        self.smoothing = smoothing
+        self._lock = threading.Lock()
+        try:
+            self.rates = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self.rates = {}
+
+    def _prior(self, text, engine, language):
+        audio = len(text) / get_language(language).chars_per_minute * 60
+        return audio, audio * DEFAULT_SYNTHESIS_RATIO.get(engine, 0.5)
+
+    def estimate(self, text, engine, language):
+        words = count_words(text)
+        with self._lock:
+            rate = self.rates.get(f"{engine}:{language}")
+        if rate is None:
+            audio, synthesis = self._prior(text, engine, language)
+            return Estimate(words, audio, synthesis)
+        return Estimate(words, words * rate["audio_per_word"], words * rate["synthesis_per_word"])
+
+    def planned(self, chars, engine, language):
+        """Estimate for a script of ``chars`` characters that has not been written yet"""
+        with self._lock:
+            rate = self.rates.get(f"{engine}:{language}")
+        if rate is None:
+            audio = chars / get_language(language).chars_per_minute * 60
+            return Estimate(None, audio, audio * DEFAULT_SYNTHESIS_RATIO.get(engine, 0.5))
+        words = chars / rate["chars_per_word"]
+        return Estimate(int(words), words * rate["audio_per_word"], words * rate["synthesis_per_word"])
+
+    def audio_limit(self, engine, language, max_audio=None, max_synthesis=None):
+        """Seconds of audio allowed by both the audio budget and the synthesis-time budget"""
+        max_audio = MAX_AUDIO_SECONDS if max_audio is None else max_audio
+        max_synthesis = MAX_SYNTHESIS_SECONDS if max_synthesis is None else max_synthesis
+        with self._lock:
+            rate = self.rates.get(f"{engine}:{language}")
+        if rate is None:
+            ratio = DEFAULT_SYNTHESIS_RATIO.get(engine, 0.5)
+        else:
+            ratio = rate["synthesis_per_word"] / rate["audio_per_word"]
+        return min(max_audio, max_synthesis / ratio) if ratio > 0 else max_audio
+
+    def record(self, text, engine, language, audio, synthesis=None):
+        """Calibrate from a finished run; ``synthesis`` is left out when it was not measured on its own"""
+        words = count_words(text)
+        if not words or not audio:
+            return
+        key = f"{engine}:{language}"
+        with self._lock:
+            rate = self.rates.get(key)
+            if rate is None:
+                prior_audio, prior_synthesis = self._prior(text, engine, language)
+                rate = {
+                    "audio_per_word": prior_audio / words,
+                    "synthesis_per_word": prior_synthesis / words,
+                    "chars_per_word": len(text) / words,
+                    "runs": 0,
+                }
+            weight = 1.0 if rate["runs"] == 0 else self.smoothing
+            rate["chars_per_word"] += weight * (len(text) / words - rate["chars_per_word"])
+            rate["audio_per_word"] += weight * (audio / words - rate["audio_per_word"])
+            if synthesis is not None:
+                rate["synthesis_per_word"] += weight * (synthesis / words - rate["synthesis_per_word"])
+            rate["runs"] += 1
+            self.rates[key] = rate
+            snapshot = json.dumps(self.rates)
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile("w", dir=self.path.parent, delete=False, encoding="utf-8") as tmp_file:
+                tmp_file.write(snapshot)
+            os.replace(tmp_file.name, self.path)
+        except OSError as e:
+            logger.warning(f"Could not save duration calibration: {e}")
+
+
+def trim_segments(segments, estimate, max_seconds, language):
+    """Yield segments until ``max_seconds`` of predicted audio, cutting the last one at a sentence boundary.
+
+    ``estimate(text)`` returns predicted seconds. Static template segments (the
+    introduction and outro) always play; dynamic content past the budget is dropped.
+    """
+    resources = get_language(language)
+    spent = 0.0
+    exhausted = False
+    for segment in segments:
+        text, is_static = segment[:2]
+        seconds = estimate(text)
+        if is_static or (not exhausted and spent + seconds <= max_seconds):
+            spent += seconds
+            yield segment
+            continue
+        if exhausted:
+            continue
+
+        kept = []
+        for sentence in resources.split_sentences(text):
+            seconds = estimate(sentence)
+            if spent + seconds > max_seconds:
+                break
+            kept.append(sentence)
+            spent += seconds
+        exhausted = True
+        logger.info(f"Script trimmed to about {max_seconds:.0f}s of audio")
+        if kept:
+            yield (resources.join_sentences(kept), is_static) + tuple(segment[2:])
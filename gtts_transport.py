@@ -0,0 +1,150 @@
+import base64
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from tenacity import RetryError, Retrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+from cancellation import check
+
+logger = logging.getLogger(__name__)
+
+GTTS_URL = os.environ.get("PODKAAST_GTTS_URL", "https://translate.google.{tld}/_/TranslateWebserverUi/data/batchexecute")
+GTTS_CONCURRENCY = int(os.environ.get("PODKAAST_GTTS_CONCURRENCY", "4"))
+GTTS_ATTEMPTS = 4
+GTTS_TIMEOUT = (5, 30)
+TRANSIENT_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+_AUDIO = re.compile(r'jQ1olc","\[\\"(.*)\\"]')
+
+
+class TransportError(Exception):
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+def _is_transient(error):
+    if isinstance(error, TransportError):
+        return error.status in TRANSIENT_STATUS
+    return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+
+def chunk_bodies(text, lang):
+    """gTTS's own tokenizer and RPC encoding, one request body per chunk"""
+    from gtts import gTTS
+    return gTTS(text=text, lang=lang).get_bodies()
+
+
+def parse_audio(payload):
+    audio = []
+    for line in payload.splitlines():
+        if "jQ1olc" in line:
+            match = _AUDIO.search(line)
+            if not match:
+                raise TransportError("TTS response contained no audio")
+            audio.append(base64.b64decode(match.group(1).encode("ascii")))
+    if not audio:
+        raise TransportError("TTS response contained no audio")
+    return b"".join(audio)
+
+
+class GTTSTransport:
+    """Sends gTTS chunk requests over one keep-alive session.
+
+    Chunks of a text are fetched in parallel, each retried with jittered
+    exponential backoff on transient failures, while a process-wide semaphore
+    caps in-flight requests so bursts don't get throttled upstream.
+    """
+
+    def __init__(self, url=GTTS_URL, concurrency=GTTS_CONCURRENCY, attempts=GTTS_ATTEMPTS,
+                 timeout=GTTS_TIMEOUT, backoff=0.5, max_backoff=8.0):
+        self.url = url
+        self.attempts = attempts
+        self.timeout = timeout
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="gtts")
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.chunks = 0
+        self.retried_chunks = 0
+        self.failed_chunks = 0
+
+    def _send(self, url, body):
+        from gtts import gTTS
+        with self._slots:
+            with self._lock:
+                self.requests += 1
+            response = self.session.post(url, data=body, headers=gTTS.GOOGLE_TTS_HEADERS, timeout=self.timeout)
+        if response.status_code != 200:
+            raise TransportError(f"TTS request failed with HTTP {response.status_code}", response.status_code)
+        return parse_audio(response.text)
+
+    def fetch_chunk(self, url, body, token=None):
+        """Return ``(audio, retries)`` for one chunk"""
+        attempts = 0
+        retrying = Retrying(
+            stop=stop_after_attempt(self.attempts),
+            wait=wait_random_exponential(multiplier=self.backoff, max=self.max_backoff),
+            retry=retry_if_exception(_is_transient),
+            reraise=True
+        )
+        for attempt in retrying:
+            with attempt:
+                check(token)
+                attempts += 1
+                audio = self._send(url, body)
+        return audio, attempts - 1
+
+    def synthesize(self, text, lang, tld="com", token=None):
+        """Audio bytes for ``text``; raises on a chunk that keeps failing"""
+        url = self.url.format(tld=tld)
+        bodies = chunk_bodies(text, lang)
+        futures = [self._executor.submit(self.fetch_chunk, url, body, token) for body in bodies]
+
+        audio = []
+        retried = 0
+        try:
+            for future in futures:
+                data, retries = future.result()
+                audio.append(data)
+                retried += bool(retries)
+        except (TransportError, requests.RequestException, RetryError):
+            with self._lock:
+                self.failed_chunks += 1
+            raise
+        finally:
+            for future in futures:
+                future.cancel()
+            with self._lock:
+                self.chunks += len(audio)
+                self.retried_chunks += retried
+
+        if retried:
+            logger.info(f"gTTS: {retried} of {len(bodies)} chunks needed a retry")
+        return b"".join(audio)
+
+    def save(self, text, lang, path, tld="com", token=None):
+        audio = self.synthesize(text, lang, tld, token)
+        with open(path, "wb") as output:
+            output.write(audio)
+        return path
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "chunks": self.chunks,
+                "retried_chunks": self.retried_chunks,
+                "failed_chunks": self.failed_chunks,
+            }
@@ -0,0 +1,230 @@
+import hashlib
+import ipaddress
+import logging
+import os
+import re
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from cancellation import check
+
+logger = logging.getLogger(__name__)
+
+MAX_WORKERS = 8
+FETCH_TIMEOUT = (5, 30)
+MAX_FETCH_BYTES = 20 * 1024 * 1024
+MAX_REDIRECTS = 5
+# URLs come from users, so by default only public addresses are fetched; set for trusted local setups
+ALLOW_PRIVATE_URLS = os.environ.get("PODKAAST_ALLOW_PRIVATE_URLS", "").lower() in ("1", "true", "yes", "on")
+USER_AGENT = "Podkaast/2.0 (+https://github.com/nikhil-shr-23/Podkaast)"
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class FetchError(Exception):
+    pass
+
+
+def get_session():
+    """Shared keep-alive session so concurrent fetches reuse connections"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["User-Agent"] = USER_AGENT
+            _session = session
+        return _session
+
+
+def parse_urls(url_text):
+    if not url_text:
+        return []
+
+    urls = []
+    for candidate in re.split(r"[\s,]+", url_text.strip()):
+        if candidate.startswith(("http://", "https://")) and candidate not in urls:
+            urls.append(candidate)
+    return urls
+
+
+def check_public_url(url):
+    """Raise FetchError unless ``url`` is http(s) and its host resolves only to public addresses"""
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise FetchError(f"{url} is not an http(s) URL")
+    try:
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        addresses = socket.getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM)
+    except (ValueError, socket.gaierror) as e:
+        raise FetchError(f"Could not resolve {parts.hostname}: {e}")
+    for address in addresses:
+        ip = ipaddress.ip_address(address[4][0].split("%", 1)[0])
+        # is_global rules out loopback, private, link-local, shared and reserved ranges
+        if not ip.is_global or ip.is_multicast:
+            raise FetchError(f"{url} points to a non-public address")
+
+
+def fetch_url(url, session=None, timeout=FETCH_TIMEOUT, max_bytes=MAX_FETCH_BYTES, token=None):
+    session = session or get_session()
+
+    # redirects are followed by hand, so every hop is checked before it is requested
+    for _ in range(MAX_REDIRECTS + 1):
+        if not ALLOW_PRIVATE_URLS:
+            check_public_url(url)
+        response = session.get(url, timeout=timeout, stream=True, allow_redirects=False)
+        if not response.is_redirect:
+            break
+        response.close()
+        url = urljoin(url, response.headers["Location"])
+    else:
+        raise FetchError(f"{url} redirected more than {MAX_REDIRECTS} times")
+
+    with response:
+        response.raise_for_status()
+
+        declared = response.headers.get("Content-Length")
+        if declared and declared.isdigit() and int(declared) > max_bytes:
+            raise FetchError(f"{url} is larger than {max_bytes} bytes")
+
+        chunks = []
+        received = 0
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            check(token)
+            received += len(chunk)
+            if received > max_bytes:
+                raise FetchError(f"{url} is larger than {max_bytes} bytes")
+            chunks.append(chunk)
+
+        content_type = response.headers.get("Content-Type", "")
+        return b"".join(chunks), content_type, response.encoding
+
+
+class _HTMLTextExtractor(HTMLParser):
+    SKIP_TAGS = {"script", "style", "noscript", "head", "svg", "nav", "footer"}
+    BLOCK_TAGS = {"p", "div", "br", "li", "section", "article", "h1", "h2", "h3", "h4", "h5", "h6", "tr", "blockquote", "pre"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS and self.skip_depth:
+            self.skip_depth -= 1
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.parts.append(data)
+
+
+def html_to_text(html):
+    parser = _HTMLTextExtractor()
+    parser.feed(html)
+    parser.close()
+
+    lines = (re.sub(r"[ \t\r\f\v]+", " ", line).strip() for line in "".join(parser.parts).split("\n"))
+    text = "\n".join(lines)
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+
+def _is_pdf(url, content, content_type):
+    return (
+        "application/pdf" in content_type
+        or content.startswith(b"%PDF")
+        or url.lower().split("?", 1)[0].endswith(".pdf")
+    )
+
+
+def extract_url(url, extract_pdf, session=None, token=None):
+    content, content_type, encoding = fetch_url(url, session=session, token=token)
+
+    if _is_pdf(url, content, content_type):
+        return extract_pdf(content)
+
+    text = content.decode(encoding or "utf-8", errors="replace")
+    if "html" in content_type or text.lstrip()[:1] == "<":
+        return html_to_text(text)
+    return text.strip()
+
+
+def merge_texts(texts):
+    """Join extracted sources, dropping paragraphs that were already seen"""
+    seen = set()
+    paragraphs = []
+
+    for text in texts:
+        for paragraph in re.split(r"\n\s*\n", text):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            key = hashlib.sha1(" ".join(paragraph.lower().split()).encode("utf-8")).digest()
+            if key in seen:
+                continue
+            seen.add(key)
+            paragraphs.append(paragraph)
+
+    return "\n\n".join(paragraphs)
+
+
+def normalize_pdf_files(pdf_files):
+    if pdf_files is None:
+        return []
+    if isinstance(pdf_files, (bytes, bytearray)):
+        return [bytes(pdf_files)]
+    return [pdf for pdf in pdf_files if pdf]
+
+
+def ingest_sources(pdf_files, url_text, extract_pdf, session=None, max_workers=MAX_WORKERS, token=None):
+    """Extract every PDF and URL concurrently and merge them into one corpus.
+
+    Returns ``(corpus, errors)``; failed sources are reported in ``errors``
+    instead of aborting the whole conversion. A cancelled ``token`` raises
+    ``Cancelled`` once the in-flight sources have stopped.
+    """
+    pdfs = normalize_pdf_files(pdf_files)
+    urls = parse_urls(url_text)
+
+    if not pdfs and not urls:
+        return "", ["No PDF or URL provided"]
+
+    sources = [(f"PDF #{index + 1}", extract_pdf, pdf) for index, pdf in enumerate(pdfs)]
+    sources += [(url, lambda u: extract_url(u, extract_pdf, session=session, token=token), url) for url in urls]
+
+    texts = []
+    errors = []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(sources))) as executor:
+        futures = [(name, executor.submit(func, arg)) for name, func, arg in sources]
+
+        for name, future in futures:
+            try:
+                text = future.result()
+            except Exception as e:
+                logger.error(f"Ingestion of {name} failed: {e}")
+                errors.append(f"{name}: {e}")
+                continue
+
+            if not text or text.startswith("Error"):
+                errors.append(f"{name}: {text or 'no text found'}")
+                continue
+            texts.append(text)
+
+    check(token)
+    return merge_texts(texts), errors
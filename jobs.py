@@ -0,0 +1,167 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from cancellation import JOB_DEADLINE, CancelToken, Cancelled
+from scheduler import FairScheduler
+
+logger = logging.getLogger(__name__)
+
+CONVERSION_WORKERS = int(os.environ.get("PODKAAST_CONVERSION_WORKERS", "4"))
+MAX_TRACKED_JOBS = 1000
+ANONYMOUS = "anonymous"
+TERMINAL_STATES = ("done", "failed", "cancelled")
+
+
+class Job:
+    def __init__(self, job_id=None, user=None, deadline=JOB_DEADLINE, on_update=None, profile=False):
+        self.job_id = job_id or uuid.uuid4().hex
+        self.user = user
+        self.profile = profile
+        self.token = CancelToken(deadline)
+        self.status = "queued"
+        self.stage = None
+        self.audio_path = None
+        self.transcript = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.version = 0
+        self.future = None
+        self.on_update = on_update
+        self._cond = threading.Condition()
+
+    def _update(self, **fields):
+        with self._cond:
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self.version += 1
+            self._cond.notify_all()
+        if self.on_update is not None:
+            self.on_update(self)
+
+    def set_stage(self, stage):
+        self._update(stage=stage)
+
+    def cancel(self, reason="cancelled"):
+        """Stop the job: queued jobs never start, running ones stop at their next checkpoint"""
+        if self.done:
+            return False
+        self.token.cancel(reason)
+        if self.future is not None and self.future.cancel():
+            self._update(status="cancelled", error=reason, finished=time.time())
+        return True
+
+    def wait_for_change(self, version, timeout=None):
+        with self._cond:
+            self._cond.wait_for(lambda: self.version != version or self.finished, timeout=timeout)
+            return self.version
+
+    def result(self, timeout=None):
+        return self.future.result(timeout=timeout)
+
+    @property
+    def done(self):
+        return self.status in TERMINAL_STATES
+
+    def to_dict(self):
+        with self._cond:
+            return {
+                "job_id": self.job_id,
+                "status": self.status,
+                "stage": self.stage,
+                "error": self.error,
+                "transcript": self.transcript if self.done else None,
+                "has_audio": self.audio_path is not None,
+                "created": self.created,
+                "started": self.started,
+                "finished": self.finished,
+                "profile": self.job_id if self.profile else None,
+            }
+
+
+class JobManager:
+    """One conversion pool shared by the Gradio handler and the REST API.
+
+    Jobs are ordered by a per-user fair scheduler; ``estimate_cost`` maps the
+    conversion arguments to a relative size so small jobs are served first.
+    ``on_update`` is called with the job after every state change. With a
+    ``profiles`` store, profiled jobs record their artifacts there under the job id.
+    """
+
+    def __init__(self, max_workers=CONVERSION_WORKERS, max_jobs=MAX_TRACKED_JOBS, estimate_cost=None, scheduler=None,
+                 on_update=None, profiles=None):
+        self.scheduler = scheduler or FairScheduler(max_workers)
+        self.estimate_cost = estimate_cost or (lambda *args: 1.0)
+        self.max_jobs = max_jobs
+        self.on_update = on_update
+        self.profiles = profiles
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _run(self, job, convert, args, kwargs):
+        job._update(status="running", started=time.time())
+        try:
+            job.token.check()
+            if job.profile:
+                audio_path, transcript = self.profiles.run(
+                    job.job_id, convert, *args, report=job.set_stage, token=job.token, **kwargs
+                )
+            else:
+                audio_path, transcript = convert(*args, report=job.set_stage, token=job.token, **kwargs)
+        except Cancelled as e:
+            logger.info(f"Job {job.job_id} cancelled: {e.reason}")
+            job._update(status="cancelled", error=e.reason, finished=time.time())
+            return None, f"Cancelled: {e.reason}"
+        except Exception as e:
+            logger.error(f"Job {job.job_id} crashed: {e}")
+            job._update(status="failed", error=str(e), finished=time.time())
+            return None, f"Error: {str(e)}"
+
+        if audio_path:
+            job._update(status="done", audio_path=audio_path, transcript=transcript, finished=time.time())
+        else:
+            job._update(status="failed", error=transcript, transcript=transcript, finished=time.time())
+        return audio_path, transcript
+
+    def admit(self, user):
+        self.scheduler.admit(user)
+
+    def submit(self, convert, *args, user=ANONYMOUS, deadline=JOB_DEADLINE, job_id=None, admitted=False, profile=False,
+               **kwargs):
+        """Queue a conversion for ``user``; raises scheduler.RateLimited when they are over their rate.
+
+        ``deadline`` (seconds, counted from submission) bounds queueing and running time together.
+        ``job_id`` and ``admitted`` let a job handed over by another replica keep its id and rate charge.
+        ``profile`` records a profile of the conversion; every job is profiled when the store is enabled.
+        """
+        profile = self.profiles is not None and (profile or self.profiles.enabled)
+        job = Job(job_id, user=user, deadline=deadline, on_update=self.on_update, profile=profile)
+        job.future = self.scheduler.submit(
+            user,
+            self.estimate_cost(*args),
+            lambda: self._run(job, convert, args, kwargs),
+            admitted=admitted
+        )
+        if self.on_update is not None:
+            self.on_update(job)
+        with self._lock:
+            self._jobs[job.job_id] = job
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel_user(self, user, reason="cancelled"):
+        with self._lock:
+            jobs = [job for job in self._jobs.values() if job.user == user and not job.done]
+        for job in jobs:
+            job.cancel(reason)
+        return len(jobs)
@@ -0,0 +1,360 @@
+import logging
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LANGUAGE = "English"
+
+# language name -> (ISO code, gTTS tld, sentence rule family)
+LANGUAGE_CODES = {
+    "English": ("en", "com", "latin"),
+    "Spanish": ("es", "es", "latin"),
+    "French": ("fr", "fr", "latin"),
+    "German": ("de", "de", "latin"),
+    "Chinese": ("zh-CN", "com", "cjk"),
+    "Japanese": ("ja", "co.jp", "cjk"),
+    "Korean": ("ko", "co.kr", "korean"),
+    "Hindi": ("hi", "co.in", "indic"),
+    "Portuguese": ("pt", "com.br", "latin"),
+    "Russian": ("ru", "ru", "latin"),
+    "Italian": ("it", "it", "latin"),
+    "Turkish": ("tr", "com.tr", "latin"),
+    "Polish": ("pl", "pl", "latin"),
+}
+
+SUPPORTED_LANGUAGES = list(LANGUAGE_CODES)
+
+# gTTS accents per language, the first matching LANGUAGE_CODES; dialogue speakers take turns through them
+GTTS_ACCENTS = {
+    "English": ("com", "co.uk"),
+    "Spanish": ("es", "com.mx"),
+    "French": ("fr", "ca"),
+    "Portuguese": ("com.br", "pt"),
+}
+
+PYTTSX3_RATE = 150
+# with a single system voice, the second speaker is told apart by speaking faster
+SPEAKER_RATE_STEP = 25
+
+# characters of text spoken per minute at the default TTS rate
+SPEECH_CHARS_PER_MINUTE = {"latin": 850, "cjk": 300, "korean": 420, "indic": 700}
+
+# each rule matches a sentence terminator and captures the gap after it in group 1; anchoring on
+# the terminator instead of a lookbehind lets the regex engine skip straight to candidate positions
+SENTENCE_RULES = {
+    # Latin and Cyrillic scripts separate sentences with punctuation plus whitespace
+    "latin": r"[.!?…][\"'”»)]?(\s+)",
+    # Chinese and Japanese use full-width terminators and no spaces between sentences
+    "cjk": r"(?:[。！？!?…][」』”）)]?(?![」』”）)])|\.(?=\s))(\s*)",
+    "korean": r"[.!?。！？…][\"'”)]?(\s+)",
+    "indic": r"(?:[।॥]|[!?.](?=\s))(\s*)",
+}
+
+# every abbreviation ends in a full stop
+ABBREVIATIONS = {
+    "English": {"mr.", "mrs.", "ms.", "dr.", "prof.", "e.g.", "i.e.", "etc.", "vs.", "fig.", "no.", "st."},
+    "Spanish": {"sr.", "sra.", "dr.", "dra.", "etc.", "p.ej."},
+    "French": {"m.", "mme.", "dr.", "etc.", "p.ex."},
+    "German": {"z.b.", "bzw.", "usw.", "dr.", "nr.", "ca.", "d.h."},
+    "Portuguese": {"sr.", "sra.", "dr.", "etc."},
+    "Italian": {"sig.", "dott.", "ecc."},
+    "Russian": {"т.е.", "т.д.", "др.", "г."},
+    "Polish": {"np.", "itd.", "tzn.", "dr."},
+    "Turkish": {"dr.", "vb.", "vs."},
+}
+
+TEMPLATES = {
+    "English": {
+        "title": "Podcast Script", "topic": "Topic", "tone": "Tone", "length": "Length", "language": "Language",
+        "introduction": "Introduction", "main_content": "Main Content", "summary": "Summary", "outro": "Outro",
+        "focus_general": "General content overview",
+        "focus_question": "Focusing on: {question}",
+        "intro_text": "Welcome to today's podcast! We'll be discussing content from your uploaded document.",
+        "summary_text": "This podcast covered the key points from your document. The content has been adapted to a {tone} tone and formatted for {length} listening.",
+        "outro_text": "Thank you for listening! This podcast was generated from your PDF content.",
+        "tones": {"Fun": "fun", "Formal": "formal"},
+        "lengths": {"Short (1-2 min)": "short (1-2 min)", "Medium (3-5 min)": "medium (3-5 min)"},
+        "prompts": ["What stands out to you here?", "Why does that matter?", "What else should listeners know?"],
+    },
+    "Spanish": {
+        "title": "Guion del podcast", "topic": "Tema", "tone": "Tono", "length": "Duración", "language": "Idioma",
+        "introduction": "Introducción", "main_content": "Contenido principal", "summary": "Resumen", "outro": "Despedida",
+        "focus_general": "Resumen general del contenido",
+        "focus_question": "Enfoque: {question}",
+        "intro_text": "¡Bienvenidos al podcast de hoy! Hablaremos sobre el contenido del documento que has subido.",
+        "summary_text": "Este podcast ha repasado los puntos clave de tu documento. El contenido se ha adaptado a un tono {tone} y a un formato de escucha {length}.",
+        "outro_text": "¡Gracias por escuchar! Este podcast se generó a partir del contenido de tu PDF.",
+        "tones": {"Fun": "divertido", "Formal": "formal"},
+        "lengths": {"Short (1-2 min)": "corto (1-2 min)", "Medium (3-5 min)": "medio (3-5 min)"},
+        "prompts": ["¿Qué te llama la atención aquí?", "¿Por qué es importante?", "¿Qué más deberían saber los oyentes?"],
+    },
+    "French": {
+        "title": "Script du podcast", "topic": "Sujet", "tone": "Ton", "length": "Durée", "language": "Langue",
+        "introduction": "Introduction", "main_content": "Contenu principal", "summary": "Résumé", "outro": "Conclusion",
+        "focus_general": "Aperçu général du contenu",
+        "focus_question": "Thème : {question}",
+        "intro_text": "Bienvenue dans le podcast du jour ! Nous allons parler du contenu du document que vous avez envoyé.",
+        "summary_text": "Ce podcast a présenté les points clés de votre document. Le contenu a été adapté à un ton {tone} et à une écoute {length}.",
+        "outro_text": "Merci de votre écoute ! Ce podcast a été généré à partir du contenu de votre PDF.",
+        "tones": {"Fun": "ludique", "Formal": "formel"},
+        "lengths": {"Short (1-2 min)": "courte (1-2 min)", "Medium (3-5 min)": "moyenne (3-5 min)"},
+        "prompts": ["Qu'est-ce qui te frappe ici ?", "Pourquoi est-ce important ?", "Que faut-il encore savoir ?"],
+    },
+    "German": {
+        "title": "Podcast-Skript", "topic": "Thema", "tone": "Ton", "length": "Länge", "language": "Sprache",
+        "introduction": "Einleitung", "main_content": "Hauptinhalt", "summary": "Zusammenfassung", "outro": "Abschluss",
+        "focus_general": "Allgemeiner Überblick über den Inhalt",
+        "focus_question": "Schwerpunkt: {question}",
+        "intro_text": "Willkommen zum heutigen Podcast! Wir sprechen über den Inhalt des von Ihnen hochgeladenen Dokuments.",
+        "summary_text": "Dieser Podcast hat die wichtigsten Punkte Ihres Dokuments behandelt. Der Inhalt wurde an einen {tone} Ton angepasst und für eine {length} Hördauer aufbereitet.",
+        "outro_text": "Danke fürs Zuhören! Dieser Podcast wurde aus dem Inhalt Ihres PDFs erstellt.",
+        "tones": {"Fun": "lockeren", "Formal": "formellen"},
+        "lengths": {"Short (1-2 min)": "kurze (1-2 Min.)", "Medium (3-5 min)": "mittlere (3-5 Min.)"},
+        "prompts": ["Was fällt dir hier auf?", "Warum ist das wichtig?", "Was sollten die Zuhörer noch wissen?"],
+    },
+    "Chinese": {
+        "title": "播客脚本", "topic": "主题", "tone": "语气", "length": "时长", "language": "语言",
+        "introduction": "开场", "main_content": "主要内容", "summary": "总结", "outro": "结束语",
+        "focus_general": "内容概览",
+        "focus_question": "重点：{question}",
+        "intro_text": "欢迎收听今天的播客！我们将讨论您上传的文档中的内容。",
+        "summary_text": "本期播客介绍了您文档中的要点。内容已调整为{tone}的语气，并按{length}的收听时长进行编排。",
+        "outro_text": "感谢收听！本期播客由您的 PDF 内容生成。",
+        "tones": {"Fun": "轻松", "Formal": "正式"},
+        "lengths": {"Short (1-2 min)": "短（1-2 分钟）", "Medium (3-5 min)": "中等（3-5 分钟）"},
+        "prompts": ["这里有什么值得注意的？", "为什么这很重要？", "听众还应该了解什么？"],
+    },
+    "Japanese": {
+        "title": "ポッドキャスト台本", "topic": "トピック", "tone": "トーン", "length": "長さ", "language": "言語",
+        "introduction": "イントロダクション", "main_content": "本編", "summary": "まとめ", "outro": "エンディング",
+        "focus_general": "内容の概要",
+        "focus_question": "テーマ：{question}",
+        "intro_text": "今日のポッドキャストへようこそ！アップロードされたドキュメントの内容についてお話しします。",
+        "summary_text": "このポッドキャストでは、ドキュメントの要点を紹介しました。内容は{tone}トーンに調整され、{length}で聴ける構成になっています。",
+        "outro_text": "ご清聴ありがとうございました！このポッドキャストはPDFの内容から生成されました。",
+        "tones": {"Fun": "楽しい", "Formal": "フォーマルな"},
+        "lengths": {"Short (1-2 min)": "短め（1〜2分）", "Medium (3-5 min)": "標準（3〜5分）"},
+        "prompts": ["ここで注目すべき点は何ですか？", "それはなぜ重要なのですか？", "リスナーが他に知っておくべきことは？"],
+    },
+    "Korean": {
+        "title": "팟캐스트 대본", "topic": "주제", "tone": "톤", "length": "길이", "language": "언어",
+        "introduction": "소개", "main_content": "주요 내용", "summary": "요약", "outro": "마무리",
+        "focus_general": "전체 내용 개요",
+        "focus_question": "초점: {question}",
+        "intro_text": "오늘의 팟캐스트에 오신 것을 환영합니다! 업로드하신 문서의 내용을 함께 살펴보겠습니다.",
+        "summary_text": "이번 팟캐스트에서는 문서의 핵심 내용을 다루었습니다. 내용은 {tone} 톤으로 조정되었으며 {length} 분량으로 구성되었습니다.",
+        "outro_text": "들어 주셔서 감사합니다! 이 팟캐스트는 PDF 내용을 바탕으로 생성되었습니다.",
+        "tones": {"Fun": "재미있는", "Formal": "격식 있는"},
+        "lengths": {"Short (1-2 min)": "짧은(1-2분)", "Medium (3-5 min)": "중간(3-5분)"},
+        "prompts": ["여기서 눈에 띄는 점은 무엇인가요?", "그게 왜 중요한가요?", "청취자들이 또 알아야 할 것은 무엇인가요?"],
+    },
+    "Hindi": {
+        "title": "पॉडकास्ट स्क्रिप्ट", "topic": "विषय", "tone": "शैली", "length": "अवधि", "language": "भाषा",
+        "introduction": "परिचय", "main_content": "मुख्य सामग्री", "summary": "सारांश", "outro": "समापन",
+        "focus_general": "सामग्री का सामान्य अवलोकन",
+        "focus_question": "केंद्र बिंदु: {question}",
+        "intro_text": "आज के पॉडकास्ट में आपका स्वागत है! हम आपके अपलोड किए गए दस्तावेज़ की सामग्री पर चर्चा करेंगे।",
+        "summary_text": "इस पॉडकास्ट में आपके दस्तावेज़ के मुख्य बिंदु शामिल किए गए। सामग्री को {tone} शैली में ढाला गया है और {length} सुनने के लिए तैयार किया गया है।",
+        "outro_text": "सुनने के लिए धन्यवाद! यह पॉडकास्ट आपकी PDF सामग्री से बनाया गया है।",
+        "tones": {"Fun": "मज़ेदार", "Formal": "औपचारिक"},
+        "lengths": {"Short (1-2 min)": "छोटी (1-2 मिनट)", "Medium (3-5 min)": "मध्यम (3-5 मिनट)"},
+        "prompts": ["इसमें आपको क्या खास लगता है?", "यह क्यों महत्वपूर्ण है?", "श्रोताओं को और क्या जानना चाहिए?"],
+    },
+    "Portuguese": {
+        "title": "Roteiro do podcast", "topic": "Tema", "tone": "Tom", "length": "Duração", "language": "Idioma",
+        "introduction": "Introdução", "main_content": "Conteúdo principal", "summary": "Resumo", "outro": "Encerramento",
+        "focus_general": "Visão geral do conteúdo",
+        "focus_question": "Foco: {question}",
+        "intro_text": "Bem-vindo ao podcast de hoje! Vamos falar sobre o conteúdo do documento que você enviou.",
+        "summary_text": "Este podcast abordou os pontos principais do seu documento. O conteúdo foi adaptado para um tom {tone} e formatado para uma audição {length}.",
+        "outro_text": "Obrigado por ouvir! Este podcast foi gerado a partir do conteúdo do seu PDF.",
+        "tones": {"Fun": "descontraído", "Formal": "formal"},
+        "lengths": {"Short (1-2 min)": "curta (1-2 min)", "Medium (3-5 min)": "média (3-5 min)"},
+        "prompts": ["O que chama a sua atenção aqui?", "Por que isso é importante?", "O que mais os ouvintes devem saber?"],
+    },
+    "Russian": {
+        "title": "Сценарий подкаста", "topic": "Тема", "tone": "Тон", "length": "Длительность", "language": "Язык",
+        "introduction": "Вступление", "main_content": "Основная часть", "summary": "Итоги", "outro": "Завершение",
+        "focus_general": "Общий обзор содержания",
+        "focus_question": "В центре внимания: {question}",
+        "intro_text": "Добро пожаловать в сегодняшний подкаст! Мы обсудим содержание загруженного вами документа.",
+        "summary_text": "В этом подкасте мы рассмотрели ключевые моменты вашего документа. Материал адаптирован под {tone} тон и рассчитан на {length} прослушивание.",
+        "outro_text": "Спасибо, что слушали! Этот подкаст создан на основе содержимого вашего PDF.",
+        "tones": {"Fun": "непринуждённый", "Formal": "официальный"},
+        "lengths": {"Short (1-2 min)": "короткое (1-2 мин)", "Medium (3-5 min)": "среднее (3-5 мин)"},
+        "prompts": ["Что здесь особенно интересно?", "Почему это важно?", "Что ещё стоит знать слушателям?"],
+    },
+    "Italian": {
+        "title": "Copione del podcast", "topic": "Argomento", "tone": "Tono", "length": "Durata", "language": "Lingua",
+        "introduction": "Introduzione", "main_content": "Contenuto principale", "summary": "Riepilogo", "outro": "Chiusura",
+        "focus_general": "Panoramica generale dei contenuti",
+        "focus_question": "Focus: {question}",
+        "intro_text": "Benvenuti al podcast di oggi! Parleremo dei contenuti del documento che hai caricato.",
+        "summary_text": "Questo podcast ha trattato i punti chiave del tuo documento. Il contenuto è stato adattato a un tono {tone} e pensato per un ascolto {length}.",
+        "outro_text": "Grazie per l'ascolto! Questo podcast è stato generato dai contenuti del tuo PDF.",
+        "tones": {"Fun": "divertente", "Formal": "formale"},
+        "lengths": {"Short (1-2 min)": "breve (1-2 min)", "Medium (3-5 min)": "medio (3-5 min)"},
+        "prompts": ["Cosa ti colpisce qui?", "Perché è importante?", "Cos'altro dovrebbero sapere gli ascoltatori?"],
+    },
+    "Turkish": {
+        "title": "Podcast Metni", "topic": "Konu", "tone": "Üslup", "length": "Süre", "language": "Dil",
+        "introduction": "Giriş", "main_content": "Ana İçerik", "summary": "Özet", "outro": "Kapanış",
+        "focus_general": "Genel içerik özeti",
+        "focus_question": "Odak: {question}",
+        "intro_text": "Bugünkü podcast'e hoş geldiniz! Yüklediğiniz belgenin içeriğini konuşacağız.",
+        "summary_text": "Bu podcast belgenizdeki önemli noktaları ele aldı. İçerik {tone} bir üsluba uyarlandı ve {length} dinleme için düzenlendi.",
+        "outro_text": "Dinlediğiniz için teşekkürler! Bu podcast PDF içeriğinizden oluşturuldu.",
+        "tones": {"Fun": "eğlenceli", "Formal": "resmi"},
+        "lengths": {"Short (1-2 min)": "kısa (1-2 dk)", "Medium (3-5 min)": "orta uzunlukta (3-5 dk)"},
+        "prompts": ["Burada dikkatini ne çekiyor?", "Bu neden önemli?", "Dinleyicilerin başka neyi bilmesi gerekiyor?"],
+    },
+    "Polish": {
+        "title": "Scenariusz podcastu", "topic": "Temat", "tone": "Ton", "length": "Długość", "language": "Język",
+        "introduction": "Wstęp", "main_content": "Główna treść", "summary": "Podsumowanie", "outro": "Zakończenie",
+        "focus_general": "Ogólny przegląd treści",
+        "focus_question": "Skupiamy się na: {question}",
+        "intro_text": "Witamy w dzisiejszym podcaście! Omówimy treść przesłanego przez Ciebie dokumentu.",
+        "summary_text": "W tym podcaście omówiliśmy najważniejsze punkty Twojego dokumentu. Treść dostosowano do {tone} tonu i przygotowano do {length} słuchania.",
+        "outro_text": "Dziękujemy za wysłuchanie! Ten podcast powstał na podstawie treści Twojego pliku PDF.",
+        "tones": {"Fun": "swobodnego", "Formal": "formalnego"},
+        "lengths": {"Short (1-2 min)": "krótkiego (1-2 min)", "Medium (3-5 min)": "średniego (3-5 min)"},
+        "prompts": ["Co tu zwraca twoją uwagę?", "Dlaczego to ważne?", "Co jeszcze powinni wiedzieć słuchacze?"],
+    },
+}
+
+
+def _abbreviation_pattern(abbreviations):
+    """Regex matching the full stop that ends a whole-word abbreviation.
+
+    It starts at the full stop, which the regex engine finds quickly, and looks
+    back for the word; lookbehinds need a fixed width, so words are grouped by length.
+    """
+    if not abbreviations:
+        return None
+    groups = {}
+    for word in abbreviations:
+        groups.setdefault(len(word), []).append(re.escape(word[:-1]))
+    lookbehinds = [rf"(?<=(?<!\S)(?:{'|'.join(words)})\.)" for _, words in sorted(groups.items())]
+    return re.compile(rf"\.(?:{'|'.join(lookbehinds)})", re.IGNORECASE)
+
+
+class LanguageResources:
+    __slots__ = ("name", "code", "gtts_tld", "gtts_accents", "pyttsx3_voice", "pyttsx3_voices", "templates", "sentence_end",
+                 "abbreviations", "abbreviation", "joiner", "chars_per_minute")
+
+    def __init__(self, name):
+        code, tld, family = LANGUAGE_CODES[name]
+        self.name = name
+        self.code = code
+        self.gtts_tld = tld
+        self.gtts_accents = GTTS_ACCENTS.get(name, (tld,))
+        self.pyttsx3_voice = None
+        self.pyttsx3_voices = []
+        self.templates = TEMPLATES[name]
+        self.sentence_end = re.compile(SENTENCE_RULES[family])
+        self.abbreviations = ABBREVIATIONS.get(name, set())
+        self.abbreviation = _abbreviation_pattern(self.abbreviations)
+        self.joiner = "" if family == "cjk" else " "
+        self.chars_per_minute = SPEECH_CHARS_PER_MINUTE[family]
+
+    def gtts_tld_for(self, speaker=0):
+        return self.gtts_accents[speaker % len(self.gtts_accents)]
+
+    def pyttsx3_voice_for(self, speaker=0):
+        """``(voice, rate)`` for a speaker: another installed voice if there is one, else a faster rate"""
+        if len(self.pyttsx3_voices) > 1:
+            return self.pyttsx3_voices[speaker % len(self.pyttsx3_voices)], PYTTSX3_RATE
+        return self.pyttsx3_voice, PYTTSX3_RATE + SPEAKER_RATE_STEP * (speaker % 2)
+
+    def voice_id(self, engine, speaker=0):
+        if engine == "gtts":
+            return f"{self.code}-{self.gtts_tld_for(speaker)}"
+        voice, rate = self.pyttsx3_voice_for(speaker)
+        voice = voice or "default"
+        return voice if rate == PYTTSX3_RATE else f"{voice}@{rate}"
+
+    def join_sentences(self, sentences):
+        return self.joiner.join(sentences)
+
+    def sentence_spans(self, text, start=0, end=None):
+        """``(start, end)`` character offsets of the sentences in ``text[start:end]``"""
+        end = len(text) if end is None else end
+        boundaries = [match.span(1) for match in self.sentence_end.finditer(text, start, end)]
+        # every piece but the first and last runs from after a gap to a terminator, so only those two need trimming
+        piece_starts = [start] + [gap_end for _, gap_end in boundaries]
+        piece_ends = [gap_start for gap_start, _ in boundaries] + [end]
+        for index in {0, len(piece_ends) - 1}:
+            piece = text[piece_starts[index]:piece_ends[index]]
+            piece_starts[index] += len(piece) - len(piece.lstrip())
+            piece_ends[index] = max(piece_starts[index], piece_ends[index] - len(piece) + len(piece.rstrip()))
+        spans = [span for span in zip(piece_starts, piece_ends) if span[0] < span[1]]
+
+        abbreviated = {match.end() for match in self.abbreviation.finditer(text, start, end)} if self.abbreviation else ()
+        if not abbreviated:
+            return spans
+        merged = []
+        for span in spans:
+            if merged and merged[-1][1] in abbreviated:
+                merged[-1] = (merged[-1][0], span[1])
+            else:
+                merged.append(span)
+        return merged
+
+    def split_sentences(self, text):
+        return [text[start:end] for start, end in self.sentence_spans(text)]
+
+
+_resources = {}
+_preload_lock = threading.Lock()
+
+
+def _match_pyttsx3_voices():
+    """Map languages to their installed system voices, best effort"""
+    try:
+        import pyttsx3
+        engine = pyttsx3.init()
+        voices = engine.getProperty("voices") or []
+    except Exception as e:
+        logger.info(f"No system voices available for pyttsx3: {e}")
+        return {}
+
+    matches = {}
+    for voice in voices:
+        tags = [voice.id.lower()]
+        for language in getattr(voice, "languages", None) or []:
+            if isinstance(language, bytes):
+                language = language.decode("utf-8", errors="ignore")
+            tags.append(str(language).lower().lstrip("\x05"))
+
+        for name, (code, _, _) in LANGUAGE_CODES.items():
+            prefix = code.split("-")[0].lower()
+            if any(tag == prefix or tag.startswith((prefix + "_", prefix + "-")) or f"/{prefix}" in tag for tag in tags):
+                matches.setdefault(name, []).append(voice.id)
+    return matches
+
+
+def preload_languages(match_voices=True):
+    """Build sentence rules, templates and voice IDs for every language once"""
+    with _preload_lock:
+        if _resources:
+            return _resources
+
+        voices = _match_pyttsx3_voices() if match_voices else {}
+        for name in LANGUAGE_CODES:
+            resources = LanguageResources(name)
+            resources.pyttsx3_voices = voices.get(name, [])
+            resources.pyttsx3_voice = resources.pyttsx3_voices[0] if resources.pyttsx3_voices else None
+            _resources[name] = resources
+
+        logger.info(f"Preloaded {len(_resources)} languages ({len(voices)} with system voices)")
+        return _resources
+
+
+def get_language(name):
+    resources = _resources or preload_languages(match_voices=False)
+    return resources.get(name) or resources[DEFAULT_LANGUAGE]
+
+
+def split_sentences(text, language=DEFAULT_LANGUAGE):
+    return get_language(language).split_sentences(text)
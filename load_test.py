@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""Drive the Gradio app end to end with stub TTS engines and report how it holds up.
+
+    python3 load_test.py --rate 2 --requests 100 --users 8 --tts-latency 0.2 --mix 1:6,5:3,40:1
+
+Conversions go through gradio_client exactly as a browser would, so the
+numbers include the Gradio queue, the fair scheduler, PDF sandboxing and
+audio assembly; only the TTS engines are replaced, so no network is used.
+"""
+import argparse
+import json
+import os
+import queue
+import random
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from sample_pdf import make_text_pdf
+
+WORDS = (
+    "energy solar battery grid storage panel voltage policy market demand supply "
+    "research study result method model network signal system design impact cost "
+    "river climate ocean forest carbon water city transport health school data"
+).split()
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def parse_mix(spec):
+    """``"1:6,5:3,40:1"`` -> ``[(pages, weight), ...]``"""
+    mix = []
+    for part in spec.split(","):
+        pages, _, weight = part.partition(":")
+        mix.append((int(pages), float(weight or 1)))
+    return mix
+
+
+def synthetic_pdfs(mix, directory, seed=0):
+    rng = random.Random(seed)
+    paths = {}
+    for pages, _ in mix:
+        texts = []
+        for page in range(pages):
+            sentences = [" ".join(rng.choices(WORDS, k=rng.randint(8, 16))).capitalize() + "." for _ in range(25)]
+            texts.append(f"Page {page + 1}\n" + "\n".join(sentences))
+        path = os.path.join(directory, f"synthetic-{pages}p.pdf")
+        with open(path, "wb") as output:
+            output.write(make_text_pdf(texts))
+        paths[pages] = path
+    return paths
+
+
+def stub_engine(latency, directory=None):
+    def synthesize(text, language, token=None, speaker=0):
+        time.sleep(latency)
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav", dir=directory) as tmp_file:
+            path = tmp_file.name
+        with wave.open(path, "wb") as output:
+            output.setnchannels(1)
+            output.setsampwidth(2)
+            output.setframerate(8000)
+            output.writeframes(b"\x00\x00" * min(len(text) * 40, 80000))
+        return path
+    return synthesize
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def _statm_rss(pid="self"):
+    try:
+        with open(f"/proc/{pid}/statm") as statm:
+            return int(statm.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def server_rss():
+    """Resident memory of the server and its worker processes"""
+    import multiprocessing
+    total = _statm_rss()
+    if not total:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return total + sum(_statm_rss(child.pid) for child in multiprocessing.active_children())
+
+
+class RssSampler(threading.Thread):
+    def __init__(self, interval=1.0):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.samples = []
+        self._stop_event = threading.Event()
+        self._origin = time.perf_counter()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.samples.append((time.perf_counter() - self._origin, server_rss()))
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.samples.append((time.perf_counter() - self._origin, server_rss()))
+
+
+def prepare_app(tts_latency, keep_rate_limits, workspace):
+    """Import the app with stub engines, caches inside ``workspace`` and (optionally) no rate limits"""
+    import podkaast_app
+    from audio_store import AudioStore
+    from cache import LRUCache
+    from chapters import ChapterCache
+    from duration import DurationEstimator
+    from jobs import CONVERSION_WORKERS, JobManager
+    from page_index import PageIndexStore
+    from phrase_memo import PhraseMemo
+    from scheduler import FairScheduler
+    from transcripts import TranscriptPages
+
+    saved = {name: getattr(podkaast_app, name) for name in (
+        "phrase_memo", "duration_estimator", "page_index", "chapter_cache", "transcript_pages", "text_cache",
+        "conversion_jobs", "convert_pdf_to_podcast"
+    )}
+    saved_engines = dict(podkaast_app.TTS_ENGINES)
+    saved_audio_root = podkaast_app.audio_store.root
+
+    def restore():
+        for name, value in saved.items():
+            setattr(podkaast_app, name, value)
+        podkaast_app.conversion_pipeline.caches["text"] = saved["text_cache"]
+        podkaast_app.TTS_ENGINES.update(saved_engines)
+        podkaast_app.audio_store.root = saved_audio_root
+
+    engine = stub_engine(tts_latency, workspace)
+    podkaast_app.TTS_ENGINES.update(gtts=(engine, ".wav"), pyttsx3=(engine, ".wav"))
+    podkaast_app.phrase_memo = PhraseMemo(os.path.join(workspace, "phrases"))
+    podkaast_app.duration_estimator = DurationEstimator(os.path.join(workspace, "durations.json"))
+    podkaast_app.page_index = PageIndexStore(os.path.join(workspace, "pages"))
+    podkaast_app.chapter_cache = ChapterCache(os.path.join(workspace, "chapters"))
+    podkaast_app.transcript_pages = TranscriptPages(os.path.join(workspace, "transcripts"))
+    # a fresh text cache, so every run extracts its PDFs instead of reusing an earlier run's text
+    podkaast_app.text_cache = LRUCache(max_entries=64)
+    podkaast_app.conversion_pipeline.caches["text"] = podkaast_app.text_cache
+    podkaast_app.audio_store.root = AudioStore(os.path.join(workspace, "audio")).root
+
+    if not keep_rate_limits:
+        scheduler = FairScheduler(CONVERSION_WORKERS, rate_per_minute=1e9, burst=1e9)
+        podkaast_app.conversion_jobs = JobManager(
+            CONVERSION_WORKERS, estimate_cost=podkaast_app.estimate_conversion_cost, scheduler=scheduler
+        )
+
+    # queue wait = submission until the pipeline starts; requests are tagged through the question field
+    started = {}
+    convert = podkaast_app.convert_pdf_to_podcast
+
+    def timed_convert(*args, **kwargs):
+        started[args[2]] = time.perf_counter()
+        return convert(*args, **kwargs)
+
+    podkaast_app.convert_pdf_to_podcast = timed_convert
+    return podkaast_app, started, CONVERSION_WORKERS, restore
+
+
+def percentiles(values):
+    if not values:
+        return {}
+    points = np.percentile(values, [50, 90, 95, 99])
+    return {"p50": points[0], "p90": points[1], "p95": points[2], "p99": points[3], "max": max(values)}
+
+
+def run_load_test(requests=50, rate=2.0, users=8, tts_latency=0.2, mix="1:6,5:3,40:1",
+                  workers=None, keep_rate_limits=False, seed=0, sample_interval=1.0, verbose=True):
+    if workers:
+        os.environ["PODKAAST_CONVERSION_WORKERS"] = str(workers)
+
+    workspace = tempfile.mkdtemp(prefix="podkaast-load-")
+    restore = None
+    try:
+        sizes = parse_mix(mix)
+        pdfs = synthetic_pdfs(sizes, workspace, seed)
+        app, started, worker_count, restore = prepare_app(tts_latency, keep_rate_limits, workspace)
+        return _drive(app, started, worker_count, pdfs, sizes, requests, rate, users, tts_latency, seed, sample_interval, verbose)
+    finally:
+        if restore is not None:
+            restore()
+        shutil.rmtree(workspace, ignore_errors=True)
+
+
+def _drive(app, started, worker_count, pdfs, sizes, requests, rate, users, tts_latency, seed, sample_interval, verbose):
+    from gradio_client import Client, handle_file
+
+    port = free_port()
+    app.demo.launch(
+        prevent_thread_lock=True,
+        server_name="127.0.0.1",
+        server_port=port,
+        quiet=True,
+        allowed_paths=[str(app.audio_store.root)]
+    )
+    url = f"http://127.0.0.1:{port}/"
+    # one Client is one browser session, and a session runs one conversion at a time (a new click
+    # supersedes the last), so each arrival takes whichever session is idle
+    sessions = queue.Queue()
+    for _ in range(users):
+        sessions.put(Client(url, verbose=False, download_files=False))
+
+    rng = random.Random(seed)
+    results = []
+    lock = threading.Lock()
+
+    def fire(index, pages):
+        tag = f"load-test request {index}"
+        arrived = time.perf_counter()
+        client = sessions.get()
+        submitted = time.perf_counter()
+        error = None
+        try:
+            status = client.predict(
+                [handle_file(pdfs[pages])], "", tag, "Fun", "Short (1-2 min)", "English", True, "Monologue", "", "Episode",
+                api_name="/handle_conversion"
+            )[2]
+            if not status.startswith("✅"):
+                error = status
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        finally:
+            sessions.put(client)
+        finished = time.perf_counter()
+        with lock:
+            results.append({
+                "pages": pages,
+                "latency": finished - submitted,
+                "queue_wait": started.get(tag, finished) - submitted,
+                "session_wait": submitted - arrived,
+                "error": error,
+            })
+
+    sampler = RssSampler(sample_interval)
+    sampler.start()
+    began = time.perf_counter()
+    if verbose:
+        print(f"🚦 {requests} requests at {rate}/s from {users} users, {worker_count} workers, TTS latency {tts_latency}s")
+
+    with ThreadPoolExecutor(max_workers=min(requests, 256)) as executor:
+        for index in range(requests):
+            pages = rng.choices([size for size, _ in sizes], weights=[weight for _, weight in sizes])[0]
+            executor.submit(fire, index, pages)
+            time.sleep(rng.expovariate(rate))
+
+    elapsed = time.perf_counter() - began
+    sampler.stop()
+    app.demo.close()
+
+    succeeded = [result for result in results if not result["error"]]
+    errors = [result["error"] for result in results if result["error"]]
+    return {
+        "requests": len(results),
+        "succeeded": len(succeeded),
+        "error_rate": len(errors) / len(results) if results else 0.0,
+        "errors": sorted(set(errors))[:10],
+        "elapsed": elapsed,
+        "throughput": len(succeeded) / elapsed if elapsed else 0.0,
+        "latency": percentiles([result["latency"] for result in succeeded]),
+        "queue_wait": percentiles([result["queue_wait"] for result in results]),
+        "session_wait": percentiles([result["session_wait"] for result in results]),
+        "latency_by_pages": {
+            pages: percentiles([result["latency"] for result in succeeded if result["pages"] == pages])
+            for pages, _ in sizes
+        },
+        "rss": sampler.samples,
+        "users": users,
+        "workers": worker_count,
+    }
+
+
+def _format(stats):
+    return "  ".join(f"{name} {value:.2f}s" for name, value in stats.items()) or "n/a"
+
+
+def print_report(report):
+    print("\n" + "=" * 50)
+    print("📊 Load Test Report")
+    print(f"Requests:    {report['requests']} ({report['succeeded']} ok, error rate {report['error_rate']:.1%})")
+    print(f"Throughput:  {report['throughput']:.2f} conversions/s over {report['elapsed']:.1f}s")
+    print(f"Latency:     {_format(report['latency'])}")
+    print(f"Queue wait:  {_format(report['queue_wait'])}")
+    print(f"Idle wait:   {_format(report['session_wait'])}  (all {report['users']} sessions busy)")
+    for pages, stats in report["latency_by_pages"].items():
+        print(f"  {pages:>4} pages: {_format(stats)}")
+    for error in report["errors"]:
+        print(f"❌ {error}")
+
+    print("\n🧠 Server RSS over time")
+    samples = report["rss"]
+    step = max(1, len(samples) // 20)
+    for offset, rss in samples[::step] + ([samples[-1]] if (len(samples) - 1) % step else []):
+        print(f"  {offset:7.1f}s  {rss / 1e6:8.1f} MB")
+    print(f"  peak      {max(rss for _, rss in samples) / 1e6:8.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test Podkaast end to end with stub TTS engines")
+    parser.add_argument("--requests", type=int, default=50, help="total conversions to submit")
+    parser.add_argument("--rate", type=float, default=2.0, help="mean arrivals per second (Poisson)")
+    parser.add_argument("--users", type=int, default=8, help="simulated browser sessions, one conversion each at a time")
+    parser.add_argument("--tts-latency", type=float, default=0.2, help="seconds each stub TTS call takes")
+    parser.add_argument("--mix", default="1:6,5:3,40:1", help="PDF page counts and weights, e.g. 1:6,5:3,40:1")
+    parser.add_argument("--workers", type=int, help="conversion workers (PODKAAST_CONVERSION_WORKERS)")
+    parser.add_argument("--keep-rate-limits", action="store_true", help="keep the per-user token buckets")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the raw report to this file")
+    args = parser.parse_args()
+
+    report = run_load_test(
+        requests=args.requests,
+        rate=args.rate,
+        users=args.users,
+        tts_latency=args.tts_latency,
+        mix=args.mix,
+        workers=args.workers,
+        keep_rate_limits=args.keep_rate_limits,
+        seed=args.seed
+    )
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump(report, output, indent=2, default=float)
+    return report["error_rate"] == 0
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
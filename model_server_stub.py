@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Stand-in for a local model server, speaking the OpenAI-compatible completions API.
+
+    python3 model_server_stub.py --port 8080
+    PODKAAST_SCRIPT_BACKEND=local python3 podkaast_app.py
+
+It "writes" each section by restating the passage from the prompt as two
+paragraphs, streamed word by word with an optional per-token delay, so the
+batching, caching and streaming paths can be exercised without a GPU.
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_PASSAGE = re.compile(r"Passage:\n(.*?)\n\nNarration:", re.S)
+
+
+def narrate(prompt):
+    match = _PASSAGE.search(prompt)
+    passage = " ".join((match.group(1) if match else prompt).split())
+    words = passage.split()
+    middle = len(words) // 2
+    if middle == 0:
+        return passage
+    return " ".join(words[:middle]) + "\n\n" + " ".join(words[middle:])
+
+
+class StubModelServer:
+    def __init__(self, port=0, token_delay=0.0, fail=False):
+        self.token_delay = token_delay
+        self.fail = fail
+        self.requests = []
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                prompts = body["prompt"] if isinstance(body["prompt"], list) else [body["prompt"]]
+                with stub._lock:
+                    stub.requests.append(prompts)
+
+                if stub.fail:
+                    self.send_response(503)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                # round-robin over the batch, one word per prompt per step, like a batched decoder
+                streams = [re.findall(r"\S+|\s+", narrate(prompt)) for prompt in prompts]
+                for step in range(max(map(len, streams), default=0)):
+                    for index, tokens in enumerate(streams):
+                        if step < len(tokens):
+                            chunk = {"choices": [{"index": index, "text": tokens[step], "finish_reason": None}]}
+                            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                    self.wfile.flush()
+                    if stub.token_delay:
+                        time.sleep(stub.token_delay)
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                self.close_connection = True
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in local model server for Podkaast")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--token-delay", type=float, default=0.01, help="seconds between streamed tokens")
+    args = parser.parse_args()
+
+    stub = StubModelServer(args.port, args.token_delay)
+    print(f"🤖 Stub model server on {stub.url}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
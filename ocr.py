@@ -0,0 +1,155 @@
+import logging
+import multiprocessing
+import os
+import shutil
+import subprocess
+import threading
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+
+from cache import LRUCache, content_hash
+from cancellation import Cancelled, check
+
+logger = logging.getLogger(__name__)
+
+OCR_LANGUAGES = os.environ.get("PODKAAST_OCR_LANGUAGES", "eng")
+OCR_WORKERS = int(os.environ.get("PODKAAST_OCR_WORKERS", os.cpu_count() or 2))
+OCR_TIMEOUT = 120
+MIN_PAGE_CHARS = 20
+MIN_LETTER_RATIO = 0.5
+
+# like the PDF sandbox, OCR workers come from a forkserver rather than a fork of the threaded server;
+# they only need this module, which is light to import
+if "forkserver" in multiprocessing.get_all_start_methods():
+    _context = multiprocessing.get_context("forkserver")
+else:
+    _context = multiprocessing.get_context()
+
+
+def is_garbage_text(text):
+    """True for pages whose text layer is missing or unreadable (scans, broken fonts)"""
+    stripped = "".join((text or "").split())
+    if len(stripped) < MIN_PAGE_CHARS:
+        return True
+    if stripped.count("�") + stripped.count("(cid:") * 5 > len(stripped) * 0.1:
+        return True
+
+    letters = sum(1 for char in stripped if unicodedata.category(char)[0] in "LN")
+    return letters / len(stripped) < MIN_LETTER_RATIO
+
+
+class OcrEngine:
+    name = "none"
+
+    def available(self):
+        return False
+
+    def recognize(self, image_bytes, languages=OCR_LANGUAGES):
+        raise NotImplementedError
+
+
+class TesseractOcr(OcrEngine):
+    name = "tesseract"
+
+    def __init__(self, binary="tesseract"):
+        self.binary = binary
+
+    def available(self):
+        return shutil.which(self.binary) is not None
+
+    def recognize(self, image_bytes, languages=OCR_LANGUAGES):
+        result = subprocess.run(
+            [self.binary, "stdin", "stdout", "-l", languages],
+            input=image_bytes,
+            capture_output=True,
+            timeout=OCR_TIMEOUT,
+            check=True
+        )
+        return result.stdout.decode("utf-8", errors="replace").strip()
+
+
+def _recognize(engine, image_bytes, languages):
+    # runs inside a pool worker; the engine instance is pickled across
+    return engine.recognize(image_bytes, languages)
+
+
+def page_image(page):
+    """Largest embedded image on a page, which for scans is the page itself"""
+    try:
+        images = list(page.images)
+    except Exception as e:
+        logger.warning(f"Could not read page images: {e}")
+        return None
+    if not images:
+        return None
+    return max(images, key=lambda image: len(image.data)).data
+
+
+class OcrFallback:
+    """Runs OCR only for pages without a usable text layer.
+
+    Work goes to a process pool capped at the CPU count and results are cached
+    per page image, so re-converting a mixed text/scan PDF OCRs nothing twice.
+    """
+
+    def __init__(self, engine=None, max_workers=OCR_WORKERS, languages=OCR_LANGUAGES):
+        self.engine = engine or TesseractOcr()
+        self.max_workers = max_workers
+        self.languages = languages
+        self.cache = LRUCache(max_entries=512)
+        self._pool = None
+        self._lock = threading.Lock()
+        self._warned = False
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=_context)
+            return self._pool
+
+    def available(self):
+        if self.engine.available():
+            return True
+        if not self._warned:
+            logger.warning(f"OCR engine '{self.engine.name}' is not installed, scanned pages will stay empty")
+            self._warned = True
+        return False
+
+    def recover(self, page_images, token=None):
+        """OCR ``{page_index: image_bytes}`` and return ``{page_index: text}``"""
+        if not page_images or not self.available():
+            return {}
+
+        results = {}
+        pending = {}
+        for index, image_bytes in page_images.items():
+            key = (content_hash(image_bytes), self.languages)
+            cached = self.cache.get(key)
+            if cached is not None:
+                results[index] = cached
+            else:
+                pending[index] = (key, self._get_pool().submit(_recognize, self.engine, image_bytes, self.languages))
+
+        for index, (key, future) in pending.items():
+            try:
+                check(token)
+                text = future.result()
+            except Cancelled:
+                for _, queued in pending.values():
+                    queued.cancel()
+                raise
+            except Exception as e:
+                logger.error(f"OCR failed for page {index + 1}: {e}")
+                continue
+            self.cache.put(key, text)
+            results[index] = text
+
+        if results:
+            logger.info(f"OCR recovered text for {len(results)} of {len(page_images)} scanned pages")
+        return results
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
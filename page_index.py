@@ -0,0 +1,247 @@
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+
+from cache import LRUCache
+from chapters import chapter_marker, mark_headings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_DIR = Path(os.environ.get("PODKAAST_CACHE_DIR", Path.home() / ".cache" / "podkaast")) / "pages"
+INDEX_VERSION = 1
+# saved indexes hold the full text of user documents, so they are capped in size and age;
+# the least recently used go first
+MAX_INDEX_BYTES = int(float(os.environ.get("PODKAAST_PAGE_INDEX_MB", "500")) * 1024 * 1024)
+MAX_INDEX_AGE = float(os.environ.get("PODKAAST_PAGE_INDEX_DAYS", "30")) * 86400
+MAX_SPEC_LENGTH = 500
+
+_RANGE = re.compile(r"^(\d+)\s*(?:(-|–|—|to)\s*(\d*))?$", re.I)
+
+
+def parse_page_spec(spec):
+    """Parse ``"40-60, 72, Chapter 3"`` into ``("pages", first, last)`` and ``("chapter", title)`` parts.
+
+    Page numbers are 1-based and inclusive; ``"12-"`` runs to the end of the
+    document (``last`` is None). Anything that is not a number or range is a
+    chapter title looked up in the outline. Raises ValueError on malformed ranges.
+    """
+    spec = (spec or "").strip()
+    if len(spec) > MAX_SPEC_LENGTH:
+        raise ValueError(f"page selection is longer than {MAX_SPEC_LENGTH} characters")
+
+    parts = []
+    for part in re.split(r"[,;]", spec):
+        part = part.strip().strip("\"'")
+        if not part:
+            continue
+        match = _RANGE.match(part)
+        if match is None:
+            parts.append(("chapter", part))
+            continue
+        first = int(match.group(1))
+        last = first if match.group(2) is None else (int(match.group(3)) if match.group(3) else None)
+        if first < 1 or (last is not None and last < first):
+            raise ValueError(f"invalid page range {part!r}")
+        parts.append(("pages", first, last))
+    return parts
+
+
+def flatten_outline(outline, level=0):
+    """``(level, title, page)`` for every bookmark, in document order"""
+    entries = []
+    for node in outline:
+        entries.append((level, node["title"], node["page"]))
+        entries.extend(flatten_outline(node.get("children", []), level + 1))
+    return entries
+
+
+def _normalize_title(title):
+    return " ".join(title.lower().split())
+
+
+class PageIndex:
+    """Per-page text offsets and outline of one document, reading only the pages asked for"""
+
+    def __init__(self, text_path, pages, outline):
+        self.text_path = Path(text_path)
+        self.pages = pages
+        self.outline = outline
+
+    @property
+    def page_count(self):
+        return len(self.pages)
+
+    def chapter_pages(self, title):
+        """Page indices covered by the outline entry matching ``title``, up to the next entry at its level or above"""
+        entries = [entry for entry in flatten_outline(self.outline) if entry[2] is not None and entry[2] >= 0]
+        wanted = _normalize_title(title)
+        matches = [index for index, entry in enumerate(entries) if _normalize_title(entry[1]) == wanted]
+        if not matches:
+            matches = [index for index, entry in enumerate(entries) if _normalize_title(entry[1]).startswith(wanted)]
+        if not matches:
+            matches = [index for index, entry in enumerate(entries) if wanted in _normalize_title(entry[1])]
+        if not matches:
+            raise ValueError(f"no chapter matching {title!r} in the document outline")
+
+        level, _, start = entries[matches[0]]
+        end = self.page_count
+        for next_level, _, page in entries[matches[0] + 1:]:
+            if next_level <= level and page > start:
+                end = page
+                break
+        return range(start, max(end, start + 1))
+
+    def resolve(self, spec):
+        """Sorted 0-based page indices selected by ``spec``; every page when it is empty"""
+        parts = parse_page_spec(spec)
+        if not parts:
+            return list(range(self.page_count))
+
+        selected = set()
+        for part in parts:
+            if part[0] == "chapter":
+                selected.update(self.chapter_pages(part[1]))
+                continue
+            _, first, last = part
+            if first > self.page_count:
+                raise ValueError(f"page {first} is past the end of the document ({self.page_count} pages)")
+            selected.update(range(first - 1, min(last or self.page_count, self.page_count)))
+        return sorted(selected)
+
+    def chapter_starts(self):
+        """``{page: title}`` for the shallowest outline level with at least two bookmarks"""
+        entries = [entry for entry in flatten_outline(self.outline) if entry[2] is not None and entry[2] >= 0]
+        for level in sorted({entry[0] for entry in entries}):
+            starts = {}
+            for entry_level, title, page in entries:
+                if entry_level == level and page not in starts:
+                    starts[page] = title
+            if len(starts) >= 2:
+                return starts
+        return {}
+
+    def read_pages(self, indices, chapters=False):
+        """Text of the given pages, joined like the full document; only their bytes are read.
+
+        With ``chapters``, chapter markers precede the pages where outline
+        chapters begin, or detected headings when the outline has none.
+        """
+        starts = self.chapter_starts() if chapters else {}
+        texts = []
+        with open(self.text_path, "rb") as text_file:
+            for index in indices:
+                start, end = self.pages[index]
+                if index in starts:
+                    texts.append(chapter_marker(starts[index]).strip("\n"))
+                if end > start:
+                    text_file.seek(start)
+                    texts.append(text_file.read(end - start).decode("utf-8"))
+        text = "\n\n".join(texts)
+        return mark_headings(text) if chapters and not starts else text
+
+    def select(self, spec, chapters=False):
+        return self.read_pages(self.resolve(spec), chapters)
+
+    def text_bytes(self, spec=""):
+        """UTF-8 size of the text on the pages ``spec`` selects, from the offsets alone"""
+        return sum(self.pages[index][1] - self.pages[index][0] for index in self.resolve(spec))
+
+    def text(self):
+        return self.text_path.read_text(encoding="utf-8")
+
+
+class PageIndexStore:
+    """Page indexes keyed by document content hash, saved on first parse.
+
+    Each document is a UTF-8 text file plus a JSON header with the byte
+    range of every page and the outline tree, so a later conversion of a page
+    range or chapter reads just those bytes instead of parsing the PDF again.
+    Indexes unused for ``max_age`` seconds, and the least recently used beyond
+    ``max_bytes`` on disk, are deleted whenever a new one is saved.
+    """
+
+    def __init__(self, root=DEFAULT_INDEX_DIR, max_entries=256, max_bytes=MAX_INDEX_BYTES, max_age=MAX_INDEX_AGE):
+        self.root = Path(root)
+        self.headers = LRUCache(max_entries)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+
+    def _paths(self, key):
+        directory = self.root / key[:2]
+        return directory / f"{key}.txt", directory / f"{key}.json"
+
+    def _write(self, path, data):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as tmp_file:
+            tmp_file.write(data)
+        os.replace(tmp_file.name, path)
+
+    def save(self, key, document, outline=None):
+        text_path, header_path = self._paths(key)
+        header = {
+            "version": INDEX_VERSION,
+            "pages": [[start, end] for start, end in zip(document.pages.starts, document.pages.ends)],
+            "outline": outline or [],
+        }
+        try:
+            # the header goes last, so a readable header always has its text next to it
+            self._write(text_path, bytes(document.buffer))
+            self._write(header_path, json.dumps(header).encode("utf-8"))
+        except OSError as e:
+            logger.warning(f"Could not save page index for {key[:12]}: {e}")
+            return None
+        self.headers.put(key, header)
+        self.prune()
+        return PageIndex(text_path, header["pages"], header["outline"])
+
+    def prune(self, now=None):
+        """Delete expired indexes, then the least recently used until the rest fit in ``max_bytes``"""
+        now = now or time.time()
+        entries = []
+        try:
+            for header_path in self.root.glob("*/*.json"):
+                text_path = header_path.with_suffix(".txt")
+                try:
+                    size = header_path.stat().st_size + (text_path.stat().st_size if text_path.exists() else 0)
+                    entries.append((header_path.stat().st_mtime, size, header_path, text_path))
+                except OSError:
+                    continue
+        except OSError:
+            return
+        entries.sort(key=lambda entry: entry[0], reverse=True)
+        total = 0
+        for used, size, header_path, text_path in entries:
+            total += size
+            if now - used <= self.max_age and total <= self.max_bytes:
+                continue
+            # the header goes first, so nothing finds a header whose text is gone
+            for path in (header_path, text_path):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            total -= size
+
+    def load(self, key):
+        text_path, header_path = self._paths(key)
+        header = self.headers.get(key)
+        if header is None:
+            try:
+                header = json.loads(header_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                return None
+            if header.get("version") != INDEX_VERSION:
+                return None
+            self.headers.put(key, header)
+        if not text_path.exists():
+            return None
+        try:
+            # the header's modification time records the last use, for pruning
+            os.utime(header_path)
+        except OSError:
+            pass
+        return PageIndex(text_path, header["pages"], header["outline"])
@@ -0,0 +1,262 @@
+import logging
+import multiprocessing
+import os
+import threading
+import time
+
+import pypdf
+
+from cancellation import check
+from ocr import is_garbage_text, page_image
+
+try:
+    import resource
+except ImportError:  # not available on Windows, workers then run without limits
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+PDF_WORKERS = int(os.environ.get("PODKAAST_PDF_WORKERS", "2"))
+PDF_MEMORY_MB = int(os.environ.get("PODKAAST_PDF_MEMORY_MB", "1024"))
+PDF_CPU_SECONDS = int(os.environ.get("PODKAAST_PDF_CPU_SECONDS", "60"))
+PDF_TIMEOUT = float(os.environ.get("PODKAAST_PDF_TIMEOUT", "120"))
+PDF_JOBS_PER_WORKER = int(os.environ.get("PODKAAST_PDF_JOBS_PER_WORKER", "20"))
+POLL_INTERVAL = 0.25
+
+# workers are forked from a forkserver, a small single-threaded process started on first use: forking
+# the server itself once its threads are running could copy a lock some thread holds, and spawning
+# would re-import the Gradio app in every child; only this module is preloaded into the forkserver
+if "forkserver" in multiprocessing.get_all_start_methods():
+    _context = multiprocessing.get_context("forkserver")
+    _context.set_forkserver_preload([__name__])
+else:
+    _context = multiprocessing.get_context()
+
+
+class SandboxError(Exception):
+    pass
+
+
+def read_outline(reader):
+    """Bookmark tree as ``{"title", "page", "children"}`` dicts; ``page`` is 0-based or None"""
+    def walk(items):
+        nodes = []
+        for item in items:
+            if isinstance(item, list):
+                # a nested list holds the children of the bookmark before it
+                if nodes:
+                    nodes[-1]["children"].extend(walk(item))
+                else:
+                    nodes.extend(walk(item))
+                continue
+            try:
+                page = reader.get_destination_page_number(item)
+            except Exception:
+                page = None
+            nodes.append({"title": str(item.title or "").strip(), "page": page, "children": []})
+        return nodes
+
+    try:
+        return walk(reader.outline)
+    except Exception as e:
+        logger.warning(f"Could not read PDF outline: {e}")
+        return []
+
+
+def iter_pdf_pages(path):
+    """``(index, text, image)`` per page, then ``("outline", tree)``; ``image`` is only sent for pages that need OCR"""
+    reader = pypdf.PdfReader(path)
+    for index, page in enumerate(reader.pages):
+        text = page.extract_text() or ""
+        yield index, text, page_image(page) if is_garbage_text(text) else None
+    yield "outline", read_outline(reader)
+
+
+def _limit_cpu(seconds):
+    # RLIMIT_CPU counts the whole process lifetime, so each job gets its allowance on top of what was used
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    limit = int(usage.ru_utime + usage.ru_stime) + seconds
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (limit, hard))
+
+
+def _address_space():
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def _worker_main(conn, parser, memory_mb, cpu_seconds):
+    if resource is not None:
+        # a worker starts with the forkserver's mappings, so the budget is headroom on top of them
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        limit = _address_space() + memory_mb * 1024 * 1024
+        if hard != resource.RLIM_INFINITY:
+            limit = min(limit, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+    while True:
+        try:
+            path = conn.recv()
+        except EOFError:
+            break
+        if path is None:
+            break
+
+        if resource is not None:
+            _limit_cpu(cpu_seconds)
+        try:
+            for item in parser(path):
+                # pages are bare tuples; other messages, like the outline, come tagged
+                conn.send(tuple(item) if isinstance(item[0], str) else ("page",) + tuple(item))
+            conn.send(("done",))
+        except MemoryError:
+            conn.send(("error", f"PDF needs more than {memory_mb} MB to parse"))
+        except Exception as e:
+            conn.send(("error", str(e) or type(e).__name__))
+
+
+class _Worker:
+    def __init__(self, parser, memory_mb, cpu_seconds):
+        self.conn, child_conn = _context.Pipe()
+        self.process = _context.Process(
+            target=_worker_main,
+            args=(child_conn, parser, memory_mb, cpu_seconds),
+            name="pdf-sandbox",
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+
+    def stop(self, kill=False):
+        try:
+            if kill:
+                self.process.kill()
+            else:
+                self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=5)
+        self.conn.close()
+
+
+class PdfSandbox:
+    """Parses PDFs in resource-limited worker processes.
+
+    Each worker caps its address space and CPU time per document, a stuck
+    document is killed after ``timeout`` seconds, and workers are replaced
+    after ``max_jobs`` documents to hand fragmented heaps back to the OS.
+    Only page text, plus the image of pages that need OCR, crosses back.
+    """
+
+    def __init__(self, max_workers=PDF_WORKERS, memory_mb=PDF_MEMORY_MB, cpu_seconds=PDF_CPU_SECONDS,
+                 timeout=PDF_TIMEOUT, max_jobs=PDF_JOBS_PER_WORKER, parser=iter_pdf_pages):
+        self.memory_mb = memory_mb
+        self.cpu_seconds = cpu_seconds
+        self.timeout = timeout
+        self.max_jobs = max_jobs
+        self.parser = parser
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._idle = []
+        self._lock = threading.Lock()
+        self.started_workers = 0
+        self.killed_workers = 0
+
+    def _acquire(self):
+        self._slots.acquire()
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.process.is_alive():
+                    return worker
+                worker.stop(kill=True)
+            self.started_workers += 1
+        return _Worker(self.parser, self.memory_mb, self.cpu_seconds)
+
+    def _release(self, worker, healthy):
+        try:
+            worker.jobs += 1
+            if not healthy:
+                with self._lock:
+                    self.killed_workers += 1
+                worker.stop(kill=True)
+            elif worker.jobs >= self.max_jobs:
+                worker.stop()
+            else:
+                with self._lock:
+                    self._idle.append(worker)
+        finally:
+            self._slots.release()
+
+    def iter_messages(self, path, token=None):
+        """Yield ``("page", index, text, image)`` and ``("outline", tree)`` as the worker parses ``path``.
+
+        Raises SandboxError on failure.
+        """
+        worker = self._acquire()
+        deadline = time.monotonic() + self.timeout
+        healthy = False
+        try:
+            worker.conn.send(os.fspath(path))
+            while True:
+                check(token)
+                # checked on every message too, so a worker that never stops sending pages still times out
+                if time.monotonic() > deadline:
+                    raise SandboxError(f"PDF parsing timed out after {self.timeout:.0f}s")
+                if not worker.conn.poll(POLL_INTERVAL):
+                    continue
+
+                message = worker.conn.recv()
+                if message[0] == "done":
+                    healthy = True
+                    return
+                elif message[0] == "error":
+                    healthy = True
+                    raise SandboxError(message[1])
+                else:
+                    yield message
+        except (EOFError, OSError):
+            raise SandboxError("PDF parser was stopped by its memory or CPU limit")
+        finally:
+            # a job abandoned mid-stream (timeout, cancel, consumer gave up) leaves the worker busy, so kill it
+            self._release(worker, healthy)
+
+    def iter_pages(self, path, token=None):
+        """Yield ``(index, text, image)`` as the worker parses ``path``; raises SandboxError on failure"""
+        for message in self.iter_messages(path, token):
+            if message[0] == "page":
+                yield message[1:]
+
+    def extract_document(self, path, token=None):
+        """``(page_texts, ocr_images, outline)`` for ``path``"""
+        pages = {}
+        images = {}
+        outline = []
+        for message in self.iter_messages(path, token):
+            if message[0] == "outline":
+                outline = message[1]
+                continue
+            _, index, text, image = message
+            pages[index] = text
+            if image:
+                images[index] = image
+        return [pages[index] for index in sorted(pages)], images, outline
+
+    def extract_pages(self, path, token=None):
+        pages, images, _ = self.extract_document(path, token)
+        return pages, images
+
+    def shutdown(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.stop()
+
+    def stats(self):
+        with self._lock:
+            return {"idle": len(self._idle), "started": self.started_workers, "killed": self.killed_workers}
@@ -0,0 +1,163 @@
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from cancellation import check
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEMO_DIR = Path(os.environ.get("PODKAAST_CACHE_DIR", Path.home() / ".cache" / "podkaast")) / "phrases"
+
+
+class PhraseMemo:
+    """Persistent store of pre-rendered audio for static script segments.
+
+    Entries are keyed on (language, engine, voice, text), so a template
+    sentence is synthesized once per voice and then reused by every request.
+    """
+
+    def __init__(self, root=DEFAULT_MEMO_DIR):
+        self.root = Path(root)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def path_for(self, text, language, engine, voice, suffix):
+        digest = hashlib.sha256("\0".join([language, engine, voice, text]).encode("utf-8")).hexdigest()
+        return self.root / engine / language / voice / f"{digest}{suffix}"
+
+    def get(self, text, language, engine, voice, suffix):
+        path = self.path_for(text, language, engine, voice, suffix)
+        with self._lock:
+            if path.exists():
+                self.hits += 1
+                return str(path)
+            self.misses += 1
+        return None
+
+    def put(self, audio_path, text, language, engine, voice, suffix):
+        path = self.path_for(text, language, engine, voice, suffix)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=path.parent, delete=False, suffix=suffix) as tmp_file:
+                with open(audio_path, "rb") as source:
+                    shutil.copyfileobj(source, tmp_file)
+            os.replace(tmp_file.name, path)
+            return str(path)
+        except OSError as e:
+            logger.warning(f"Could not store phrase audio: {e}")
+            return None
+
+
+def concatenate_audio(paths, suffix):
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
+        output_path = tmp_file.name
+
+    if suffix == ".wav":
+        with wave.open(output_path, "wb") as output:
+            for index, path in enumerate(paths):
+                with wave.open(path, "rb") as part:
+                    if index == 0:
+                        output.setparams(part.getparams())
+                    output.writeframes(part.readframes(part.getnframes()))
+    else:
+        # MP3 is a stream of self-contained frames, gTTS itself joins its chunks this way
+        with open(output_path, "wb") as output:
+            for path in paths:
+                with open(path, "rb") as part:
+                    shutil.copyfileobj(part, output)
+
+    return output_path
+
+
+class _SegmentFailed(Exception):
+    pass
+
+
+def assemble_audio(segments, synthesize, memo, language, engine, voice, suffix, token=None, workers=1):
+    """Render ``(text, is_static)`` segments into one audio file.
+
+    Static segments are spliced in from the memo when available and stored
+    after their first synthesis; only dynamic segments are always synthesized.
+    Segments may carry a speaker, ``(text, is_static, speaker)``: they are
+    rendered with ``synthesize(text, speaker)`` and memoized under
+    ``voice[speaker]``. Up to ``workers`` segments are synthesized at once and
+    stitched back in segment order; ``segments`` may be a generator, and each
+    segment starts rendering as soon as it is produced.
+    Returns None if any segment fails so callers can fall back to another engine.
+    A cancelled ``token`` raises ``Cancelled`` between segments.
+    """
+    parts = {}
+    futures = []
+    scratch = []
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="segment") if workers > 1 else None
+
+    def voice_for(speaker):
+        if isinstance(voice, str):
+            return voice
+        return voice[speaker or 0]
+
+    def render(index, text, is_static, speaker):
+        check(token)
+        path = synthesize(text) if speaker is None else synthesize(text, speaker)
+        if not path or not os.path.exists(path):
+            raise _SegmentFailed(text)
+        scratch.append(path)
+
+        if is_static:
+            path = memo.put(path, text, language, engine, voice_for(speaker), suffix) or path
+        parts[index] = path
+
+    try:
+        try:
+            for index, segment in enumerate(segments):
+                text, is_static = segment[:2]
+                speaker = segment[2] if len(segment) > 2 else None
+                check(token)
+                if not text.strip():
+                    continue
+
+                if is_static:
+                    cached = memo.get(text, language, engine, voice_for(speaker), suffix)
+                    if cached:
+                        parts[index] = cached
+                        continue
+
+                if executor is None:
+                    render(index, text, is_static, speaker)
+                else:
+                    futures.append(executor.submit(render, index, text, is_static, speaker))
+            for future in futures:
+                future.result()
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True)
+
+        if not parts:
+            return None
+        return concatenate_audio([parts[index] for index in sorted(parts)], suffix)
+
+    except _SegmentFailed as e:
+        logger.error(f"Synthesis failed for segment: {str(e)[:60]}")
+        return None
+
+    except (OSError, wave.Error, EOFError) as e:
+        logger.error(f"Audio assembly failed: {e}")
+        return None
+
+    finally:
+        for path in scratch:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
@@ -0,0 +1,246 @@
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from fastapi import APIRouter, HTTPException, Request
+
+import profiler
+from cancellation import Cancelled, check
+from ingestion import normalize_pdf_files
+
+try:
+    from gradio_client import Client, handle_file
+except ImportError:  # only the remote stage needs it
+    Client = handle_file = None
+
+logger = logging.getLogger(__name__)
+
+# comma-separated stages tried in order, e.g. "local", "remote" or "remote,mock"
+PIPELINE = os.environ.get("PODKAAST_PIPELINE", "local")
+REMOTE_SPACE = os.environ.get("PODKAAST_REMOTE_SPACE", "gabrielchua/open-notebooklm")
+
+
+def parse_stages(spec):
+    return [name.strip().lower() for name in (spec or "").split(",") if name.strip()]
+
+
+class Pipeline:
+    """One conversion entry point over interchangeable stages.
+
+    ``stages`` maps a name (``local``, ``remote``, ``mock``) to a converter with
+    the ``convert_pdf_to_podcast`` signature. The configured stages run in order
+    until one returns audio, so ``remote,mock`` falls back to a mock transcript.
+    Every run is timed per reported step, finished audio is handed to
+    ``store`` (which returns the stored path), and the caches the stages use
+    are registered here so their statistics are read in one place. A
+    ``cache`` with ``get(args)`` and ``put(args, result)`` can answer a
+    request with a finished episode before any stage runs.
+    """
+
+    def __init__(self, stages, config=PIPELINE, caches=None, store=None, cache=None):
+        self.stages = dict(stages)
+        self.caches = dict(caches or {})
+        self.store = store
+        self.cache = cache
+        self.hooks = []
+        self._lock = threading.Lock()
+        self._timings = {}
+        try:
+            self.configure(config)
+        except ValueError as e:
+            logger.warning(f"{e}; using the local pipeline")
+            self.configure("local")
+
+    def configure(self, config):
+        names = parse_stages(config)
+        unknown = [name for name in names if name not in self.stages]
+        if not names or unknown:
+            raise ValueError(f"unknown pipeline {config!r}, expected a combination of {', '.join(self.stages)}")
+        self.active = names
+        logger.info(f"Conversion pipeline: {' -> '.join(names)}")
+        return self
+
+    def add_hook(self, hook):
+        """``hook(stage, step, seconds)`` is called after every timed step of a conversion"""
+        self.hooks.append(hook)
+
+    def register_cache(self, name, cache):
+        self.caches[name] = cache
+
+    def _timed(self, stage, report):
+        clock = {"step": None, "started": None}
+
+        def finish():
+            if clock["step"] is None:
+                return
+            seconds = time.perf_counter() - clock["started"]
+            with self._lock:
+                runs, total = self._timings.get((stage, clock["step"]), (0, 0.0))
+                self._timings[(stage, clock["step"])] = (runs + 1, total + seconds)
+            for hook in self.hooks:
+                try:
+                    hook(stage, clock["step"], seconds)
+                except Exception as e:
+                    logger.warning(f"Pipeline hook failed: {e}")
+            clock["step"] = None
+
+        def timed_report(step):
+            finish()
+            clock["step"], clock["started"] = step, time.perf_counter()
+            report(step)
+
+        return timed_report, finish
+
+    def convert(self, pdf_file, url, question, tone, length, language, use_advanced_audio, style="Monologue",
+                pages="", output="Episode", report=None, token=None):
+        args = (pdf_file, url, question, tone, length, language, use_advanced_audio, style, pages, output)
+        if self.cache is not None:
+            cached = self.cache.get(args)
+            if cached is not None:
+                (report or (lambda stage: None))("cached")
+                return cached
+        result = self.render(*args, report=report, token=token)
+        if self.cache is not None and result[0] is not None:
+            self.cache.put(args, result)
+        return result
+
+    def render(self, pdf_file, url, question, tone, length, language, use_advanced_audio, style="Monologue",
+               pages="", output="Episode", report=None, token=None):
+        """Run the configured stages, bypassing the episode cache"""
+        report = report or (lambda stage: None)
+        result = None, "Error: no pipeline stage configured"
+        for position, stage in enumerate(self.active):
+            check(token)
+            timed_report, finish = self._timed(stage, report)
+            try:
+                result = self.stages[stage](
+                    pdf_file, url, question, tone, length, language, use_advanced_audio, style, pages, output,
+                    report=timed_report, token=token
+                )
+                if result[0] is not None and self.store is not None:
+                    result = self.store(result[0]), result[1]
+            except Cancelled:
+                raise
+            except Exception as e:
+                logger.error(f"Pipeline stage {stage} failed: {e}")
+                result = None, f"Error: {str(e)}"
+            finally:
+                finish()
+            if result[0] is not None:
+                break
+            if position + 1 < len(self.active):
+                logger.warning(f"Pipeline stage {stage} produced no audio, trying {self.active[position + 1]}")
+        return result
+
+    def stats(self):
+        with self._lock:
+            timings = {
+                f"{stage}.{step}": {"runs": runs, "seconds": round(total, 3)}
+                for (stage, step), (runs, total) in self._timings.items()
+            }
+        caches = {name: cache.stats() for name, cache in self.caches.items() if hasattr(cache, "stats")}
+        return {"pipeline": list(self.active), "steps": timings, "caches": caches}
+
+    def router(self, token=None):
+        """Admin route with the step timings and cache statistics"""
+        router = APIRouter(prefix=profiler.ADMIN_ROUTE)
+
+        @router.get("/pipeline")
+        async def pipeline_stats(request: Request):
+            if not (profiler.ADMIN_TOKEN if token is None else token):
+                raise HTTPException(status_code=403, detail="Admin routes are disabled; set PODKAAST_ADMIN_TOKEN")
+            if not profiler.is_admin(request, token):
+                raise HTTPException(status_code=401, detail="Invalid admin token")
+            return self.stats()
+
+        return router
+
+
+def _first_pdf(pdf_file):
+    # the remote Space and the mock take a single uploaded PDF; chunked upload ids are replica-local
+    return next((source for source in normalize_pdf_files(pdf_file) if not isinstance(source, str)), None)
+
+
+def convert_remote(pdf_file, url, question, tone, length, language, use_advanced_audio, style="Monologue",
+                   pages="", output="Episode", report=None, token=None):
+    """Convert on the open-notebooklm Hugging Face Space; the format, page and output options are not supported there"""
+    temp_path = None
+    report = report or (lambda stage: None)
+    try:
+        if Client is None:
+            return None, "Error: gradio_client is not installed"
+        pdf = _first_pdf(pdf_file)
+        if pdf is None:
+            return None, "Error: Please upload a PDF file"
+
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
+            tmp_file.write(pdf)
+            temp_path = tmp_file.name
+
+        report("remote")
+        result = Client(REMOTE_SPACE).predict(
+            files=[handle_file(temp_path)],
+            url=url or "",
+            question=question or "",
+            tone=tone,
+            length=length,
+            language=language,
+            use_advanced_audio=use_advanced_audio,
+            api_name="/generate_podcast"
+        )
+        check(token)
+        if result and len(result) >= 2:
+            return result[0], result[1]
+        return None, "Error: Invalid response from API"
+
+    except Cancelled:
+        raise
+    except Exception as e:
+        logger.error(f"API call failed: {str(e)}")
+        return None, f"API Error: {str(e)}"
+    finally:
+        if temp_path and os.path.exists(temp_path):
+            try:
+                os.unlink(temp_path)
+            except Exception as cleanup_error:
+                logger.warning(f"Failed to cleanup temp file: {cleanup_error}")
+
+
+def convert_mock(pdf_file, url, question, tone, length, language, use_advanced_audio, style="Monologue",
+                 pages="", output="Episode", report=None, token=None):
+    """A placeholder transcript without audio, for when no real stage is reachable"""
+    report = report or (lambda stage: None)
+    pdf = _first_pdf(pdf_file)
+    if pdf is None and not (url or "").strip():
+        return None, "Error: Please upload a PDF file or enter a URL"
+
+    report("scripting")
+    source = f"Size: {len(pdf)} bytes" if pdf is not None else f"URL: {url.strip()}"
+    return None, f"""
+# Podcast Transcript
+
+**Topic:** {question or 'PDF Content Analysis'}
+**Tone:** {tone}
+**Length:** {length}
+**Language:** {language}
+
+## Summary
+
+This is a sample transcript generated from your PDF content. The remote conversion service is unavailable, so no audio was generated.
+
+## Next Steps
+
+- Run the local pipeline (`PODKAAST_PIPELINE=local`), which uses gTTS or pyttsx3
+- Check whether the Hugging Face Space ({REMOTE_SPACE}) is still active
+
+## Current Status
+
+- ✅ PDF uploaded successfully
+- ✅ Parameters processed
+- ❌ Audio generation failed (API unavailable)
+- ✅ Mock transcript generated
+
+{source}
+"""
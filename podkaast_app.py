@@ -5,97 +5,333 @@ import logging
 import requests
 from pathlib import Path
 import time
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from api import create_api_router
+from audio_store import AudioStore
+from cache import LRUCache, content_hash
+from cancellation import Cancelled, check
+from chapters import (CHAPTER_MARK, CHAPTER_WORKERS, OUTPUTS, ChapterCache, balance_chapters, build_manifest,
+                      load_manifest, mark_headings, split_chapters, write_playlist, write_temp)
+from cluster import SHARED_DIR, Cluster, SharedStore
+from dedup import deduplicate_text
+from document import Document
+from duration import (OVER_BUDGET_PENALTY, OVER_BUDGET_POLICY, DurationEstimator, audio_seconds,
+                      trim_segments)
+from gtts_transport import GTTS_CONCURRENCY, GTTSTransport
+from ingestion import ingest_sources, normalize_pdf_files, parse_urls
+from jobs import ANONYMOUS, CONVERSION_WORKERS, JobManager
+from languages import SUPPORTED_LANGUAGES, get_language, preload_languages
+from ocr import OcrFallback
+from page_index import PageIndexStore
+from pdf_sandbox import PdfSandbox
+from phrase_memo import PhraseMemo, assemble_audio
+from pipeline import Pipeline, convert_mock, convert_remote
+from pregeneration import DEFAULT_PREGEN_DIR, Pregenerator
+from profiler import ProfileStore
+from scheduler import RateLimited
+from script_writer import create_writer, section_prompt, stream_paragraphs
+from summarizer import Summarizer, speech_budget
+from transcripts import TRANSCRIPT_PAGE_CHARS, TranscriptFeeds, TranscriptPages
+from uploads import UploadRegistry
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def extract_text_from_pdf(pdf_file):
+preload_languages()
+
+# content hash -> Document; one UTF-8 buffer with page offsets is far smaller than a str per page
+text_cache = LRUCache(max_entries=64)
+ocr_fallback = OcrFallback()
+pdf_sandbox = PdfSandbox()
+
+def cached_text(key):
+    document = text_cache.get(key)
+    if document is not None:
+        return document.text
+    index = page_index.load(key)
+    return index.text() if index is not None else None
+
+def extract_document_from_file(path, key=None, token=None):
+    # parsing runs in a memory/CPU-limited worker process; only page text, OCR images and the outline come back
+    page_texts, scanned, outline = pdf_sandbox.extract_document(path, token)
+    
+    for index, page_text in ocr_fallback.recover(scanned, token).items():
+        page_texts[index] = page_text
+    
+    document = Document.from_pages(page_texts)
+    if key:
+        text_cache.put(key, document)
+        page_index.save(key, document, outline)
+    return document
+
+def extract_text_from_file(path, key=None, token=None):
+    try:
+        return extract_document_from_file(path, key, token).text
+    except Cancelled:
+        raise
+    except Exception as e:
+        logger.error(f"PDF text extraction failed: {e}")
+        return f"Error extracting text from PDF: {str(e)}"
+
+def select_pages(key, pages, chapters=False):
+    # page ranges and chapters read only their pages from the index saved on first parse
+    index = page_index.load(key)
+    if index is None:
+        return "Error: no page index for this document"
+    try:
+        text = index.select(pages, chapters)
+    except ValueError as e:
+        return f"Error: {e}"
+    return text or "Error: no text on the selected pages"
+
+def extract_text_from_pdf(pdf_file, token=None, pages="", chapters=False):
+    # chapterized output needs the index for the outline, so it reads from there like a page selection
+    key = content_hash(pdf_file)
+    if pages or chapters:
+        if page_index.load(key) is not None:
+            return select_pages(key, pages, chapters)
+    else:
+        cached = cached_text(key)
+        if cached is not None:
+            return cached
+    
     temp_path = None
     try:
-        import pypdf
         with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
             tmp_file.write(pdf_file)
             temp_path = tmp_file.name
         
-        try:
-            reader = pypdf.PdfReader(temp_path)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-            return text.strip()
-        finally:
-            os.unlink(temp_path)
+        text = extract_text_from_file(temp_path, key, token)
+        if (pages or chapters) and not text.startswith("Error"):
+            return select_pages(key, pages, chapters)
+        return text
+    except Cancelled:
+        raise
     except Exception as e:
         logger.error(f"PDF text extraction failed: {e}")
         return f"Error extracting text from PDF: {str(e)}"
+    finally:
+        if temp_path and os.path.exists(temp_path):
+            os.unlink(temp_path)
 
-def generate_podcast_script(text, question, tone, length, language):
-    try:
-        if question:
-            focus = f"Focusing on: {question}"
-        else:
-            focus = "General content overview"
-        
-        script = f"""
-# Podcast Script
+upload_registry = UploadRegistry(extract_text_from_file, cached_text)
+
+def extract_pdf_source(source, token=None, pages="", chapters=False):
+    # str entries reference a chunked upload whose extraction may already be running
+    if isinstance(source, str):
+        upload = upload_registry.get(source)
+        if upload is None:
+            return f"Error: unknown upload {source}"
+        # the extraction is shared with other requests, so only stop waiting for it
+        while True:
+            try:
+                text = upload.text(timeout=1)
+                break
+            except FutureTimeout:
+                check(token)
+        if (pages or chapters) and not text.startswith("Error"):
+            return select_pages(upload.sha256, pages, chapters)
+        return text
+    return extract_text_from_pdf(source, token, pages, chapters)
+
+RECAP_POINTS = 2
+# chapterized episodes recap the first key point of each chapter, up to this many
+CHAPTER_RECAP_POINTS = 4
+# smallest script, in characters, written for one chapter
+MIN_CHAPTER_BUDGET = 200
+# a cached chapter is reused while its share of the script budget moves by less than this fraction,
+# so editing one chapter, which shifts every share a little, does not re-render the others
+CHAPTER_BUDGET_TOLERANCE = 0.25
+STYLES = ["Monologue", "Dialogue"]
+HOSTS = ("Alex", "Sam")
+DIALOGUE_TURN_SENTENCES = 2
+# with a script writer: sections per episode, and how much more source text than speech it gets to rewrite
+WRITER_SECTIONS = {"Short (1-2 min)": 2, "Medium (3-5 min)": 4}
+WRITER_SOURCE_FACTOR = 3
+
+script_writer = create_writer()
+
+def truncate_to_sentences(text, language, limit=500):
+    if len(text) <= limit:
+        return text
+    
+    resources = get_language(language)
+    sentences = []
+    size = 0
+    for sentence in resources.split_sentences(text):
+        size += len(sentence) + len(resources.joiner)
+        if size > limit:
+            break
+        sentences.append(sentence)
+    
+    return (resources.join_sentences(sentences) or text[:limit]) + "..."
+
+def script_body(text, question, tone, length, language, token=None, budget=None, sections=None):
+    """``(paragraphs, key_points)``: the extractive summary, or narration streamed from the script writer"""
+    resources = get_language(language)
+    budget = budget or speech_budget(length, language)
+    summarizer = Summarizer(language)
+    summarizer.add_text(text)
+    
+    if script_writer is None:
+        body, key_points = summarizer.summarize(budget, query=question, key_points=RECAP_POINTS)
+        return [body or truncate_to_sentences(text, language)], key_points
+    
+    # the summarizer picks the source material, the writer turns each section of it into narration
+    source, key_points = summarizer.summarize(budget * WRITER_SOURCE_FACTOR, query=question, key_points=RECAP_POINTS)
+    sentences = resources.split_sentences(source) or [truncate_to_sentences(text, language)]
+    size = -(-len(sentences) // (sections or WRITER_SECTIONS.get(length, 4)))
+    sections = [resources.join_sentences(sentences[start:start + size]) for start in range(0, len(sentences), size)]
+    chars = budget // len(sections)
+    prompts = [section_prompt(section, tone, language, chars, question) for section in sections]
+    fallbacks = [truncate_to_sentences(section, language, chars) for section in sections]
+    return stream_paragraphs(script_writer.stream(prompts, token), len(prompts), fallbacks), key_points
+
+def script_opening(question, tone, length, language):
+    t = get_language(language).templates
+    
+    if question:
+        focus = t["focus_question"].format(question=question)
+    else:
+        focus = t["focus_general"]
+    
+    # (text, is_static): static segments only depend on the template and settings,
+    # so their audio can be memoized across requests
+    yield (f"""# {t['title']}
+
+**{t['topic']}:** {focus}
+**{t['tone']}:** {tone}
+**{t['length']}:** {length}
+**{t['language']}:** {language}""", False)
+    yield (f"## {t['introduction']}\n{t['intro_text']}", True)
+
+def script_closing(key_points, tone, length, language):
+    t = get_language(language).templates
+    summary = t["summary_text"].format(
+        tone=t["tones"].get(tone, tone.lower()),
+        length=t["lengths"].get(length, length.lower())
+    )
+    
+    yield (f"## {t['summary']}\n{summary}", True)
+    yield (get_language(language).join_sentences(key_points), False)
+    yield (f"## {t['outro']}\n{t['outro_text']}", True)
+
+def iter_script_segments(text, question, tone, length, language, token=None):
+    t = get_language(language).templates
+    paragraphs, key_points = script_body(text, question, tone, length, language, token)
+    
+    yield from script_opening(question, tone, length, language)
+    # paragraphs may still be streaming in from the script writer; each one is spoken as soon as it is done
+    for index, paragraph in enumerate(paragraphs):
+        yield (f"## {t['main_content']}\n{paragraph}" if index == 0 else paragraph, False)
+    yield from script_closing(key_points, tone, length, language)
+
+def build_script_segments(text, question, tone, length, language):
+    return list(iter_script_segments(text, question, tone, length, language))
+
+# (text, is_static, speaker) turns for two hosts; the first host presents, the second asks and recaps
+HOST, GUEST = 0, 1
+
+def dialogue_opening(question, tone, length, language):
+    t = get_language(language).templates
+    yield (f"""# {t['title']}
+
+**{t['tone']}:** {tone}
+**{t['length']}:** {length}
+**{t['language']}:** {language}""", False, None)
+    yield (t["intro_text"], True, HOST)
+    yield (t["focus_question"].format(question=question) if question else t["focus_general"], not question, GUEST)
 
-**Topic:** {focus}
-**Tone:** {tone}
-**Length:** {length}
-**Language:** {language}
+def dialogue_turns(paragraphs, language):
+    resources = get_language(language)
+    turn = 0
+    for paragraph in paragraphs:
+        sentences = resources.split_sentences(paragraph)
+        for start in range(0, len(sentences), DIALOGUE_TURN_SENTENCES):
+            speaker = (HOST, GUEST)[turn % 2]
+            # every time the first host picks the thread back up, the second one prompts them
+            if turn and speaker == HOST:
+                prompts = resources.templates["prompts"]
+                yield (prompts[(turn // 2 - 1) % len(prompts)], True, GUEST)
+            yield (resources.join_sentences(sentences[start:start + DIALOGUE_TURN_SENTENCES]), False, speaker)
+            turn += 1
 
-## Introduction
-Welcome to today's podcast! We'll be discussing content from your uploaded document.
+def dialogue_closing(key_points, tone, length, language):
+    resources = get_language(language)
+    t = resources.templates
+    summary = t["summary_text"].format(
+        tone=t["tones"].get(tone, tone.lower()),
+        length=t["lengths"].get(length, length.lower())
+    )
+    
+    yield (resources.join_sentences(key_points), False, GUEST)
+    yield (summary, True, HOST)
+    yield (t["outro_text"], True, GUEST)
+
+def iter_dialogue_segments(text, question, tone, length, language, token=None):
+    paragraphs, key_points = script_body(text, question, tone, length, language, token)
+    yield from dialogue_opening(question, tone, length, language)
+    yield from dialogue_turns(paragraphs, language)
+    yield from dialogue_closing(key_points, tone, length, language)
+
+def build_dialogue_segments(text, question, tone, length, language):
+    return list(iter_dialogue_segments(text, question, tone, length, language))
 
-## Main Content
-{text[:500]}{'...' if len(text) > 500 else ''}
+def spoken_text(segments):
+    return "\n".join(segment[0] for segment in segments)
 
-## Summary
-This podcast covered the key points from your document. The content has been adapted to a {tone.lower()} tone and formatted for {length.lower()} listening.
+def record_segments(segments, into):
+    # keeps every produced segment for the transcript and for a fallback engine
+    for segment in segments:
+        into.append(segment)
+        yield segment
 
-## Outro
-Thank you for listening! This podcast was generated from your PDF content.
-        """
-        return script.strip()
+def join_script_segments(segments):
+    lines = []
+    previous = None
+    for segment in segments:
+        text = segment[0]
+        speaker = segment[2] if len(segment) > 2 else None
+        if not text:
+            continue
+        if speaker is None:
+            lines.append(text)
+        elif speaker == previous:
+            # a host's answer and follow-up question read as one turn
+            lines[-1] += f" {text}"
+        else:
+            lines.append(f"**{HOSTS[speaker]}:** {text}")
+        previous = speaker
+    return "\n\n".join(lines)
+
+def generate_podcast_script(text, question, tone, length, language):
+    try:
+        return join_script_segments(build_script_segments(text, question, tone, length, language))
     except Exception as e:
         logger.error(f"Script generation failed: {e}")
         return f"Error generating script: {str(e)}"
 
-def text_to_speech_gtts(text, language="en"):
+gtts_transport = GTTSTransport()
+
+def text_to_speech_gtts(text, language="English", token=None, speaker=0):
     try:
-        from gtts import gTTS
-        
         with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as tmp_file:
             temp_path = tmp_file.name
         
-        lang_map = {
-            "English": "en",
-            "Spanish": "es", 
-            "French": "fr",
-            "German": "de",
-            "Chinese": "zh",
-            "Japanese": "ja",
-            "Korean": "ko",
-            "Hindi": "hi",
-            "Portuguese": "pt",
-            "Russian": "ru",
-            "Italian": "it",
-            "Turkish": "tr",
-            "Polish": "pl"
-        }
-        
-        lang_code = lang_map.get(language, "en")
+        resources = get_language(language)
         
-        tts = gTTS(text=text, lang=lang_code, slow=False)
-        tts.save(temp_path)
-        
-        return temp_path
+        return gtts_transport.save(text, resources.code, temp_path, tld=resources.gtts_tld_for(speaker), token=token)
         
+    except Cancelled:
+        raise
     except Exception as e:
         logger.error(f"gTTS failed: {e}")
         return None
 
-def text_to_speech_pyttsx3(text):
+def text_to_speech_pyttsx3(text, language="English", token=None, speaker=0):
     try:
         import pyttsx3
         
@@ -104,48 +340,407 @@ def text_to_speech_pyttsx3(text):
         
         engine = pyttsx3.init()
         
-        engine.setProperty('rate', 150)
+        voice, rate = get_language(language).pyttsx3_voice_for(speaker)
+        engine.setProperty('rate', rate)
         engine.setProperty('volume', 0.9)
         
-        engine.save_to_file(text, temp_path)
-        engine.runAndWait()
+        if voice:
+            engine.setProperty('voice', voice)
+        
+        # runAndWait blocks until the text is rendered; stopping from the word callback ends it early
+        watcher = None
+        if token is not None:
+            watcher = engine.connect('started-word', lambda name, location, length: token.cancelled and engine.stop())
+        try:
+            engine.save_to_file(text, temp_path)
+            engine.runAndWait()
+        finally:
+            if watcher is not None:
+                engine.disconnect(watcher)
+        check(token)
         
         return temp_path
         
+    except Cancelled:
+        raise
     except Exception as e:
         logger.error(f"pyttsx3 failed: {e}")
         return None
 
-def convert_pdf_to_podcast(pdf_file, url, question, tone, length, language, use_advanced_audio):
+TTS_ENGINES = {
+    "gtts": (lambda text, language, token=None, speaker=0: text_to_speech_gtts(text, language, token, speaker), ".mp3"),
+    "pyttsx3": (lambda text, language, token=None, speaker=0: text_to_speech_pyttsx3(text, language, token, speaker), ".wav"),
+}
+
+# segments rendered at once; gTTS requests share the transport's connection pool, pyttsx3 drives one local engine
+ENGINE_CONCURRENCY = {"gtts": GTTS_CONCURRENCY, "pyttsx3": 1}
+
+# in multi-replica mode finished episodes and rendered phrases live in the shared directory
+shared_store = SharedStore(SHARED_DIR) if SHARED_DIR else None
+phrase_memo = PhraseMemo(shared_store.path("phrases")) if shared_store else PhraseMemo()
+audio_store = AudioStore(shared_store.path("audio")) if shared_store else AudioStore()
+page_index = PageIndexStore(shared_store.path("pages")) if shared_store else PageIndexStore()
+duration_estimator = DurationEstimator()
+profile_store = ProfileStore()
+chapter_cache = ChapterCache(shared_store.path("chapters")) if shared_store else ChapterCache()
+transcript_pages = TranscriptPages(shared_store.path("transcripts")) if shared_store else TranscriptPages()
+transcript_feeds = TranscriptFeeds()
+pregenerator = Pregenerator(shared_store.path("pregen") if shared_store else DEFAULT_PREGEN_DIR, uploads=upload_registry)
+
+def synthesize_script(segments, engine, language, token=None):
+    synthesize, suffix = TTS_ENGINES[engine]
+    resources = get_language(language)
+    voices = [resources.voice_id(engine, speaker) for speaker in range(len(HOSTS))]
+    return assemble_audio(
+        segments,
+        lambda text, speaker=0: synthesize(text, language, token, speaker=speaker),
+        phrase_memo,
+        language,
+        engine,
+        voices,
+        suffix,
+        token,
+        workers=ENGINE_CONCURRENCY.get(engine, 1)
+    )
+
+def chapter_segments(title, paragraphs, style, language):
+    if style == "Dialogue":
+        yield (f"## {title}", False, None)
+        yield from dialogue_turns(paragraphs, language)
+    else:
+        yield (f"## {title}", False)
+        for paragraph in paragraphs:
+            yield (paragraph, False)
+
+def synthesize_chapter(segments, engine, language, token=None):
+    # like a single-file episode, a chapter gTTS cannot render is retried offline
+    audio_path = synthesize_script(segments, engine, language, token)
+    if not audio_path and engine == "gtts":
+        engine = "pyttsx3"
+        audio_path = synthesize_script(segments, engine, language, token)
+    return audio_path, engine
+
+def render_chapters(text, question, tone, length, language, style, engine, report, token=None):
+    """One audio file per chapter plus an HLS-style playlist; returns ``(manifest_path, transcript)``.
+
+    Chapters are scripted and synthesized concurrently, and each finished one is
+    cached on its source text and settings, so only changed chapters are rendered again.
+    """
+    t = get_language(language).templates
+    sections = balance_chapters(split_chapters(text, t["main_content"]))
+    if not sections:
+        return None, "Error: The document has no text to turn into chapters"
+    budget = speech_budget(length, language)
+    total = sum(len(body) for _, body in sections) or 1
+    settings = [question, tone, length, language, style, engine, script_writer is not None]
+    
+    def cache_key(*parts):
+        return content_hash(json.dumps(list(parts) + settings, ensure_ascii=False).encode())
+    
+    def write(section):
+        title, body = section
+        share = len(body) / total
+        chars = max(int(budget * share), MIN_CHAPTER_BUDGET)
+        part = {"key": cache_key(title, body), "title": title, "share": share, "chars": chars}
+        part["cached"] = chapter_cache.get(part["key"])
+        if part["cached"] is not None and abs(part["cached"]["chars"] - chars) > chars * CHAPTER_BUDGET_TOLERANCE:
+            part["cached"] = None
+        if part["cached"] is None:
+            paragraphs, key_points = script_body(body, question, tone, length, language, token, budget=chars, sections=1)
+            part["segments"] = list(chapter_segments(title, list(paragraphs), style, language))
+            part["key_point"] = key_points[:1]
+        return part
+    
+    report("scripting")
+    with ThreadPoolExecutor(max_workers=min(len(sections), 4), thread_name_prefix="chapter") as executor:
+        content = list(executor.map(write, sections))
+    
+    key_points = [point for part in content for point in (part["cached"] or part)["key_point"]]
+    opening = list((dialogue_opening if style == "Dialogue" else script_opening)(question, tone, length, language))
+    closing = list((dialogue_closing if style == "Dialogue" else script_closing)(
+        key_points[:CHAPTER_RECAP_POINTS], tone, length, language
+    ))
+    parts = [{"title": t["introduction"], "segments": opening}] + content + [{"title": t["outro"], "segments": closing}]
+    for part in (parts[0], parts[-1]):
+        part["key"] = cache_key(spoken_text(part["segments"]))
+        part["cached"] = chapter_cache.get(part["key"])
+        part["key_point"] = []
+        part["chars"] = 0
+    
+    # the budget covers the whole episode; chapters still to render share what cached ones leave
+    seconds_of = lambda text: duration_estimator.estimate(text, engine, language).audio_seconds
+    limit = duration_estimator.audio_limit(engine, language)
+    predict = lambda part: (part["cached"]["duration"] or 0) if part["cached"] else seconds_of(spoken_text(part["segments"]))
+    pending = [part for part in content if part["cached"] is None]
+    fixed = sum(predict(part) for part in parts if part["cached"] is not None or "share" not in part)
+    predicted = fixed + sum(predict(part) for part in pending)
+    logger.info(f"Predicted {predicted:.0f}s of audio in {len(parts)} chapters, {len(pending)} to render")
+    if predicted > limit:
+        if OVER_BUDGET_POLICY == "reject":
+            return None, (f"Error: The episode would run about {predicted / 60:.1f} minutes, "
+                          f"over the {limit / 60:.1f} minute budget. Choose a shorter length or fewer pages.")
+        shares = sum(part["share"] for part in pending) or 1
+        for part in pending:
+            allowed = max(limit - fixed, 0) * part["share"] / shares
+            part["segments"] = list(trim_segments(part["segments"], seconds_of, allowed, language))
+    
+    def render(part):
+        chapter = part["cached"]
+        if chapter is None:
+            audio_path, used = synthesize_chapter(part["segments"], engine, language, token)
+            if not audio_path or not os.path.exists(audio_path):
+                return None
+            seconds = audio_seconds(audio_path)
+            duration_estimator.record(spoken_text(part["segments"]), used, language, seconds)
+            chapter = {
+                "path": audio_store.store(audio_path),
+                "duration": seconds,
+                "transcript": join_script_segments(part["segments"]),
+                "key_point": part["key_point"],
+                "chars": part["chars"],
+            }
+            chapter_cache.put(part["key"], chapter)
+        # finished chapters show up in the UI while the others are still synthesizing
+        transcript_feeds.publish(token, (chapter["transcript"], True))
+        return chapter
+    
+    report("synthesizing")
+    with ThreadPoolExecutor(max_workers=CHAPTER_WORKERS.get(engine, 1), thread_name_prefix="chapter") as executor:
+        rendered = list(executor.map(render, parts))
+    transcript = "\n\n".join(chapter["transcript"] for chapter in rendered if chapter)
+    if not all(rendered):
+        return None, f"{transcript}\n\n❌ Audio generation failed. Please try again."
+    
+    playlist = audio_store.store(write_temp(write_playlist(
+        [(part["title"], chapter["duration"], os.path.basename(chapter["path"])) for part, chapter in zip(parts, rendered)]
+    ), ".m3u8"))
+    manifest = build_manifest(t["title"], language, style, [
+        {
+            "title": part["title"],
+            "audio": audio_store.url_for(chapter["path"]),
+            "duration": chapter["duration"],
+            "transcript": chapter["transcript"],
+        }
+        for part, chapter in zip(parts, rendered)
+    ], audio_store.url_for(playlist))
+    return write_temp(json.dumps(manifest, ensure_ascii=False, indent=2), ".json"), transcript
+
+def convert_local(pdf_file, url, question, tone, length, language, use_advanced_audio, style="Monologue",
+                  pages="", output="Episode", report=None, token=None):
     temp_path = None
     audio_path = None
+    report = report or (lambda stage: None)
     
     try:
-        if pdf_file is None:
-            return None, "Error: Please upload a PDF file"
+        if not pdf_file and not (url or "").strip():
+            return None, "Error: Please upload a PDF file or enter a URL"
         
-        text = extract_text_from_pdf(pdf_file)
-        if text.startswith("Error"):
-            return None, text
+        report("extracting")
+        chapters = output == "Chapters"
+        text, errors = ingest_sources(
+            pdf_file, url, lambda source: extract_pdf_source(source, token, pages, chapters), token=token
+        )
+        if not text:
+            return None, "Error: " + "; ".join(errors)
+        for error in errors:
+            logger.warning(f"Skipped source: {error}")
         
-        script = generate_podcast_script(text, question, tone, length, language)
+        if chapters and CHAPTER_MARK not in text:
+            # no PDF outline to go by: split at headings, before deduplication reflows the lines
+            text = mark_headings(text)
         
-        if use_advanced_audio:
-            audio_path = text_to_speech_gtts(script, language)
-            if not audio_path:
-                audio_path = text_to_speech_pyttsx3(script)
-        else:
-            audio_path = text_to_speech_pyttsx3(script)
+        report("deduplicating")
+        text, dedup_stats = deduplicate_text(text)
+        logger.info(dedup_stats.summary())
+        
+        check(token)
+        if chapters:
+            return render_chapters(text, question, tone, length, language, style,
+                                   "gtts" if use_advanced_audio else "pyttsx3", report, token)
+        report("scripting")
+        iter_segments = iter_dialogue_segments if style == "Dialogue" else iter_script_segments
+        engine = "gtts" if use_advanced_audio else "pyttsx3"
+        planned = iter_segments(text, question, tone, length, language, token)
+        streamed = script_writer is not None
+        limit = duration_estimator.audio_limit(engine, language)
+        if not streamed:
+            # a template script is complete before any speech, so its length is checked up front;
+            # a streamed one is only trimmed as it arrives
+            planned = list(planned)
+            estimate = duration_estimator.estimate(spoken_text(planned), engine, language)
+            logger.info(f"Predicted {estimate.audio_seconds:.0f}s of audio, {estimate.synthesis_seconds:.0f}s to synthesize")
+            if estimate.audio_seconds > limit and OVER_BUDGET_POLICY == "reject":
+                return None, (f"Error: The episode would run about {estimate.audio_seconds / 60:.1f} minutes, "
+                              f"over the {limit / 60:.1f} minute budget. Choose a shorter length or fewer pages.")
+        segments = []
+        seconds_of = lambda text: duration_estimator.estimate(text, engine, language).audio_seconds
+        # synthesis consumes the script as it is written, so the first paragraphs are spoken while later ones stream in
+        stream = record_segments(trim_segments(planned, seconds_of, limit, language), segments)
+        stream = transcript_feeds.follow(stream, token)
+        
+        report("synthesizing")
+        started = time.perf_counter()
+        audio_path = synthesize_script(stream, engine, language, token)
+        if not audio_path and engine == "gtts":
+            segments.extend(stream)
+            engine = "pyttsx3"
+            started = time.perf_counter()
+            audio_path = synthesize_script(segments, engine, language, token)
+        synthesis_seconds = time.perf_counter() - started
+        segments.extend(stream)
+        script = join_script_segments(segments)
         
         if audio_path and os.path.exists(audio_path):
+            # calibrate the estimator; a streamed script's synthesis time includes waiting for the writer
+            duration_estimator.record(
+                spoken_text(segments), engine, language, audio_seconds(audio_path),
+                None if streamed else synthesis_seconds
+            )
             return audio_path, script
         else:
             return None, f"{script}\n\n❌ Audio generation failed. Please try again."
         
+    except Cancelled:
+        raise
     except Exception as e:
         logger.error(f"Conversion failed: {str(e)}")
         return None, f"Error: {str(e)}"
 
+# the UI, the API and the cluster all run conversions through this one entry point; PODKAAST_PIPELINE picks the stages
+conversion_pipeline = Pipeline(
+    {"local": convert_local, "remote": convert_remote, "mock": convert_mock},
+    caches={"text": text_cache, "episodes": pregenerator},
+    store=audio_store.store,
+    # finished episodes of popular requests are only kept when pre-generation is configured
+    cache=pregenerator if pregenerator.enabled else None
+)
+if script_writer is not None:
+    conversion_pipeline.register_cache("prompts", script_writer.cache.memory)
+convert_pdf_to_podcast = conversion_pipeline.convert
+
+LENGTH_COST = {"Short (1-2 min)": 1.0, "Medium (3-5 min)": 2.0}
+
+def planned_chars(pdf_file, url, length, language, pages="", output="Episode"):
+    """Characters an episode is expected to speak, judged from its input before it runs.
+
+    The body says at most the summary budget and at most what the selected
+    pages hold (their UTF-8 size, an upper bound on characters); the intro and
+    outro take the rest of the budget. URLs and PDFs not parsed yet are taken
+    to fill the whole body budget.
+    """
+    body_budget = speech_budget(length, language)
+    framing = speech_budget(length, language, share=1.0) - body_budget
+    if parse_urls(url):
+        return framing + body_budget
+    size = 0
+    chapters = 0
+    for source in normalize_pdf_files(pdf_file):
+        if isinstance(source, str):
+            upload = upload_registry.get(source)
+            key = upload.sha256 if upload else None
+        else:
+            key = content_hash(source)
+        index = page_index.load(key) if key else None
+        if index is None:
+            return framing + body_budget
+        try:
+            size += index.text_bytes(pages)
+        except ValueError:
+            return framing + body_budget
+        chapters += len(index.chapter_starts())
+    if output == "Chapters":
+        # every chapter gets a script of its own, however small its share
+        body_budget = max(body_budget, chapters * MIN_CHAPTER_BUDGET)
+    return framing + min(body_budget, size)
+
+def estimate_conversion_cost(pdf_file, url, question, tone, length, language, use_advanced_audio, style="Monologue",
+                             pages="", output="Episode"):
+    # relative job size for the scheduler: megabytes of input plus a flat charge per URL, scaled by length
+    size = 0
+    for source in normalize_pdf_files(pdf_file):
+        if isinstance(source, str):
+            upload = upload_registry.get(source)
+            size += upload.total_size if upload else 0
+        else:
+            size += len(source)
+    cost = (0.2 + size / (1024 * 1024) + 0.5 * len(parse_urls(url))) * LENGTH_COST.get(length, 2.0)
+    # episodes predicted to synthesize past the budget wait behind everything else
+    engine = "gtts" if use_advanced_audio else "pyttsx3"
+    chars = planned_chars(pdf_file, url, length, language, pages, output)
+    predicted = duration_estimator.planned(chars, engine, language)
+    if predicted.audio_seconds > duration_estimator.audio_limit(engine, language):
+        cost *= OVER_BUDGET_PENALTY
+    return cost
+
+def request_user(request):
+    # fair-share identity: the Gradio session, falling back to the client address
+    if request is None:
+        return ANONYMOUS
+    if getattr(request, "session_hash", None):
+        return f"session:{request.session_hash}"
+    client = getattr(request, "client", None)
+    return f"client:{client.host}" if client else ANONYMOUS
+
+def format_seconds(seconds):
+    return f"{int(seconds // 60)}:{int(seconds % 60):02d}"
+
+def chapter_result(manifest_path, manifest, transcript):
+    # the player gets the first chapter; the others, the playlist and the manifest are linked
+    chapters = manifest["chapters"]
+    first = audio_store.resolve(os.path.basename(chapters[0]["audio"])) if chapters else None
+    contents = "\n".join(
+        f"{chapter['index'] + 1}. [{chapter['title']}]({chapter['audio']}) "
+        f"({format_seconds(chapter['offset'])}, {format_seconds(chapter['duration'])})"
+        for chapter in chapters
+    )
+    status = (f"✅ {len(chapters)} chapters generated ({format_seconds(manifest['duration'])})! 🎉"
+              f"\n🔗 Manifest: {audio_store.url_for(manifest_path)}\n🔗 Playlist: {manifest['playlist']}")
+    return first, f"{contents}\n\n{transcript}", status
+
+def transcript_page(digest, page):
+    # one page of a finished transcript, the page shown and its "Page n of m" label
+    if not digest:
+        return gr.skip(), 1, ""
+    found = transcript_pages.page(digest, page)
+    if found is None:
+        return "Transcript no longer available. Please convert again.", 1, ""
+    text, number, count = found
+    return text, number, f"Page {number} of {count}" if count > 1 else ""
+
+def transcript_view(transcript):
+    # first page of a finished transcript and its hash; later pages are loaded on demand
+    digest = transcript_pages.add(transcript)
+    if digest is None:
+        return transcript, None, 1, ""
+    text, number, label = transcript_page(digest, 1)
+    return text, digest, number, label
+
+def transcript_tail(token):
+    # the latest sections of a script still being written, never more than one page
+    if token is None:
+        return None
+    count, segments = transcript_feeds.tail(token, TRANSCRIPT_PAGE_CHARS)
+    if not segments:
+        return None
+    earlier = "…\n\n" if len(segments) < count else ""
+    return f"{earlier}{join_script_segments(segments)}\n\n✍️ *Writing...*"
+
+def uses_local_uploads(pdf_file, *args):
+    # chunked uploads are spooled on the replica that received them, so those jobs stay there
+    return any(isinstance(source, str) for source in normalize_pdf_files(pdf_file))
+
+conversion_jobs = JobManager(estimate_cost=estimate_conversion_cost, profiles=profile_store)
+# off-peak renders go through this replica's own workers, after its queue has drained
+pregenerator.start(conversion_jobs, conversion_pipeline.render)
+if shared_store:
+    conversion_jobs = Cluster(
+        shared_store,
+        conversion_jobs,
+        convert_pdf_to_podcast,
+        resolve_audio=audio_store.resolve,
+        local_only=uses_local_uploads
+    ).start()
+
 with gr.Blocks(title="Podkaast: Convert PDFs to Podcasts") as demo:
     gr.Markdown("# 🎙️ Podkaast: Convert PDFs to Podcasts")
     gr.Markdown("✅ **Working Version** - Uses reliable TTS services instead of broken API")
@@ -153,15 +748,17 @@ with gr.Blocks(title="Podkaast: Convert PDFs to Podcasts") as demo:
     with gr.Row():
         with gr.Column():
             pdf_input = gr.File(
-                label="📄 Upload your PDF",
+                label="📄 Upload your PDFs",
                 file_types=[".pdf"],
+                file_count="multiple",
                 type="binary"
             )
             
             url_input = gr.Textbox(
-                label="🔗 URL (optional)",
-                placeholder="Enter URL here...",
-                value=""
+                label="🔗 URLs (optional)",
+                placeholder="Enter one or more URLs, separated by spaces or new lines...",
+                value="",
+                lines=2
             )
             
             question_input = gr.Textbox(
@@ -184,14 +781,31 @@ with gr.Blocks(title="Podkaast: Convert PDFs to Podcasts") as demo:
             
             language_input = gr.Dropdown(
                 label="🌍 Select Language",
-                choices=[
-                    "English", "Spanish", "French", "German",
-                    "Chinese", "Japanese", "Korean", "Hindi",
-                    "Portuguese", "Russian", "Italian", "Turkish", "Polish"
-                ],
+                choices=SUPPORTED_LANGUAGES,
                 value="English"
             )
             
+            style_input = gr.Radio(
+                label="🎙️ Select Format",
+                choices=STYLES,
+                value="Monologue",
+                info="Dialogue splits the episode between two hosts with different voices"
+            )
+            
+            pages_input = gr.Textbox(
+                label="📑 Pages or Chapters (optional)",
+                placeholder="e.g. 40-60, 72 or Chapter 3",
+                value="",
+                info="Applies to every PDF; chapter names come from the PDF's bookmarks"
+            )
+            
+            output_input = gr.Radio(
+                label="🎧 Select Output",
+                choices=OUTPUTS,
+                value="Episode",
+                info="Chapters renders one file per section of the document, with a manifest and playlist"
+            )
+            
             advanced_audio = gr.Checkbox(
                 label="🚀 Use Advanced Audio (Online TTS)",
                 value=True,
@@ -199,28 +813,77 @@ with gr.Blocks(title="Podkaast: Convert PDFs to Podcasts") as demo:
             )
             
             convert_btn = gr.Button("🎬 Convert to Podcast", variant="primary", size="lg")
+            cancel_btn = gr.Button("⏹️ Cancel", variant="secondary")
             loading_indicator = gr.Text("", visible=False, label="Processing...")
         
         with gr.Column():
             audio_output = gr.Audio(label="🎵 Generated Podcast")
             transcript_output = gr.Markdown(label="📝 Transcript")
+            with gr.Row():
+                previous_page_btn = gr.Button("◀️ Previous", size="sm")
+                page_input = gr.Number(label="Page", value=1, precision=0, minimum=1)
+                next_page_btn = gr.Button("Next ▶️", size="sm")
+            page_label = gr.Markdown("")
+            transcript_state = gr.State(None)
             status_output = gr.Textbox(label="📊 Status", interactive=False, value="Ready to convert PDF to podcast! 🎙️")
 
-    def handle_conversion(pdf_file, url, question, tone, length, language, use_advanced_audio):
+    async def handle_conversion(pdf_file, url, question, tone, length, language, use_advanced_audio, style="Monologue",
+                                pages="", output="Episode", request: gr.Request = None):
+        user = request_user(request)
+        job = None
         try:
-            audio, transcript = convert_pdf_to_podcast(pdf_file, url, question, tone, length, language, use_advanced_audio)
+            # clicking convert again replaces this session's earlier request
+            conversion_jobs.cancel_user(user, "superseded by a new request")
+            job = conversion_jobs.submit(
+                convert_pdf_to_podcast, pdf_file, url, question, tone, length, language, use_advanced_audio, style,
+                pages, output, user=user
+            )
+            version = -1
+            shown = None
+            while not job.done:
+                version = await asyncio.to_thread(job.wait_for_change, version, 1)
+                # the script streams in as it is written; the browser only ever gets its latest page.
+                # jobs running on another replica have no local token and show their transcript at the end
+                tail = transcript_tail(getattr(job, "token", None))
+                if tail is not None and tail != shown:
+                    shown = tail
+                    yield gr.skip(), tail, f"⏳ {job.stage or 'queued'}...", None, 1, ""
+            if job.status == "cancelled":
+                yield None, f"❌ Cancelled: {job.error}", f"Cancelled: {job.error}", None, 1, ""
+                return
+            audio, transcript = job.result()
             
             if audio is None:
-                return None, f"❌ {transcript}", f"Failed: {transcript}"
+                yield None, f"❌ {transcript}", f"Failed: {transcript}", None, 1, ""
+                return
+            manifest = load_manifest(audio)
+            if manifest is not None:
+                audio, transcript, status = chapter_result(audio, manifest, transcript)
             else:
-                return audio, transcript, "✅ Podcast generated successfully! 🎉"
+                status = "✅ Podcast generated successfully! 🎉"
+                audio_url = audio_store.url_for(audio)
+                if audio_url:
+                    status += f"\n🔗 Permalink: {audio_url}"
+            text, digest, number, label = transcript_view(transcript)
+            yield audio, text, status, digest, number, label
                 
+        except RateLimited as e:
+            yield None, f"⏳ {e}", f"Busy: {e}", None, 1, ""
+        except asyncio.CancelledError:
+            # Gradio cancels the event on the cancel button or when the client goes away
+            if job is not None:
+                job.cancel("cancelled by the client")
+            raise
         except Exception as e:
             error_msg = f"Unexpected error: {str(e)}"
             logger.error(error_msg)
-            return None, f"❌ {error_msg}", f"Failed: {error_msg}"
+            yield None, f"❌ {error_msg}", f"Failed: {error_msg}", None, 1, ""
+
+    def cancel_conversion(request: gr.Request = None):
+        cancelled = conversion_jobs.cancel_user(request_user(request), "cancelled by the user")
+        return "⏹️ Conversion cancelled" if cancelled else "Nothing to cancel"
 
-    convert_btn.click(
+    convert_event = convert_btn.click(
         fn=handle_conversion,
         inputs=[
             pdf_input,
@@ -229,19 +892,59 @@ with gr.Blocks(title="Podkaast: Convert PDFs to Podcasts") as demo:
             tone_input,
             length_input,
             language_input,
-            advanced_audio
+            advanced_audio,
+            style_input,
+            pages_input,
+            output_input
         ],
-        outputs=[audio_output, transcript_output, status_output],
-        show_progress=True
+        outputs=[audio_output, transcript_output, status_output, transcript_state, page_input, page_label],
+        show_progress=True,
+        concurrency_limit=CONVERSION_WORKERS,
+        trigger_mode="multiple"
     )
+    
+    def previous_page(digest, page):
+        return transcript_page(digest, (page or 1) - 1)
+
+    def next_page(digest, page):
+        return transcript_page(digest, (page or 1) + 1)
+
+    page_outputs = [transcript_output, page_input, page_label]
+    previous_page_btn.click(fn=previous_page, inputs=[transcript_state, page_input], outputs=page_outputs)
+    next_page_btn.click(fn=next_page, inputs=[transcript_state, page_input], outputs=page_outputs)
+    page_input.submit(fn=transcript_page, inputs=[transcript_state, page_input], outputs=page_outputs)
+    
+    def cancel_on_unload(request: gr.Request = None):
+        conversion_jobs.cancel_user(request_user(request), "client disconnected")
+
+    cancel_btn.click(fn=cancel_conversion, outputs=[status_output], cancels=[convert_event])
+    demo.unload(cancel_on_unload)
+
+def mount_routes(fastapi_app):
+    fastapi_app.include_router(upload_registry.router())
+    fastapi_app.include_router(audio_store.router())
+    fastapi_app.include_router(profile_store.router())
+    fastapi_app.include_router(conversion_pipeline.router())
+    fastapi_app.include_router(create_api_router(conversion_jobs, convert_pdf_to_podcast, upload_registry, audio_store))
+
+def launch_app(pipeline=None, **launch_kwargs):
+    # entry points choose their stages here rather than at import, so importing one changes nothing
+    if pipeline:
+        conversion_pipeline.configure(pipeline)
+    # launch() builds a fresh FastAPI app, so the extra routes are mounted on it before blocking
+    launch_kwargs.setdefault("allowed_paths", [str(audio_store.root)])
+    demo.launch(prevent_thread_lock=True, **launch_kwargs)
+    mount_routes(demo.app)
+    demo.block_thread()
 
 if __name__ == "__main__":
     try:
         print("🚀 Starting Podkaast - Working Version")
         print("✅ Uses reliable TTS services instead of broken API")
-        demo.launch(share=True, debug=True)
+        launch_app(share=True, show_error=True)
     except Exception as e:
         logger.error(f"Failed to launch app: {e}")
         print(f"Error launching app: {e}")
 
 app = demo.app
+mount_routes(app)
@@ -0,0 +1,355 @@
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from cache import content_hash
+from ingestion import normalize_pdf_files, parse_urls
+from page_index import MAX_INDEX_AGE
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PREGEN_DIR = Path(os.environ.get("PODKAAST_CACHE_DIR", Path.home() / ".cache" / "podkaast")) / "pregen"
+# local hours in which popular episodes are rendered ahead of time, e.g. "1-6" or "22-5"; empty disables it
+PREGEN_HOURS = os.environ.get("PODKAAST_PREGEN_HOURS", "")
+# decayed request count at which a document and settings combination is kept and pre-rendered
+PREGEN_MIN_REQUESTS = float(os.environ.get("PODKAAST_PREGEN_MIN_REQUESTS", "3"))
+PREGEN_HALF_LIFE = float(os.environ.get("PODKAAST_PREGEN_HALF_LIFE_DAYS", "7")) * 86400
+PREGEN_MAX_EPISODES = int(os.environ.get("PODKAAST_PREGEN_MAX_EPISODES", "200"))
+PREGEN_INTERVAL = 60
+# combinations whose request counts are remembered; the least requested are forgotten first
+MAX_TRACKED = 10000
+# a combination whose render failed is not retried for this long
+RETRY_AFTER = 86400
+PREGEN_USER = "pregeneration"
+
+SETTINGS = ("question", "tone", "length", "language", "use_advanced_audio", "style", "pages", "output")
+
+
+def parse_hours(spec):
+    """Set of local hours covered by ``"1-6"`` (01:00 to 06:00), ``"22-5"`` or ``"0-24"``; raises ValueError"""
+    hours = set()
+    for part in (spec or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        start, _, end = part.partition("-")
+        start, end = int(start), int(end or int(start) + 1)
+        if not (0 <= start < 24 and 0 < end <= 24) or start == end:
+            raise ValueError(f"bad hour range {part!r}")
+        hours.update(range(start, end) if start < end else list(range(start, 24)) + list(range(end)))
+    return hours
+
+
+def _write_text(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile("w", dir=path.parent, delete=False, encoding="utf-8") as tmp_file:
+        tmp_file.write(text)
+    os.replace(tmp_file.name, path)
+
+
+class Pregenerator:
+    """Episode cache that renders popular requests ahead of time.
+
+    Every conversion request for PDFs only (no URLs, whose pages change) is
+    counted per document hash and settings, with counts halving every
+    ``half_life`` seconds. Combinations requested at least ``min_requests``
+    times keep a copy of their PDFs and their finished episode; during the
+    ``hours`` off-peak window, whenever the workers are idle, the most popular
+    combination without an episode is rendered as a low-priority job. Kept
+    PDFs are deleted once no tracked combination refers to them, or after
+    ``max_source_age`` seconds without a request, like saved page indexes.
+    """
+
+    def __init__(self, root=DEFAULT_PREGEN_DIR, uploads=None, hours=PREGEN_HOURS, min_requests=PREGEN_MIN_REQUESTS,
+                 half_life=PREGEN_HALF_LIFE, max_episodes=PREGEN_MAX_EPISODES, interval=PREGEN_INTERVAL,
+                 max_source_age=MAX_INDEX_AGE):
+        self.root = Path(root)
+        self.uploads = uploads
+        try:
+            self.hours = parse_hours(hours)
+        except ValueError as e:
+            logger.warning(f"Pre-generation disabled, invalid PODKAAST_PREGEN_HOURS: {e}")
+            self.hours = set()
+        self.min_requests = min_requests
+        self.half_life = half_life
+        self.max_episodes = max_episodes
+        self.interval = interval
+        self.max_source_age = max_source_age
+        self.jobs = None
+        self.render = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.hits = 0
+        self.misses = 0
+        self.peak_hits = 0
+        self.peak_requests = 0
+        self.pregenerated = 0
+        try:
+            self.popularity = json.loads((self.root / "popularity.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self.popularity = {}
+
+    @property
+    def enabled(self):
+        return bool(self.hours)
+
+    def off_peak(self, now=None):
+        return datetime.fromtimestamp(now or time.time()).hour in self.hours
+
+    def _documents(self, pdf_file):
+        documents = []
+        for source in normalize_pdf_files(pdf_file):
+            if isinstance(source, str):
+                upload = self.uploads.get(source) if self.uploads else None
+                if upload is None or upload.sha256 is None:
+                    return None
+                documents.append((upload.sha256, upload))
+            else:
+                documents.append((content_hash(source), source))
+        return documents
+
+    def key_for(self, pdf_file, url, question, tone, length, language, use_advanced_audio, style="Monologue",
+                pages="", output="Episode"):
+        """Cache key and settings of a request, or None when it cannot be cached"""
+        if parse_urls(url):
+            return None
+        documents = self._documents(pdf_file)
+        if not documents:
+            return None
+        settings = dict(zip(SETTINGS, (question or "", tone, length, language, bool(use_advanced_audio),
+                                       style or "Monologue", pages or "", output or "Episode")))
+        hashes = [digest for digest, _ in documents]
+        key = content_hash(json.dumps([hashes, settings], sort_keys=True).encode())
+        return key, hashes, settings, documents
+
+    def _score(self, entry, now):
+        return entry["score"] * 0.5 ** ((now - entry["updated"]) / self.half_life)
+
+    def _popular(self, score):
+        # rounded, so requests a few minutes apart still count as whole requests
+        return round(score) >= self.min_requests
+
+    def _episode_path(self, key):
+        return self.root / "episodes" / f"{key}.json"
+
+    def _source_path(self, digest):
+        return self.root / "sources" / f"{digest}.pdf"
+
+    def _save_sources(self, documents):
+        for digest, source in documents:
+            path = self._source_path(digest)
+            if path.exists():
+                try:
+                    # the modification time records the last request, for pruning
+                    os.utime(path)
+                except OSError:
+                    pass
+                continue
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as tmp_file:
+                    if isinstance(source, bytes):
+                        tmp_file.write(source)
+                    else:
+                        with open(source.path, "rb") as spooled:
+                            shutil.copyfileobj(spooled, tmp_file)
+                os.replace(tmp_file.name, path)
+            except OSError as e:
+                logger.warning(f"Could not keep popular document {digest[:12]}: {e}")
+
+    def prune_sources(self, now=None):
+        """Delete kept PDFs that no tracked combination refers to, or that were not requested for ``max_source_age``"""
+        now = now or time.time()
+        with self._lock:
+            referenced = {digest for entry in self.popularity.values() for digest in entry["documents"]}
+        try:
+            paths = list((self.root / "sources").glob("*.pdf"))
+        except OSError:
+            return
+        for path in paths:
+            try:
+                if path.stem in referenced and now - path.stat().st_mtime <= self.max_source_age:
+                    continue
+                path.unlink()
+            except OSError:
+                pass
+
+    def _save_popularity(self):
+        with self._lock:
+            snapshot = json.dumps(self.popularity)
+        try:
+            _write_text(self.root / "popularity.json", snapshot)
+        except OSError as e:
+            logger.warning(f"Could not save request popularity: {e}")
+
+    def _load_episode(self, key):
+        try:
+            episode = json.loads(self._episode_path(key).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(episode["audio"]):
+            return None
+        return episode["audio"], episode["transcript"]
+
+    def get(self, args, now=None):
+        """Count a request and return its precomputed ``(audio, transcript)``, or None"""
+        found = self.key_for(*args)
+        if found is None:
+            return None
+        key, hashes, settings, documents = found
+        now = now or time.time()
+        with self._lock:
+            entry = self.popularity.get(key) or {"documents": hashes, "settings": settings, "score": 0.0,
+                                                 "updated": now, "requests": 0}
+            entry["score"] = self._score(entry, now) + 1
+            entry["updated"] = now
+            entry["requests"] += 1
+            self.popularity[key] = entry
+            evicted = len(self.popularity) > MAX_TRACKED
+            if evicted:
+                ranked = sorted(self.popularity, key=lambda name: self._score(self.popularity[name], now))
+                for name in ranked[:len(self.popularity) - MAX_TRACKED]:
+                    del self.popularity[name]
+            popular = self._popular(entry["score"])
+        if popular:
+            self._save_sources(documents)
+        if popular or evicted:
+            self.prune_sources(now)
+        self._save_popularity()
+
+        episode = self._load_episode(key)
+        peak = not self.off_peak(now)
+        with self._lock:
+            if episode is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+            if peak:
+                self.peak_requests += 1
+                self.peak_hits += episode is not None
+        if episode is not None:
+            logger.info(f"Serving precomputed episode {key[:12]}")
+        return episode
+
+    def put(self, args, result, now=None):
+        """Keep a finished episode if its combination is popular"""
+        found = self.key_for(*args)
+        if found is None or result[0] is None:
+            return
+        key = found[0]
+        now = now or time.time()
+        with self._lock:
+            entry = self.popularity.get(key)
+            if entry is None or not self._popular(self._score(entry, now)):
+                return
+            entry.pop("failed", None)
+        try:
+            episode = {"audio": result[0], "transcript": result[1], "created": now}
+            _write_text(self._episode_path(key), json.dumps(episode))
+        except OSError as e:
+            logger.warning(f"Could not keep episode {key[:12]}: {e}")
+            return
+        self.prune(now)
+
+    def prune(self, now=None):
+        """Drop the least popular episodes beyond ``max_episodes``; their audio stays in the audio store"""
+        now = now or time.time()
+        try:
+            keys = [path.stem for path in (self.root / "episodes").glob("*.json")]
+        except OSError:
+            return
+        if len(keys) <= self.max_episodes:
+            return
+        with self._lock:
+            ranked = sorted(keys, key=lambda key: -self._score(self.popularity[key], now)
+                            if key in self.popularity else 0.0)
+        for key in ranked[self.max_episodes:]:
+            try:
+                self._episode_path(key).unlink()
+            except OSError:
+                pass
+
+    def candidates(self, now=None):
+        """Popular combinations without an episode, most requested first"""
+        now = now or time.time()
+        with self._lock:
+            ranked = sorted(
+                ((self._score(entry, now), key, entry) for key, entry in self.popularity.items()),
+                key=lambda item: item[0], reverse=True
+            )
+        for score, key, entry in ranked:
+            if not self._popular(score):
+                break
+            if now - entry.get("failed", 0) < RETRY_AFTER or self._episode_path(key).exists():
+                continue
+            if all(self._source_path(digest).exists() for digest in entry["documents"]):
+                yield key, entry
+
+    def _idle(self):
+        stats = self.jobs.scheduler.stats()
+        return stats["queued"] == 0 and stats["running"] == 0
+
+    def run_once(self, now=None):
+        """Render the most popular missing episode if this is an idle off-peak moment; returns its key"""
+        if not self.off_peak(now) or not self._idle():
+            return None
+        candidate = next(self.candidates(now), None)
+        if candidate is None:
+            return None
+        key, entry = candidate
+        settings = entry["settings"]
+        pdfs = [self._source_path(digest).read_bytes() for digest in entry["documents"]]
+        args = (pdfs, "") + tuple(settings[name] for name in SETTINGS)
+        logger.info(f"Pre-generating episode {key[:12]} ({settings['tone']}, {settings['length']}, "
+                    f"{settings['language']})")
+        job = self.jobs.submit(self.render, *args, user=PREGEN_USER)
+        audio, transcript = job.future.result()
+        if audio:
+            self.put(args, (audio, transcript), now)
+            with self._lock:
+                self.pregenerated += 1
+        else:
+            logger.warning(f"Pre-generation of {key[:12]} failed: {transcript}")
+            with self._lock:
+                entry["failed"] = now or time.time()
+            self._save_popularity()
+        return key
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Pre-generation failed: {e}")
+
+    def start(self, jobs, render):
+        """Render through ``jobs`` with ``render`` (the uncached conversion); the thread only runs when enabled"""
+        self.jobs = jobs
+        self.render = render
+        if self.enabled and self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="pregeneration", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "requests": total,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "peak_hit_rate": self.peak_hits / self.peak_requests if self.peak_requests else 0.0,
+                "pregenerated": self.pregenerated,
+                "tracked": len(self.popularity),
+            }
@@ -0,0 +1,310 @@
+import cProfile
+import hmac
+import io
+import json
+import logging
+import os
+import pstats
+import re
+import shutil
+import sys
+import threading
+import time
+import tracemalloc
+import zipfile
+from collections import Counter
+from pathlib import Path
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse, Response
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ALL = os.environ.get("PODKAAST_PROFILE", "").lower() in ("1", "true", "yes", "on")
+DEFAULT_PROFILE_DIR = Path(os.environ.get("PODKAAST_CACHE_DIR", Path.home() / ".cache" / "podkaast")) / "profiles"
+PROFILES_KEPT = int(os.environ.get("PODKAAST_PROFILES_KEPT", "50"))
+ADMIN_TOKEN = os.environ.get("PODKAAST_ADMIN_TOKEN", "")
+ADMIN_ROUTE = "/podkaast/admin"
+SAMPLE_INTERVAL = 0.005
+TRACEMALLOC_FRAMES = 10
+TOP_ENTRIES = 30
+
+_PROFILE_NAME = re.compile(r"^[0-9A-Za-z_-]{1,64}$")
+_ARTIFACT_NAME = re.compile(r"^[0-9A-Za-z_.-]{1,128}$")
+_IGNORED_ALLOCATIONS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+)
+
+_tracing = 0
+_tracing_lock = threading.Lock()
+
+
+def _start_tracing():
+    # tracemalloc is process-wide, so concurrent profiles share it and the last one out stops it
+    global _tracing
+    with _tracing_lock:
+        if _tracing == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            _tracing = 1
+        elif _tracing:
+            _tracing += 1
+
+
+def _stop_tracing():
+    global _tracing
+    with _tracing_lock:
+        if _tracing:
+            _tracing -= 1
+            if _tracing == 0:
+                tracemalloc.stop()
+
+
+def is_admin(request, token=None):
+    """Whether the request carries the admin token (``X-Admin-Token`` or ``Authorization: Bearer``)"""
+    token = ADMIN_TOKEN if token is None else token
+    if not token:
+        return False
+    supplied = request.headers.get("x-admin-token", "")
+    authorization = request.headers.get("authorization", "")
+    if not supplied and authorization.lower().startswith("bearer "):
+        supplied = authorization[7:].strip()
+    return hmac.compare_digest(supplied.encode(), token.encode())
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class _Sampler(threading.Thread):
+    """Samples one thread's stack every ``interval`` seconds into folded flame graph stacks"""
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        super().__init__(name="podkaast-profiler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stage = "starting"
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join([self.stage] + stack[::-1])] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+class ConversionProfile:
+    """Per-stage cProfile statistics, tracemalloc snapshots and a sampled flame graph of one conversion.
+
+    ``run`` calls the conversion with a wrapped ``report`` callback; every stage
+    change closes the current stage's artifacts and starts the next one.
+    cProfile and the sampler follow the conversion thread, so time spent
+    waiting on TTS or parser workers shows up as waits; allocations are
+    process-wide.
+    """
+
+    def __init__(self, directory, interval=SAMPLE_INTERVAL):
+        self.directory = Path(directory)
+        self.interval = interval
+        self.stages = []
+        self._stage = None
+        self._profiler = None
+        self._snapshot = None
+        self._started = None
+        self._sampler = None
+
+    def run(self, convert, *args, report=None, **kwargs):
+        report = report or (lambda stage: None)
+
+        def report_stage(stage):
+            self._end_stage()
+            self._begin_stage(stage)
+            report(stage)
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        _start_tracing()
+        self._snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORED_ALLOCATIONS)
+        self._sampler = _Sampler(threading.get_ident(), self.interval)
+        self._sampler.start()
+        started = time.time()
+        self._begin_stage("starting")
+        try:
+            return convert(*args, report=report_stage, **kwargs)
+        finally:
+            self._end_stage()
+            self._sampler.stop()
+            _stop_tracing()
+            self._write_summary(started)
+
+    def _begin_stage(self, stage):
+        self._stage = stage
+        self._started = time.perf_counter()
+        self._sampler.stage = stage
+        tracemalloc.reset_peak()
+        self._profiler = cProfile.Profile()
+        try:
+            self._profiler.enable()
+        except ValueError as e:
+            # only one cProfile can be active at a time on newer interpreters; the sampler still runs
+            logger.warning(f"cProfile unavailable for stage {stage}: {e}")
+            self._profiler = None
+
+    def _end_stage(self):
+        if self._stage is None:
+            return
+        seconds = time.perf_counter() - self._started
+        if self._profiler is not None:
+            self._profiler.disable()
+        prefix = f"{len(self.stages):02d}-{self._stage}"
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORED_ALLOCATIONS)
+        try:
+            if self._profiler is not None:
+                self._profiler.dump_stats(self.directory / f"{prefix}.pstats")
+                listing = io.StringIO()
+                pstats.Stats(self._profiler, stream=listing).sort_stats("cumulative").print_stats(TOP_ENTRIES)
+                (self.directory / f"{prefix}-calls.txt").write_text(listing.getvalue(), encoding="utf-8")
+            snapshot.dump(str(self.directory / f"{prefix}.tracemalloc"))
+            growth = snapshot.compare_to(self._snapshot, "lineno")[:TOP_ENTRIES]
+            (self.directory / f"{prefix}-allocations.txt").write_text(
+                "\n".join(str(stat) for stat in growth) + "\n", encoding="utf-8"
+            )
+        except OSError as e:
+            logger.warning(f"Could not write profile for stage {self._stage}: {e}")
+        self.stages.append({
+            "stage": self._stage,
+            "seconds": round(seconds, 4),
+            "traced_bytes": current,
+            "peak_traced_bytes": peak,
+        })
+        self._snapshot = snapshot
+        self._stage = None
+        self._profiler = None
+
+    def _write_summary(self, started):
+        folded = "".join(f"{stack} {count}\n" for stack, count in self._sampler.stacks.most_common())
+        summary = {
+            "started": started,
+            "seconds": round(time.time() - started, 4),
+            "sample_interval": self.interval,
+            "samples": sum(self._sampler.stacks.values()),
+            "stages": self.stages,
+        }
+        try:
+            # the folded stacks load directly into flamegraph.pl, inferno or speedscope
+            (self.directory / "flamegraph.folded").write_text(folded, encoding="utf-8")
+            (self.directory / "summary.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
+        except OSError as e:
+            logger.warning(f"Could not write profile summary: {e}")
+
+
+class ProfileStore:
+    """Profile artifacts on disk, one directory per conversion, keeping the ``keep`` newest"""
+
+    def __init__(self, root=DEFAULT_PROFILE_DIR, keep=PROFILES_KEPT, enabled=PROFILE_ALL):
+        self.root = Path(root)
+        self.keep = keep
+        self.enabled = enabled
+
+    def run(self, name, convert, *args, **kwargs):
+        if not _PROFILE_NAME.match(name):
+            raise ValueError(f"Invalid profile name {name!r}")
+        try:
+            return ConversionProfile(self.root / name).run(convert, *args, **kwargs)
+        finally:
+            self.prune()
+
+    def directory_for(self, name):
+        if not _PROFILE_NAME.match(name):
+            return None
+        directory = self.root / name
+        return directory if directory.is_dir() else None
+
+    def list(self):
+        profiles = []
+        try:
+            directories = [path for path in self.root.iterdir() if path.is_dir()]
+        except OSError:
+            return profiles
+        for directory in sorted(directories, key=lambda path: path.stat().st_mtime, reverse=True):
+            try:
+                summary = json.loads((directory / "summary.json").read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                summary = {}
+            profiles.append({
+                "name": directory.name,
+                "started": summary.get("started"),
+                "seconds": summary.get("seconds"),
+                "stages": summary.get("stages", []),
+                "artifacts": sorted(path.name for path in directory.iterdir()),
+            })
+        return profiles
+
+    def archive(self, name):
+        directory = self.directory_for(name)
+        if directory is None:
+            return None
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+            for path in sorted(directory.iterdir()):
+                archive.write(path, f"{name}/{path.name}")
+        return buffer.getvalue()
+
+    def prune(self):
+        try:
+            directories = sorted(
+                (path for path in self.root.iterdir() if path.is_dir()),
+                key=lambda path: path.stat().st_mtime,
+                reverse=True
+            )
+        except OSError:
+            return
+        for directory in directories[self.keep:]:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def router(self, token=None):
+        """Admin download routes; disabled unless an admin token is configured"""
+        router = APIRouter(prefix=ADMIN_ROUTE)
+
+        def authorize(request):
+            if not (ADMIN_TOKEN if token is None else token):
+                raise HTTPException(status_code=403, detail="Admin routes are disabled; set PODKAAST_ADMIN_TOKEN")
+            if not is_admin(request, token):
+                raise HTTPException(status_code=401, detail="Invalid admin token")
+
+        @router.get("/profiles")
+        async def list_profiles(request: Request):
+            authorize(request)
+            return {"profiles": self.list()}
+
+        @router.get("/profiles/{name}.zip")
+        async def download_profile(name: str, request: Request):
+            authorize(request)
+            data = self.archive(name)
+            if data is None:
+                raise HTTPException(status_code=404, detail="Unknown profile")
+            return Response(
+                data,
+                media_type="application/zip",
+                headers={"Content-Disposition": f'attachment; filename="{name}.zip"'}
+            )
+
+        @router.get("/profiles/{name}/{artifact}")
+        async def download_artifact(name: str, artifact: str, request: Request):
+            authorize(request)
+            directory = self.directory_for(name)
+            if directory is None or not _ARTIFACT_NAME.match(artifact) or not (directory / artifact).is_file():
+                raise HTTPException(status_code=404, detail="Unknown artifact")
+            return FileResponse(directory / artifact, filename=artifact)
+
+        return router
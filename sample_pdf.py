@@ -0,0 +1,68 @@
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_text_pdf(pages, outline=None):
+    """Build a small valid PDF with one text block per page.
+
+    ``pages`` is a list of page texts (lines separated by newlines) and
+    ``outline`` an optional list of ``(title, page_index)`` bookmarks. Used by
+    the tests and the load-test harness so they need no fixture files.
+    """
+    objects = {}
+    page_ids = []
+    font_id = 3
+    next_id = 4
+
+    objects[font_id] = b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+
+    for text in pages:
+        lines = text.split("\n")
+        content = "BT /F1 11 Tf 14 TL 56 780 Td " + " ".join(f"({_escape(line)}) '" for line in lines) + " ET"
+        content_bytes = content.encode("latin-1", errors="replace")
+
+        content_id, page_id = next_id, next_id + 1
+        next_id += 2
+        objects[content_id] = b"<< /Length %d >>\nstream\n" % len(content_bytes) + content_bytes + b"\nendstream"
+        objects[page_id] = (
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (font_id, content_id)
+        )
+        page_ids.append(page_id)
+
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[2] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    catalog = b"<< /Type /Catalog /Pages 2 0 R"
+    if outline:
+        outline_id = next_id
+        item_ids = list(range(outline_id + 1, outline_id + 1 + len(outline)))
+        next_id = item_ids[-1] + 1
+        for index, (title, page_index) in enumerate(outline):
+            item = b"<< /Title (%s) /Parent %d 0 R /Dest [%d 0 R /Fit]" % (
+                _escape(title).encode("latin-1", errors="replace"), outline_id, page_ids[page_index]
+            )
+            if index > 0:
+                item += b" /Prev %d 0 R" % item_ids[index - 1]
+            if index < len(item_ids) - 1:
+                item += b" /Next %d 0 R" % item_ids[index + 1]
+            objects[item_ids[index]] = item + b" >>"
+        objects[outline_id] = b"<< /Type /Outlines /First %d 0 R /Last %d 0 R /Count %d >>" % (
+            item_ids[0], item_ids[-1], len(item_ids)
+        )
+        catalog += b" /Outlines %d 0 R" % outline_id
+    objects[1] = catalog + b" >>"
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for number in sorted(objects):
+        offsets[number] = len(output)
+        output += b"%d 0 obj\n" % number + objects[number] + b"\nendobj\n"
+
+    size = max(objects) + 1
+    startxref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % size
+    for number in range(1, size):
+        output += b"%010d 00000 n \n" % offsets.get(number, 0)
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, startxref)
+    return bytes(output)
@@ -0,0 +1,189 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+RATE_PER_MINUTE = float(os.environ.get("PODKAAST_RATE_PER_MINUTE", "6"))
+RATE_BURST = float(os.environ.get("PODKAAST_RATE_BURST", "10"))
+USER_SHARE = float(os.environ.get("PODKAAST_USER_SHARE", "0.5"))
+AGING_SECONDS = 60.0
+MAX_IDLE_USERS = 10000
+
+
+class RateLimited(Exception):
+    def __init__(self, user, retry_after):
+        super().__init__(f"Rate limit exceeded, retry in {retry_after:.0f}s")
+        self.user = user
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, amount=1.0):
+        """Spend tokens and return 0, or return the seconds until they are available"""
+        now = time.monotonic()
+        self._refill(now)
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return 0.0
+        return (amount - self.tokens) / self.rate if self.rate > 0 else float("inf")
+
+    def full(self):
+        self._refill(time.monotonic())
+        return self.tokens >= self.capacity
+
+
+class _Task:
+    __slots__ = ("fn", "cost", "future", "queued")
+
+    def __init__(self, fn, cost):
+        self.fn = fn
+        self.cost = cost
+        self.future = Future()
+        self.queued = time.monotonic()
+
+
+class _UserQueue:
+    __slots__ = ("tasks", "running", "finish", "weight", "bucket")
+
+    def __init__(self, weight, bucket):
+        self.tasks = []
+        self.running = 0
+        self.finish = 0.0
+        self.weight = weight
+        self.bucket = bucket
+
+
+class FairScheduler:
+    """Weighted fair queuing over per-user queues feeding a fixed worker pool.
+
+    Each user's next task is its cheapest one (aged so large jobs still run),
+    and users are served in order of virtual finish time, so a small job from a
+    light user overtakes a backlog of large ones. Submissions are rate limited
+    per user with a token bucket, and no user holds more than ``user_share`` of
+    the workers at once.
+    """
+
+    def __init__(self, max_workers, user_share=USER_SHARE, rate_per_minute=RATE_PER_MINUTE, burst=RATE_BURST):
+        self.max_workers = max_workers
+        self.user_cap = max(1, int(max_workers * user_share))
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.weights = {}
+        self._users = {}
+        self._virtual_time = 0.0
+        self._cond = threading.Condition()
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"conversion-{index}", daemon=True)
+            for index in range(max_workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def set_weight(self, user, weight):
+        with self._cond:
+            self.weights[user] = weight
+            if user in self._users:
+                self._users[user].weight = weight
+
+    def _user(self, user):
+        queue = self._users.get(user)
+        if queue is None:
+            if len(self._users) > MAX_IDLE_USERS:
+                self._prune()
+            queue = _UserQueue(self.weights.get(user, 1.0), TokenBucket(self.rate, self.burst))
+            self._users[user] = queue
+        return queue
+
+    def _prune(self):
+        for user, queue in list(self._users.items()):
+            if not queue.tasks and not queue.running and queue.bucket.full():
+                del self._users[user]
+
+    def admit(self, user):
+        """Charge ``user`` one submission without queueing anything; raises RateLimited"""
+        with self._cond:
+            retry_after = self._user(user).bucket.take()
+        if retry_after:
+            raise RateLimited(user, retry_after)
+
+    def submit(self, user, cost, fn, admitted=False):
+        """Queue ``fn`` for ``user`` and return a Future; raises RateLimited unless already ``admitted``"""
+        with self._cond:
+            queue = self._user(user)
+            retry_after = 0.0 if admitted else queue.bucket.take()
+            if retry_after:
+                raise RateLimited(user, retry_after)
+
+            task = _Task(fn, max(cost, 0.01))
+            queue.tasks.append(task)
+            self._cond.notify()
+            return task.future
+
+    def _head(self, queue, now):
+        return min(queue.tasks, key=lambda task: task.cost / (1.0 + (now - task.queued) / AGING_SECONDS))
+
+    def _next_task(self):
+        now = time.monotonic()
+        best = None
+        for user, queue in self._users.items():
+            if not queue.tasks or queue.running >= self.user_cap:
+                continue
+            task = self._head(queue, now)
+            start = max(self._virtual_time, queue.finish)
+            finish = start + task.cost / queue.weight
+            if best is None or finish < best[0]:
+                best = (finish, start, queue, task)
+
+        if best is None:
+            return None
+        finish, start, queue, task = best
+        queue.tasks.remove(task)
+        queue.finish = finish
+        queue.running += 1
+        self._virtual_time = start
+        return queue, task
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                picked = self._next_task()
+                while picked is None:
+                    self._cond.wait()
+                    picked = self._next_task()
+            queue, task = picked
+
+            try:
+                if task.future.set_running_or_notify_cancel():
+                    try:
+                        task.future.set_result(task.fn())
+                    except BaseException as e:
+                        task.future.set_exception(e)
+            finally:
+                with self._cond:
+                    queue.running -= 1
+                    self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "workers": self.max_workers,
+                "user_cap": self.user_cap,
+                "queued": sum(len(queue.tasks) for queue in self._users.values()),
+                "running": sum(queue.running for queue in self._users.values()),
+                "users": len(self._users),
+            }
@@ -0,0 +1,425 @@
+import hashlib
+import json
+import logging
+import os
+import queue
+import tempfile
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+import requests
+
+from cache import LRUCache
+from cancellation import check
+
+logger = logging.getLogger(__name__)
+
+SCRIPT_BACKEND = os.environ.get("PODKAAST_SCRIPT_BACKEND", "template")
+LLM_URL = os.environ.get("PODKAAST_LLM_URL", "http://127.0.0.1:8080/v1")
+LLM_MODEL = os.environ.get("PODKAAST_LLM_MODEL", "local")
+GEMINI_MODEL = os.environ.get("PODKAAST_GEMINI_MODEL", "gemini-1.5-flash")
+LLM_MAX_TOKENS = 512
+LLM_TIMEOUT = (5, 120)
+BATCH_SIZE = int(os.environ.get("PODKAAST_LLM_BATCH", "8"))
+BATCH_WINDOW = 0.02
+DEFAULT_SCRIPT_DIR = Path(os.environ.get("PODKAAST_CACHE_DIR", Path.home() / ".cache" / "podkaast")) / "scripts"
+POLL_INTERVAL = 0.25
+# written texts are capped on disk like saved page indexes; the least recently used go first
+MAX_SCRIPT_CACHE_BYTES = int(float(os.environ.get("PODKAAST_SCRIPT_CACHE_MB", "100")) * 1024 * 1024)
+MAX_SCRIPT_CACHE_AGE = float(os.environ.get("PODKAAST_SCRIPT_CACHE_DAYS", "30")) * 86400
+# an episode stores many texts at once, so the disk is scanned at most this often
+PRUNE_INTERVAL = 60
+# sizes of the most recent backend batches, to tune BATCH_SIZE and BATCH_WINDOW against
+BATCHES_KEPT = 256
+
+SECTION_PROMPT = """You are writing one section of a {tone} podcast episode, in {language}.{focus}
+Rewrite the passage below as spoken narration of about {chars} characters.
+Use plain paragraphs separated by blank lines, with no headings, lists or speaker names.
+
+Passage:
+{passage}
+
+Narration:"""
+
+
+class WriterError(Exception):
+    pass
+
+
+def section_prompt(passage, tone, language, chars, question=None):
+    focus = f" Focus on: {question}." if question else ""
+    return SECTION_PROMPT.format(tone=tone.lower(), language=language, focus=focus, chars=chars, passage=passage)
+
+
+class ScriptWriter:
+    """Backend interface: write texts for a batch of prompts, streamed piece by piece.
+
+    ``stream_batch`` yields ``(prompt_index, text)`` pieces in arrival order;
+    pieces of different prompts may interleave. ``model_id`` is part of the
+    cache key, so changing model or settings never serves stale scripts.
+    """
+
+    model_id = "base"
+
+    def stream_batch(self, prompts, token=None):
+        raise NotImplementedError
+
+
+class LocalModelWriter(ScriptWriter):
+    """OpenAI-compatible ``/completions`` server (llama.cpp, vLLM, TGI and similar).
+
+    A whole batch goes out as one request with a list of prompts; the server
+    streams choices tagged with the prompt index.
+    """
+
+    def __init__(self, url=LLM_URL, model=LLM_MODEL, max_tokens=LLM_MAX_TOKENS, temperature=0.7, timeout=LLM_TIMEOUT):
+        self.url = url.rstrip("/") + "/completions"
+        self.model = model
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.timeout = timeout
+        self.model_id = f"local:{model}:{max_tokens}:{temperature}"
+        self.session = requests.Session()
+
+    def stream_batch(self, prompts, token=None):
+        payload = {
+            "model": self.model,
+            "prompt": prompts,
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+            "stream": True,
+        }
+        try:
+            with self.session.post(self.url, json=payload, stream=True, timeout=self.timeout) as response:
+                if response.status_code != 200:
+                    raise WriterError(f"Model server answered {response.status_code}")
+                for line in response.iter_lines(decode_unicode=True):
+                    check(token)
+                    if not line or not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    for choice in json.loads(data).get("choices", []):
+                        if choice.get("text"):
+                            yield choice.get("index", 0), choice["text"]
+        except (requests.RequestException, ValueError) as e:
+            raise WriterError(f"Model server failed: {e}")
+
+
+class GeminiWriter(ScriptWriter):
+    """google-generativeai backend; the prompts of a batch stream concurrently"""
+
+    def __init__(self, model=GEMINI_MODEL, api_key=None):
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key or os.environ.get("GOOGLE_API_KEY"))
+        self.model = genai.GenerativeModel(model)
+        self.model_id = f"gemini:{model}"
+
+    def stream_batch(self, prompts, token=None):
+        pieces = queue.Queue()
+
+        def generate(index, prompt):
+            try:
+                for chunk in self.model.generate_content(prompt, stream=True):
+                    if token is not None and token.cancelled:
+                        break
+                    pieces.put((index, chunk.text))
+                pieces.put((index, None))
+            except Exception as e:
+                pieces.put((index, WriterError(f"Gemini failed: {e}")))
+
+        for index, prompt in enumerate(prompts):
+            threading.Thread(target=generate, args=(index, prompt), daemon=True).start()
+
+        remaining = len(prompts)
+        while remaining:
+            check(token)
+            try:
+                index, piece = pieces.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            if isinstance(piece, WriterError):
+                raise piece
+            if piece is None:
+                remaining -= 1
+            else:
+                yield index, piece
+
+
+class PromptCache:
+    """Finished texts keyed on a hash of model and prompt, in memory and on disk.
+
+    Texts unused for ``max_age`` seconds, and the least recently used beyond
+    ``max_bytes`` on disk, are deleted as new ones are stored.
+    """
+
+    def __init__(self, root=DEFAULT_SCRIPT_DIR, max_entries=256, max_bytes=MAX_SCRIPT_CACHE_BYTES,
+                 max_age=MAX_SCRIPT_CACHE_AGE):
+        self.root = Path(root)
+        self.memory = LRUCache(max_entries)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._pruned = 0.0
+
+    @staticmethod
+    def key(model_id, prompt):
+        return hashlib.sha256(f"{model_id}\0{prompt}".encode("utf-8")).hexdigest()
+
+    def path_for(self, key):
+        return self.root / key[:2] / f"{key}.txt"
+
+    def get(self, key):
+        text = self.memory.get(key)
+        if text is None:
+            try:
+                text = self.path_for(key).read_text(encoding="utf-8")
+            except OSError:
+                return None
+            self.memory.put(key, text)
+        try:
+            # the modification time records the last use, for pruning
+            os.utime(self.path_for(key))
+        except OSError:
+            pass
+        return text
+
+    def put(self, key, text):
+        self.memory.put(key, text)
+        path = self.path_for(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile("w", dir=path.parent, delete=False, encoding="utf-8") as tmp_file:
+                tmp_file.write(text)
+            os.replace(tmp_file.name, path)
+        except OSError as e:
+            logger.warning(f"Could not store script text: {e}")
+            return
+        if time.time() - self._pruned >= PRUNE_INTERVAL:
+            self.prune()
+
+    def prune(self, now=None):
+        """Delete expired texts, then the least recently used until the rest fit in ``max_bytes``"""
+        now = now or time.time()
+        self._pruned = now
+        entries = []
+        try:
+            for path in self.root.glob("*/*.txt"):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        except OSError:
+            return
+        entries.sort(key=lambda entry: entry[0], reverse=True)
+        total = 0
+        for used, size, path in entries:
+            total += size
+            if now - used <= self.max_age and total <= self.max_bytes:
+                continue
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            total -= size
+
+
+class _Pending:
+    __slots__ = ("key", "prompt", "pieces", "listeners")
+
+    def __init__(self, key, prompt):
+        self.key = key
+        self.prompt = prompt
+        self.pieces = []
+        self.listeners = []
+
+
+class WriterService:
+    """Cache, micro-batching and streaming in front of a ScriptWriter backend.
+
+    Prompts from all requests wait up to ``window`` seconds to be sent
+    together, at most ``max_batch`` per backend call, and identical prompts
+    in flight are written once. ``stream`` hands each caller the pieces of
+    its own prompts as they arrive.
+    """
+
+    def __init__(self, backend, cache=None, max_batch=BATCH_SIZE, window=BATCH_WINDOW, concurrency=2):
+        self.backend = backend
+        self.cache = cache or PromptCache()
+        self.max_batch = max_batch
+        self.window = window
+        self.batches = deque(maxlen=BATCHES_KEPT)
+        self._queue = []
+        self._inflight = {}
+        self._cond = threading.Condition()
+        for index in range(concurrency):
+            threading.Thread(target=self._dispatch, name=f"script-writer-{index}", daemon=True).start()
+
+    def _subscribe(self, key, prompt, events, index):
+        with self._cond:
+            pending = self._inflight.get(key)
+            if pending is None:
+                pending = self._inflight[key] = _Pending(key, prompt)
+                self._queue.append(pending)
+                self._cond.notify()
+            pending.listeners.append((events, index))
+            for piece in pending.pieces:
+                events.put(("piece", index, piece))
+        return pending
+
+    def _unsubscribe(self, pendings, events):
+        with self._cond:
+            for pending in pendings:
+                pending.listeners = [listener for listener in pending.listeners if listener[0] is not events]
+                # nobody waits for a prompt that has not been sent yet, so it is not sent at all
+                if not pending.listeners and pending in self._queue:
+                    self._queue.remove(pending)
+                    del self._inflight[pending.key]
+
+    def stream(self, prompts, token=None):
+        """Yield ``(index, text, finished)`` per prompt as it is written.
+
+        Cached prompts arrive as one finished piece. A prompt the backend
+        failed on ends with ``(index, None, True)`` so the caller can fall back.
+        """
+        events = queue.Queue()
+        cached = []
+        remaining = set()
+        pendings = []
+        try:
+            for index, prompt in enumerate(prompts):
+                key = self.cache.key(self.backend.model_id, prompt)
+                text = self.cache.get(key)
+                if text is not None:
+                    cached.append((index, text, True))
+                else:
+                    remaining.add(index)
+                    pendings.append(self._subscribe(key, prompt, events, index))
+
+            yield from cached
+            while remaining:
+                check(token)
+                try:
+                    kind, index, piece = events.get(timeout=POLL_INTERVAL)
+                except queue.Empty:
+                    continue
+                if kind == "piece":
+                    yield index, piece, False
+                else:
+                    remaining.discard(index)
+                    yield index, None if kind == "failed" else "", True
+        finally:
+            # a cancelled or abandoned stream stops receiving pieces
+            self._unsubscribe(pendings, events)
+
+    def complete(self, prompts, token=None):
+        """Whole texts in prompt order, None where the backend failed"""
+        texts = [""] * len(prompts)
+        for index, piece, _ in self.stream(prompts, token):
+            if piece is None:
+                texts[index] = None
+            elif texts[index] is not None:
+                texts[index] += piece
+        return texts
+
+    def _next_batch(self):
+        with self._cond:
+            # another dispatcher may take the queue while this one waits out the window
+            while True:
+                while not self._queue:
+                    self._cond.wait()
+                deadline = time.monotonic() + self.window
+                while self._queue and len(self._queue) < self.max_batch and time.monotonic() < deadline:
+                    self._cond.wait(deadline - time.monotonic())
+                if self._queue:
+                    batch, self._queue = self._queue[:self.max_batch], self._queue[self.max_batch:]
+                    return batch
+
+    def _dispatch(self):
+        while True:
+            batch = self._next_batch()
+            self.batches.append(len(batch))
+            failed = False
+            try:
+                for index, piece in self.backend.stream_batch([pending.prompt for pending in batch]):
+                    with self._cond:
+                        pending = batch[index]
+                        pending.pieces.append(piece)
+                        listeners = list(pending.listeners)
+                    for events, listener_index in listeners:
+                        events.put(("piece", listener_index, piece))
+            except Exception as e:
+                logger.error(f"Script writer batch of {len(batch)} failed: {e}")
+                failed = True
+
+            for pending in batch:
+                with self._cond:
+                    del self._inflight[pending.key]
+                    listeners = list(pending.listeners)
+                text = "".join(pending.pieces)
+                if not failed and text.strip():
+                    self.cache.put(pending.key, text)
+                for events, listener_index in listeners:
+                    events.put(("failed" if failed or not text.strip() else "done", listener_index, None))
+
+
+def stream_paragraphs(pieces, count, fallbacks=None):
+    """Turn interleaved ``(index, text, finished)`` pieces into paragraphs in prompt order.
+
+    A paragraph is yielded as soon as it is complete and every earlier
+    prompt has finished, so speech can start before the rest is written.
+    Failed prompts yield their ``fallbacks`` entry instead.
+    """
+    buffers = [""] * count
+    finished = [False] * count
+    failed = [False] * count
+    fallbacks = fallbacks or [None] * count
+    current = 0
+
+    def flush():
+        nonlocal current
+        while current < count:
+            if failed[current]:
+                if fallbacks[current]:
+                    yield fallbacks[current]
+                current += 1
+                continue
+            *complete, rest = buffers[current].split("\n\n")
+            for paragraph in complete:
+                if paragraph.strip():
+                    yield " ".join(paragraph.split())
+            buffers[current] = rest
+            if not finished[current]:
+                return
+            if rest.strip():
+                yield " ".join(rest.split())
+            current += 1
+
+    for index, piece, done in pieces:
+        if piece is None:
+            failed[index] = True
+        else:
+            buffers[index] += piece
+        finished[index] = finished[index] or done
+        yield from flush()
+
+    # every prompt has reported by now; release whatever is still buffered
+    for index in range(count):
+        finished[index] = True
+    yield from flush()
+
+
+def create_writer(backend=SCRIPT_BACKEND):
+    """WriterService for ``PODKAAST_SCRIPT_BACKEND`` (``local`` or ``gemini``), or None for template scripts"""
+    try:
+        if backend == "local":
+            return WriterService(LocalModelWriter())
+        if backend == "gemini":
+            return WriterService(GeminiWriter())
+    except Exception as e:
+        logger.warning(f"Script writer backend {backend!r} unavailable, using templates: {e}")
+    return None
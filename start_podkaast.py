@@ -40,7 +40,7 @@ def start_application():
         print("\n🚀 Starting PDF2Podcast Application...")
         print("=" * 50)
         
-        from podkaast_app import demo
+        from podkaast_app import launch_app
         
         print("✅ Application loaded successfully!")
         print("✅ Interface components ready!")
@@ -50,9 +50,8 @@ def start_application():
         print("📱 The app will open in your browser")
         print("🌐 You'll also get a public shareable link")
         
-        demo.launch(
+        launch_app(
             share=True, 
-            debug=False,
             show_error=True
         )
         
@@ -0,0 +1,230 @@
+import logging
+import re
+from array import array
+from itertools import repeat
+
+import numpy as np
+
+from document import Document
+from languages import DEFAULT_LANGUAGE, get_language
+
+logger = logging.getLogger(__name__)
+
+# CJK ideographs and kana count as one token each, everything else by word
+_CJK = "぀-ヿ㐀-䶿一-鿿豈-﫿"
+TOKEN = re.compile(rf"[{_CJK}]|[^\W{_CJK}]+")
+# a batch of sentences is tokenized as one string, joined by NUL, which comes back as a break marker
+_BREAK = "\0"
+_TOKEN_OR_BREAK = re.compile(rf"\0|[{_CJK}]|[^\W{_CJK}]+")
+# for ASCII text \w is [a-z0-9_] once lowercased: a byte table blanks everything else, so str.split
+# gives the same tokens as TOKEN without running the regex engine over every character
+_ASCII_WORDS = bytes(
+    code + 32 if 65 <= code <= 90 else code if chr(code).isalnum() or code in (0, 95) else 32
+    for code in range(256)
+)
+
+MIN_SENTENCE_TOKENS = 4
+DAMPING = 0.85
+MAX_ITERATIONS = 30
+TOLERANCE = 1e-6
+QUERY_WEIGHT = 0.5
+# sentences below this fraction of the mean score are off-topic filler, even if they fit
+RELEVANCE_FLOOR = 0.5
+
+LENGTH_MINUTES = {"Short (1-2 min)": 1.5, "Medium (3-5 min)": 4.0}
+BODY_SHARE = 0.6
+
+
+def speech_budget(length, language=DEFAULT_LANGUAGE, share=BODY_SHARE):
+    """Characters of document text that fit the chosen episode length"""
+    minutes = LENGTH_MINUTES.get(length, LENGTH_MINUTES["Medium (3-5 min)"])
+    return int(minutes * get_language(language).chars_per_minute * share)
+
+
+class Summarizer:
+    """Extractive summarizer: TF-IDF sentence vectors ranked by TextRank.
+
+    Sentences are tokenized as text arrives (``add_text`` per page), so the
+    term buffers grow incrementally and ranking only does array work. Sentence
+    text stays in a ``Document`` buffer and only the chosen ones are decoded. The
+    sentence similarity graph is never materialized: with unit-length TF-IDF
+    rows X, one TextRank step needs (X Xᵀ - I) v, computed as two sparse
+    products with ``np.bincount``.
+    """
+
+    def __init__(self, language=DEFAULT_LANGUAGE, document=None):
+        self.document = document or Document(language)
+        self.resources = get_language(self.document.language)
+        self.vocabulary = {}
+        self._rows = array("q")
+        self._lengths = array("q")
+        self._terms = array("q")
+        self._offsets = array("q", [0])
+        self._index(0, len(self.document.sentences))
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _index(self, first, last):
+        """Tokenize sentences ``first`` to ``last`` as one batch and append their term ids"""
+        if first >= last:
+            return
+        table = self.document.sentences
+        buffer = self.document.buffer
+        starts = np.frombuffer(table.starts[first:last], dtype=np.uint32).astype(np.int64)
+        ends = np.frombuffer(table.ends[first:last], dtype=np.uint32).astype(np.int64)
+        region = buffer[starts[0]:ends[-1]]
+        if region.isascii() and (starts[1:] > ends[:-1]).all():
+            # whitespace separates the sentences, so a NUL over the first byte of each gap splits them in place
+            marked = bytearray(region)
+            np.frombuffer(marked, dtype=np.uint8)[ends[:-1] - starts[0]] = 0
+            tokens = marked.translate(_ASCII_WORDS).replace(b"\0", b" \0 ").decode("ascii").split()
+            lengths = ends - starts
+        else:
+            raw = b"\0".join(buffer[start:end] for start, end in zip(starts.tolist(), ends.tolist()))
+            tokens = _TOKEN_OR_BREAK.findall(raw.decode("utf-8").lower())
+            # characters per sentence: the bytes that do not continue a UTF-8 character, between breaks
+            data = np.frombuffer(raw, dtype=np.uint8)
+            heads = np.concatenate(([0], np.flatnonzero(data == 0) + 1))
+            lengths = np.add.reduceat(((data & 0xC0) != 0x80).astype(np.int64), heads)
+            lengths[:-1] -= 1
+
+        vocabulary = self.vocabulary
+        ids = np.fromiter(map(vocabulary.get, tokens, repeat(-1)), dtype=np.int64, count=len(tokens))
+        breaks = ids < 0
+        if breaks.sum() != last - first - 1:
+            # words not seen before miss the lookup too; only these take the slow path
+            unseen = [position for position in np.flatnonzero(breaks).tolist() if tokens[position] != _BREAK]
+            breaks[unseen] = False
+            if breaks.sum() != last - first - 1:
+                # the text itself holds NULs, so the breaks cannot be trusted
+                for index in range(first, last):
+                    self._index_sentence(index)
+                return
+        else:
+            unseen = []
+
+        sentence = np.cumsum(breaks)
+        owner = sentence[~breaks]
+        counts = np.bincount(owner, minlength=last - first)
+        keep = counts >= MIN_SENTENCE_TOKENS
+        for position in unseen:
+            if keep[sentence[position]]:
+                ids[position] = vocabulary.setdefault(tokens[position], len(vocabulary))
+        self._terms.frombytes(ids[~breaks][keep[owner]].tobytes())
+        self._offsets.frombytes((self._offsets[-1] + np.cumsum(counts[keep])).tobytes())
+        self._rows.frombytes((first + np.flatnonzero(keep)).tobytes())
+        self._lengths.frombytes(lengths[keep].tobytes())
+
+    def _index_sentence(self, index):
+        table = self.document.sentences
+        text = self.document.buffer[table.starts[index]:table.ends[index]].decode("utf-8")
+        tokens = TOKEN.findall(text.lower())
+        if len(tokens) < MIN_SENTENCE_TOKENS:
+            return
+        self._lengths.append(len(text))
+        self._terms.extend([self.vocabulary.setdefault(token, len(self.vocabulary)) for token in tokens])
+        self._offsets.append(len(self._terms))
+        self._rows.append(index)
+
+    def add_text(self, text):
+        self._index(*self.document.add_page(text))
+
+    add_page = add_text
+
+    def sentence(self, row):
+        return " ".join(self.document.sentences[self._rows[row]].text.split())
+
+    def _matrix(self):
+        """Sparse, L2-normalized TF-IDF rows as (row, term, weight) triplets"""
+        count = len(self._rows)
+        vocabulary_size = len(self.vocabulary)
+        terms = np.array(self._terms, dtype=np.int64)
+        rows = np.repeat(np.arange(count, dtype=np.int64), np.diff(np.array(self._offsets, dtype=np.int64)))
+
+        pairs, frequencies = np.unique(rows * vocabulary_size + terms, return_counts=True)
+        rows, terms = np.divmod(pairs, vocabulary_size)
+
+        document_frequency = np.bincount(terms, minlength=vocabulary_size)
+        idf = np.log((1.0 + count) / (1.0 + document_frequency)) + 1.0
+        weights = (1.0 + np.log(frequencies)) * idf[terms]
+        weights /= np.sqrt(np.bincount(rows, weights=weights * weights, minlength=count))[rows]
+        return rows, terms, weights
+
+    def _query_prior(self, query, rows, terms, weights):
+        count = len(self._rows)
+        query_terms = [self.vocabulary[token] for token in TOKEN.findall((query or "").lower()) if token in self.vocabulary]
+        uniform = np.full(count, 1.0 / count)
+        if not query_terms:
+            return uniform
+
+        matches = np.isin(terms, query_terms)
+        relevance = np.bincount(rows[matches], weights=weights[matches], minlength=count)
+        if not relevance.any():
+            return uniform
+        return (1.0 - QUERY_WEIGHT) * uniform + QUERY_WEIGHT * relevance / relevance.sum()
+
+    def rank(self, query=None):
+        """TextRank score per sentence; ``query`` biases the teleport step toward matching sentences"""
+        count = len(self._rows)
+        if count == 0:
+            return np.zeros(0)
+
+        rows, terms, weights = self._matrix()
+        vocabulary_size = len(self.vocabulary)
+
+        def similarity(vector):
+            # (X Xᵀ - I) vector, the diagonal being each row's unit self-similarity
+            projected = np.bincount(terms, weights=weights * vector[rows], minlength=vocabulary_size)
+            return np.bincount(rows, weights=weights * projected[terms], minlength=count) - vector
+
+        degree = similarity(np.ones(count))
+        degree[degree <= 1e-12] = 1.0
+        prior = self._query_prior(query, rows, terms, weights)
+
+        scores = np.full(count, 1.0 / count)
+        for _ in range(MAX_ITERATIONS):
+            updated = (1.0 - DAMPING) * prior + DAMPING * similarity(scores / degree)
+            converged = np.abs(updated - scores).sum() < TOLERANCE
+            scores = updated
+            if converged:
+                break
+        return scores
+
+    def _pick(self, order, scores, budget):
+        chosen = []
+        used = 0
+        joiner = len(self.resources.joiner)
+        floor = RELEVANCE_FLOOR * scores.mean()
+        for index in order:
+            if scores[index] < floor:
+                break
+            size = self._lengths[index] + joiner
+            if used + size <= budget:
+                chosen.append(index)
+                used += size
+            if budget - used <= joiner:
+                break
+        return chosen
+
+    def summarize(self, budget, query=None, key_points=0):
+        """Top sentences within ``budget`` characters, in document order.
+
+        Returns ``(summary, points)`` where ``points`` are the ``key_points``
+        highest-ranked sentences, best first, for a recap.
+        """
+        scores = self.rank(query)
+        if not len(scores):
+            return "", []
+
+        order = np.argsort(-scores, kind="stable")
+        chosen = sorted(self._pick(order, scores, budget))
+        summary = self.resources.join_sentences([self.sentence(index) for index in chosen])
+        points = [self.sentence(index) for index in order[:key_points]]
+        return summary, points
+
+
+def summarize_text(text, language=DEFAULT_LANGUAGE, budget=500, query=None, key_points=0):
+    summarizer = Summarizer(language)
+    summarizer.add_text(text)
+    return summarizer.summarize(budget, query, key_points)
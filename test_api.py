@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+import json
+import os
+import sys
+import tempfile
+import time
+import wave
+from contextlib import contextmanager
+
+from fastapi.testclient import TestClient
+
+import podkaast_app
+from audio_store import AudioStore
+from duration import DurationEstimator
+from page_index import PageIndexStore
+from phrase_memo import PhraseMemo
+from sample_pdf import make_text_pdf
+
+API = "/podkaast/api/v1"
+
+
+def fake_tts(text, language, token=None, speaker=0):
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_file:
+        path = tmp_file.name
+    with wave.open(path, "wb") as output:
+        output.setnchannels(1)
+        output.setsampwidth(2)
+        output.setframerate(8000)
+        output.writeframes(b"\x00\x01" * 400)
+    return path
+
+
+@contextmanager
+def stub_engines():
+    engines = dict(podkaast_app.TTS_ENGINES)
+    memo = podkaast_app.phrase_memo
+    estimator = podkaast_app.duration_estimator
+    index = podkaast_app.page_index
+    store_root = podkaast_app.audio_store.root
+    podkaast_app.TTS_ENGINES.update(gtts=(fake_tts, ".wav"), pyttsx3=(fake_tts, ".wav"))
+    podkaast_app.phrase_memo = PhraseMemo(tempfile.mkdtemp())
+    podkaast_app.duration_estimator = DurationEstimator(tempfile.mktemp(suffix=".json"))
+    podkaast_app.page_index = PageIndexStore(tempfile.mkdtemp())
+    # the routes hold the store instance, so redirect its directory rather than replacing it
+    podkaast_app.audio_store.root = AudioStore(tempfile.mkdtemp()).root
+    try:
+        yield
+    finally:
+        podkaast_app.TTS_ENGINES.update(engines)
+        podkaast_app.phrase_memo = memo
+        podkaast_app.duration_estimator = estimator
+        podkaast_app.page_index = index
+        podkaast_app.audio_store.root = store_root
+
+
+def wait_for(client, job_id, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = client.get(f"{API}/conversions/{job_id}").json()
+        if status["status"] in ("done", "failed"):
+            return status
+        time.sleep(0.05)
+    raise AssertionError("job did not finish")
+
+
+def test_submit_poll_and_fetch():
+    print("🧪 Testing submit → poll → ranged, content-addressed audio download...")
+    with stub_engines():
+        submit_poll_and_fetch(TestClient(podkaast_app.app))
+    print("✅ Conversion served with range support")
+
+
+def submit_poll_and_fetch(client):
+    pdf = make_text_pdf(["The REST API shares the UI pipeline and worker pool."])
+    response = client.post(
+        f"{API}/conversions",
+        files=[("files", ("doc.pdf", pdf, "application/pdf"))],
+        data={"tone": "Formal", "language": "English", "advanced_audio": "false"}
+    )
+    assert response.status_code == 202, response.text
+    job_id = response.json()["job_id"]
+
+    status = wait_for(client, job_id)
+    assert status["status"] == "done", status
+    assert "REST API shares the UI pipeline" in status["transcript"]
+
+    full = client.get(f"{API}/conversions/{job_id}/audio")
+    assert full.status_code == 200 and full.headers["accept-ranges"] == "bytes"
+
+    partial = client.get(f"{API}/conversions/{job_id}/audio", headers={"Range": "bytes=4-11"})
+    assert partial.status_code == 206
+    assert partial.content == full.content[4:12]
+    assert partial.headers["content-range"] == f"bytes 4-11/{len(full.content)}"
+
+    tail = client.get(f"{API}/conversions/{job_id}/audio", headers={"Range": "bytes=-4"})
+    assert tail.content == full.content[-4:]
+
+    bad = client.get(f"{API}/conversions/{job_id}/audio", headers={"Range": f"bytes={len(full.content)}-"})
+    assert bad.status_code == 416 and bad.headers["content-range"] == f"bytes */{len(full.content)}"
+    assert bad.headers["accept-ranges"] == "bytes" and bad.headers["etag"] == full.headers["etag"]
+    for ignored in ("bytes=0-1,4-5", "bytes=9-2", "items=0-3", "bytes=-"):
+        response = client.get(f"{API}/conversions/{job_id}/audio", headers={"Range": ignored})
+        assert response.status_code == 200 and response.content == full.content, ignored
+
+    etag = full.headers["etag"]
+    assert "immutable" in full.headers["cache-control"]
+    assert client.get(f"{API}/conversions/{job_id}/audio", headers={"If-None-Match": etag}).status_code == 304
+
+    permalink = status["audio_url"]
+    assert permalink == f"/podkaast/audio/{etag.strip(chr(34))}.wav"
+    shared = client.get(permalink)
+    assert shared.status_code == 200 and shared.content == full.content
+    assert client.head(permalink).headers["etag"] == etag
+    assert client.get("/podkaast/audio/" + "0" * 64 + ".wav").status_code == 404
+
+    assert client.delete(f"{API}/conversions/{job_id}").status_code == 409
+
+
+def test_event_stream():
+    print("\n🧪 Testing status event stream...")
+    client = TestClient(podkaast_app.app)
+
+    response = client.post(f"{API}/conversions", json={"urls": [], "upload_ids": []})
+    assert response.status_code == 422
+
+    with stub_engines():
+        job = podkaast_app.conversion_jobs.submit(
+            podkaast_app.convert_pdf_to_podcast,
+            [make_text_pdf(["Streaming status events."])], "", "", "Fun", "Short (1-2 min)", "English", False
+        )
+        with client.stream("GET", f"{API}/conversions/{job.job_id}/events") as stream:
+            events = [json.loads(line[6:]) for line in stream.iter_lines() if line.startswith("data: ")]
+
+    assert events[-1]["status"] == "done"
+    print(f"✅ Received {len(events)} status events ending in 'done'")
+
+
+def test_validation():
+    print("\n🧪 Testing request validation...")
+    client = TestClient(podkaast_app.app)
+    assert client.post(f"{API}/conversions", json={"upload_ids": ["nope"]}).status_code == 404
+    assert client.post(f"{API}/conversions", json={"urls": "https://example.com", "language": "Elvish"}).status_code == 422
+    assert client.get(f"{API}/conversions/missing").status_code == 404
+    for body in ([], "x", 3):
+        assert client.post(f"{API}/conversions", json=body).status_code == 400
+    print("✅ Invalid requests are rejected")
+
+
+def test_audio_pruning():
+    print("\n🧪 Testing audio store pruning...")
+    store = AudioStore(tempfile.mkdtemp(), max_age=3600)
+
+    def store_bytes(data):
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as tmp_file:
+            tmp_file.write(data)
+        return store.store(tmp_file.name)
+
+    old, served, new = (store_bytes(bytes([n]) * 1000) for n in range(3))
+    for path, age in ((old, 30), (served, 20), (new, 10)):
+        os.utime(path, (time.time() - age, time.time() - age))
+    assert store.resolve(os.path.basename(served)) == served
+
+    store.max_bytes = 2500
+    store.prune()
+    assert not os.path.exists(old) and os.path.exists(served) and os.path.exists(new)
+    store.prune(now=time.time() + 7200)
+    assert not os.path.exists(served) and not os.path.exists(new)
+    print("✅ Least recently served and expired audio is deleted")
+
+
+def main():
+    print("🛰️ Podkaast REST API Test")
+    print("=" * 40)
+
+    tests = [
+        ("Submit and Fetch", test_submit_poll_and_fetch),
+        ("Event Stream", test_event_stream),
+        ("Validation", test_validation),
+        ("Audio Pruning", test_audio_pruning)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            results.append((test_name, True))
+        except Exception as e:
+            print(f"❌ {test_name} test failed: {e}")
+            results.append((test_name, False))
+
+    print("\n" + "=" * 40)
+    print("📊 Test Results Summary:")
+
+    all_passed = True
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{test_name}: {status}")
+        if not result:
+            all_passed = False
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
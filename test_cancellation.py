@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+import os
+import sys
+import tempfile
+import threading
+import time
+import wave
+
+from cancellation import CancelToken, Cancelled
+from jobs import JobManager
+from phrase_memo import PhraseMemo, assemble_audio
+
+
+def slow_convert(started, report=None, token=None):
+    started.set()
+    while True:
+        token.check()
+        time.sleep(0.01)
+
+
+def test_token():
+    print("🧪 Testing cancel tokens and deadlines...")
+    token = CancelToken()
+    token.check()
+    token.cancel("stop")
+    try:
+        token.check()
+        raise AssertionError("cancelled token should raise")
+    except Cancelled as e:
+        assert e.reason == "stop"
+
+    expiring = CancelToken(deadline=0.05)
+    assert not expiring.cancelled and expiring.remaining() > 0
+    time.sleep(0.06)
+    assert expiring.cancelled and expiring.reason == "deadline exceeded"
+    print("✅ Tokens cancel explicitly and on deadline")
+
+
+def test_running_job_frees_worker():
+    print("\n🧪 Testing cancellation of a running job...")
+    jobs = JobManager(max_workers=1)
+    started = threading.Event()
+    job = jobs.submit(slow_convert, started, user="tab")
+    assert started.wait(5)
+
+    queued = jobs.submit(lambda report=None, token=None: ("audio.wav", "script"), user="other")
+    assert jobs.cancel_user("tab", "tab closed") == 1
+
+    assert job.result(timeout=2) == (None, "Cancelled: tab closed")
+    assert job.status == "cancelled" and job.error == "tab closed"
+    assert queued.result(timeout=2) == ("audio.wav", "script")
+    print("✅ Cancelled job stopped and the next one ran")
+
+
+def test_queued_job_and_deadline():
+    print("\n🧪 Testing queued cancellation and deadlines...")
+    jobs = JobManager(max_workers=1)
+    started = threading.Event()
+    blocker = jobs.submit(slow_convert, started, user="a")
+    assert started.wait(5)
+
+    waiting = jobs.submit(slow_convert, threading.Event(), user="b")
+    assert waiting.cancel("changed my mind")
+    assert waiting.status == "cancelled" and waiting.done
+    assert not waiting.cancel()
+
+    blocker.cancel()
+    limited = jobs.submit(slow_convert, threading.Event(), user="a", deadline=0.2)
+    limited.result(timeout=3)
+    assert limited.status == "cancelled" and limited.error == "deadline exceeded"
+    print("✅ Queued jobs never start and deadlines stop running ones")
+
+
+def test_audio_assembly_stops_between_segments():
+    print("\n🧪 Testing cancellation between TTS segments...")
+    token = CancelToken()
+    rendered = []
+
+    def synthesize(text):
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_file:
+            path = tmp_file.name
+        with wave.open(path, "wb") as output:
+            output.setnchannels(1)
+            output.setsampwidth(2)
+            output.setframerate(8000)
+            output.writeframes(b"\x00\x00" * 10)
+        rendered.append(path)
+        token.cancel("user left")
+        return path
+
+    segments = [("one", False), ("two", False), ("three", False)]
+    with tempfile.TemporaryDirectory() as memo_dir:
+        try:
+            assemble_audio(segments, synthesize, PhraseMemo(memo_dir), "English", "fake", "default", ".wav", token)
+            raise AssertionError("assembly should stop")
+        except Cancelled:
+            pass
+
+    assert len(rendered) == 1
+    assert not os.path.exists(rendered[0])
+    print("✅ Synthesis stopped after the current segment and scratch files were removed")
+
+
+def main():
+    print("⏹️ Podkaast Cancellation Test")
+    print("=" * 40)
+
+    tests = [
+        ("Tokens", test_token),
+        ("Running Job", test_running_job_frees_worker),
+        ("Queued Job and Deadline", test_queued_job_and_deadline),
+        ("Audio Assembly", test_audio_assembly_stops_between_segments)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            results.append((test_name, True))
+        except Exception as e:
+            print(f"❌ {test_name} test failed: {e}")
+            results.append((test_name, False))
+
+    print("\n" + "=" * 40)
+    print("📊 Test Results Summary:")
+
+    all_passed = True
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{test_name}: {status}")
+        if not result:
+            all_passed = False
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+import json
+import os
+import sys
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+
+import podkaast_app
+from chapters import ChapterCache, balance_chapters, mark_headings, split_chapters, write_playlist
+from sample_pdf import make_text_pdf
+from test_api import API, stub_engines, wait_for
+
+
+def topic(name, fact):
+    return " ".join(f"{name} note {index}: {fact}" for index in range(8))
+
+
+PAGES = [
+    topic("Orchard", "apple trees need pruning in late winter before the buds open."),
+    topic("Hives", "bees pollinate the blossoms and double the harvest in good years."),
+    topic("Harvest", "pickers fill crates at dawn while the fruit is still cool."),
+]
+OUTLINE = [("Planting the Orchard", 0), ("Keeping Bees", 1), ("Bringing in the Harvest", 2)]
+ARGS = ("", "", "Fun", "Short (1-2 min)", "English", False, "Monologue", "", "Chapters")
+
+
+class counting_engines:
+    """stub_engines that also records every text sent to synthesis"""
+
+    def __enter__(self):
+        self.texts = []
+        self.stub = stub_engines()
+        self.stub.__enter__()
+        self.cache = podkaast_app.chapter_cache
+        podkaast_app.chapter_cache = ChapterCache(tempfile.mkdtemp())
+        synthesize = podkaast_app.TTS_ENGINES["pyttsx3"][0]
+        counting = lambda text, *rest, **kwargs: self.texts.append(text) or synthesize(text, *rest, **kwargs)
+        podkaast_app.TTS_ENGINES.update(pyttsx3=(counting, ".wav"), gtts=(counting, ".wav"))
+        return self
+
+    def __exit__(self, *exc):
+        podkaast_app.chapter_cache = self.cache
+        return self.stub.__exit__(*exc)
+
+
+def test_detection():
+    print("🧪 Testing heading detection and chapter balancing...")
+    text = "Preface text.\n1. Getting Started\nFirst steps here.\nCHAPTER TWO\nMore steps.\nAPPENDIX A\nTables."
+    chapters = split_chapters(mark_headings(text), "Main Content")
+    assert [title for title, _ in chapters] == ["1. Getting Started", "CHAPTER TWO", "APPENDIX A"], chapters
+    assert chapters[0][1].startswith("Preface text.")
+    assert mark_headings("Only one\nHEADING HERE\nhere.") == "Only one\nHEADING HERE\nhere."
+    assert split_chapters("Plain text.", "Main Content") == [("Main Content", "Plain text.")]
+
+    balanced = balance_chapters([("A", "x" * 50), ("B", "y" * 500), ("C", "z" * 30), ("D", "w" * 600)], min_chars=100)
+    assert [(title, len(body)) for title, body in balanced] == [("A", 584), ("D", 600)]
+    assert len(balance_chapters([(str(i), "v" * 500) for i in range(5)], max_chapters=3)) == 3
+
+    playlist = write_playlist([("Intro, part one", 4.2, "a.wav"), ("Body", 10.0, "b.wav")])
+    assert playlist.startswith("#EXTM3U\n") and "#EXT-X-TARGETDURATION:10" in playlist
+    assert "#EXTINF:4.200,Intro part one\na.wav" in playlist and playlist.endswith("#EXT-X-ENDLIST\n")
+
+    audio, message = podkaast_app.render_chapters("  \n\n ", "", "Fun", "Short (1-2 min)", "English", "Monologue",
+                                                  "pyttsx3", lambda stage: None)
+    assert audio is None and message.startswith("Error:"), message
+    print("✅ Numbered, named and capitalized headings split; short chapters folded")
+
+
+def test_outline_chapters():
+    print("\n🧪 Testing a chapterized conversion from the PDF outline...")
+    with counting_engines() as engines:
+        manifest_path, transcript = podkaast_app.convert_pdf_to_podcast([make_text_pdf(PAGES, outline=OUTLINE)], *ARGS)
+        assert manifest_path and manifest_path.endswith(".json"), transcript
+        with open(manifest_path, encoding="utf-8") as manifest_file:
+            manifest = json.load(manifest_file)
+        chapters = manifest["chapters"]
+        assert [chapter["title"] for chapter in chapters] == ["Introduction"] + [title for title, _ in OUTLINE] + ["Outro"]
+        for previous, chapter in zip(chapters, chapters[1:]):
+            assert abs(previous["offset"] + previous["duration"] - chapter["offset"]) < 1e-3
+            assert chapter["duration"] > 0 and podkaast_app.audio_store.resolve(os.path.basename(chapter["audio"]))
+        assert "Keeping Bees" in transcript and "bees pollinate" in chapters[2]["transcript"]
+        assert "apple trees" not in chapters[2]["transcript"]
+
+        playlist = podkaast_app.audio_store.resolve(os.path.basename(manifest["playlist"]))
+        with open(playlist, encoding="utf-8") as playlist_file:
+            entries = [line for line in playlist_file.read().splitlines() if line.endswith(".wav")]
+        assert entries == [os.path.basename(chapter["audio"]) for chapter in chapters]
+
+        # an edited harvest chapter is the only content chapter synthesized again
+        engines.texts.clear()
+        edited = PAGES[:2] + [topic("Harvest", "pickers now start after sunrise because of new rules.")]
+        _, edited_transcript = podkaast_app.convert_pdf_to_podcast([make_text_pdf(edited, outline=OUTLINE)], *ARGS)
+    spoken = " ".join(engines.texts)
+    # the outro recaps every chapter's key point, so only the chapter bodies are checked
+    assert "after sunrise" in spoken and "Orchard note 1" not in spoken and "Hives note 1" not in spoken
+    assert "after sunrise" in edited_transcript and "apple trees" in edited_transcript
+    print(f"✅ {len(chapters)} chapters, {manifest['duration']:.1f}s; the edit re-rendered one content chapter")
+
+
+def test_api_chapters():
+    print("\n🧪 Testing chapterized output through the API...")
+    client = TestClient(podkaast_app.app)
+    text = "\n".join(["1. Soil", PAGES[0], "2. Water", PAGES[1]])
+    files = [("files", ("guide.pdf", make_text_pdf([text]), "application/pdf"))]
+    assert client.post(f"{API}/conversions", files=files, data={"output": "Podcast"}).status_code == 422
+    with counting_engines():
+        response = client.post(
+            f"{API}/conversions", files=files,
+            data={"output": "Chapters", "advanced_audio": "false", "length": "Short (1-2 min)"}
+        )
+        assert response.status_code == 202, response.text
+        status = wait_for(client, response.json()["job_id"])
+        assert status["status"] == "done" and status["audio_url"].endswith(".json"), status
+        manifest = client.get(status["audio_url"])
+        playlist = client.get(manifest.json()["playlist"])
+    assert manifest.headers["content-type"].startswith("application/json")
+    assert [chapter["title"] for chapter in manifest.json()["chapters"][1:-1]] == ["1. Soil", "2. Water"]
+    assert playlist.headers["content-type"].startswith("application/vnd.apple.mpegurl")
+    assert playlist.text.count("#EXTINF") == 4
+    print("✅ Headings detected without an outline; manifest and playlist served from the audio route")
+
+
+def test_cache_pruning():
+    print("\n🧪 Testing chapter cache pruning...")
+    root = tempfile.mkdtemp()
+    audio = os.path.join(root, "chapter.wav")
+    open(audio, "wb").close()
+    chapter = {"path": audio, "duration": 1.0, "transcript": "x" * 1000, "key_point": [], "chars": 0}
+    cache = ChapterCache(os.path.join(root, "chapters"), max_age=60)
+
+    for key in ("old", "used", "new"):
+        cache.put(key, chapter)
+    entry = os.path.join(root, "chapters", "{}.json")
+    os.utime(entry.format("old"), (time.time() - 30, time.time() - 30))
+    os.utime(entry.format("used"), (time.time() - 20, time.time() - 20))
+    assert cache.get("used") is not None
+    cache.max_bytes = 2500
+    cache.prune()
+    assert cache.get("old") is None and cache.get("used") is not None and cache.get("new") is not None
+
+    cache.prune(now=time.time() + 120)
+    assert cache.get("used") is None and cache.get("new") is None
+    print("✅ Least recently used and expired chapters are deleted")
+
+
+def main():
+    print("📚 Podkaast Chapters Test")
+    print("=" * 40)
+
+    tests = [
+        ("Detection", test_detection),
+        ("Outline Chapters", test_outline_chapters),
+        ("API Chapters", test_api_chapters),
+        ("Cache Pruning", test_cache_pruning)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            results.append((test_name, True))
+        except Exception as e:
+            print(f"❌ {test_name} test failed: {e}")
+            results.append((test_name, False))
+
+    print("\n" + "=" * 40)
+    print("📊 Test Results Summary:")
+
+    all_passed = True
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{test_name}: {status}")
+        if not result:
+            all_passed = False
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+import sys
+import tempfile
+import threading
+import time
+
+from cancellation import check
+from cluster import Cluster, RemoteJob, SharedStore
+from jobs import JobManager
+from scheduler import FairScheduler
+
+
+def resolve(name):
+    return f"/audio/{name}"
+
+
+def make_replica(store, name, workers, convert, **kwargs):
+    scheduler = FairScheduler(workers, user_share=1.0, rate_per_minute=600, burst=100)
+    jobs = JobManager(workers, scheduler=scheduler)
+    return Cluster(store, jobs, convert, replica_id=name, interval=0.05, resolve_audio=resolve, **kwargs).start()
+
+
+def test_dispatch_by_free_capacity():
+    print("🧪 Testing dispatch to the replica with free slots...")
+    store = SharedStore(tempfile.mkdtemp())
+    gate = threading.Event()
+
+    def convert(pdf_files, label, report=None, token=None):
+        if label == "block":
+            gate.wait(5)
+        return f"/audio/{label}.mp3", f"script for {label} ({sum(len(pdf) for pdf in pdf_files)} bytes)"
+
+    first = make_replica(store, "replica-a", 1, convert)
+    second = make_replica(store, "replica-b", 1, convert)
+    try:
+        time.sleep(0.2)
+        busy = first.submit(convert, [], "block", user="alice")
+        assert not isinstance(busy, RemoteJob), "ties stay on the local replica"
+        time.sleep(0.1)
+
+        job = first.submit(convert, [b"%PDF-1", b"%PDF-22"], "elsewhere", user="bob")
+        assert isinstance(job, RemoteJob), "a busy replica should hand the job over"
+        audio, transcript = job.result(timeout=5)
+        assert audio == "/audio/elsewhere.mp3" and "13 bytes" in transcript, (audio, transcript)
+        assert job.record["replica"] == "replica-b"
+
+        # any replica resolves the id, including the one that did the work
+        assert second.get(job.job_id).status == "done"
+        assert first.get(job.job_id).to_dict()["has_audio"]
+        assert first.get(busy.job_id).status == "running" and second.get(busy.job_id).status == "running"
+        assert first.get("../../etc/passwd") is None
+        gate.set()
+        busy.result(timeout=5)
+    finally:
+        gate.set()
+        first.stop()
+        second.stop()
+    print("✅ Job ran on replica-b and resolves from both replicas")
+
+
+def test_cancel_across_replicas():
+    print("\n🧪 Testing cancellation of a job on another replica...")
+    store = SharedStore(tempfile.mkdtemp())
+    gate = threading.Event()
+
+    def convert(label, report=None, token=None):
+        if label == "block":
+            gate.wait(5)
+            return None, "done"
+        while True:
+            check(token)
+            time.sleep(0.01)
+
+    first = make_replica(store, "replica-a", 1, convert)
+    second = make_replica(store, "replica-b", 1, convert)
+    try:
+        time.sleep(0.2)
+        first.submit(convert, "block", user="alice")
+        time.sleep(0.1)
+        job = first.submit(convert, "spin", user="carol")
+        assert isinstance(job, RemoteJob)
+        job.wait_for_change(0, timeout=2)
+
+        assert first.cancel_user("carol", "stopped by carol") == 1
+        deadline = time.time() + 5
+        while not job.done and time.time() < deadline:
+            job.wait_for_change(job.version, timeout=0.5)
+        assert job.status == "cancelled" and job.error == "stopped by carol", job.record
+        assert job.cancel() is False
+    finally:
+        gate.set()
+        first.stop()
+        second.stop()
+    print("✅ Cancel request reached the owning replica")
+
+
+def test_orphans_and_pinning():
+    print("\n🧪 Testing adoption of work queued for a dead replica...")
+    store = SharedStore(tempfile.mkdtemp())
+
+    def convert(label, report=None, token=None):
+        return f"/audio/{label}.mp3", label
+
+    # a replica that died after work was queued for it; its heartbeat is long stale
+    store.write_json("replicas/ghost.json", {"replica": "ghost", "url": "", "capacity": 8, "load": 0, "updated": 0})
+    dispatcher = Cluster(store, JobManager(1), convert, replica_id="dispatcher", resolve_audio=resolve)
+    dispatcher._replicas = {"ghost": {"replica": "ghost", "capacity": 8, "load": 0, "updated": time.time()}}
+    orphan = dispatcher.submit(convert, "orphan")
+    assert orphan.record["replica"] == "ghost"
+
+    survivor = make_replica(store, "survivor", 1, convert, local_only=lambda label: label == "pinned")
+    try:
+        audio, _ = orphan.result(timeout=5)
+        assert audio == "/audio/orphan.mp3" and orphan.record["replica"] == "survivor"
+
+        pinned = survivor.submit(convert, "pinned")
+        assert not isinstance(pinned, RemoteJob)
+        assert survivor.stats()["replicas"] == {"survivor": 1}
+    finally:
+        survivor.stop()
+    print("✅ Orphaned job finished on the surviving replica; pinned jobs stay local")
+
+
+def test_lost_jobs():
+    print("\n🧪 Testing jobs left behind by a dead replica...")
+    store = SharedStore(tempfile.mkdtemp())
+
+    def convert(label, report=None, token=None):
+        return f"/audio/{label}.mp3", label
+
+    class BrokenJobs(JobManager):
+        def submit(self, *args, **kwargs):
+            raise RuntimeError("replica going down")
+
+    store.write_json("replicas/ghost.json", {"replica": "ghost", "url": "", "capacity": 8, "load": 0, "updated": 0})
+    dispatcher = Cluster(store, JobManager(1), convert, replica_id="dispatcher", resolve_audio=resolve)
+    dispatcher._replicas = {"ghost": {"replica": "ghost", "capacity": 8, "load": 0, "updated": time.time()}}
+    job = dispatcher.submit(convert, "lost")
+    assert isinstance(job, RemoteJob)
+
+    # still queued, so another replica can adopt it
+    job.refresh()
+    assert job.status == "queued" and dispatcher.queued(job.job_id)
+
+    # a claim that fails before the job is submitted leaves the entry in place
+    ghost = Cluster(store, BrokenJobs(1), convert, replica_id="ghost", resolve_audio=resolve)
+    ghost._claim()
+    assert dispatcher.queued(job.job_id)
+
+    # once nobody holds the job any more, its record fails instead of waiting forever
+    store.delete(f"queue/ghost/{job.job_id}.json")
+    dispatcher._replicas = {}
+    job.refresh()
+    assert job.status == "failed" and "ghost" in job.error, job.record
+    print("✅ Queued jobs wait for adoption; lost ones fail")
+
+
+def main():
+    print("🛰️ Podkaast Cluster Test")
+    print("=" * 40)
+
+    tests = [
+        ("Dispatch", test_dispatch_by_free_capacity),
+        ("Cancel", test_cancel_across_replicas),
+        ("Orphans and Pinning", test_orphans_and_pinning),
+        ("Lost Jobs", test_lost_jobs)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            results.append((test_name, True))
+        except Exception as e:
+            print(f"❌ {test_name} test failed: {e}")
+            results.append((test_name, False))
+
+    print("\n" + "=" * 40)
+    print("📊 Test Results Summary:")
+
+    all_passed = True
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{test_name}: {status}")
+        if not result:
+            all_passed = False
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+import sys
+import time
+
+from dedup import MinHashIndex, deduplicate_text, minhash_signature, signature_similarity
+
+LEGAL = (
+    "This document is confidential and intended solely for the use of the individual "
+    "to whom it is addressed. Any unauthorized review or distribution is prohibited."
+)
+
+
+def build_pages(count):
+    pages = []
+    for number in range(1, count + 1):
+        pages.append("\n".join([
+            "ACME Corp Quarterly Report",
+            f"Chapter {number} discusses topic number {number} with unique findings about item {number * 7}.",
+            f"Revenue for region {number} grew by {number % 9} percent compared to last year's figures.",
+            "",
+            LEGAL if number % 2 else LEGAL.replace("prohibited", "strictly prohibited"),
+            "",
+            f"Page {number} of {count}",
+        ]))
+    return "\n".join(pages)
+
+
+def test_minhash_similarity():
+    print("🧪 Testing MinHash signatures...")
+    a = minhash_signature(LEGAL.lower().split())
+    b = minhash_signature(LEGAL.replace("prohibited", "strictly prohibited").lower().split())
+    c = minhash_signature("completely different words about solar panels and battery storage systems today".split())
+
+    assert signature_similarity(a, b) > signature_similarity(a, c)
+
+    index = MinHashIndex()
+    index.add(a)
+    assert index.find(b) is not None
+    assert index.find(c) is None
+    print("✅ Near duplicates collide in the index")
+
+
+def test_deduplicate_text():
+    print("\n🧪 Testing boilerplate and near-duplicate removal...")
+    text = build_pages(10)
+    result, stats = deduplicate_text(text)
+
+    # the running header is kept once, like any other repeated short line
+    assert result.count("ACME Corp Quarterly Report") == 1 and result.startswith("ACME Corp Quarterly Report")
+    assert "Page 3 of 10" not in result
+    assert result.count("intended solely") == 1
+    assert all(f"Chapter {n} discusses" in result for n in range(1, 11))
+    assert stats.chars_saved > 0 and stats.audio_seconds_saved > 0
+    print(f"✅ {stats.summary()}")
+
+
+def test_linear_scaling():
+    print("\n🧪 Testing dedup speed on a long document...")
+    text = build_pages(2000)
+    start = time.perf_counter()
+    result, stats = deduplicate_text(text)
+    elapsed = time.perf_counter() - start
+
+    assert result.count("intended solely") == 1
+    assert elapsed < 5, f"dedup took {elapsed:.2f}s"
+    print(f"✅ Deduplicated 2000 pages in {elapsed:.2f}s")
+
+
+def main():
+    print("🧹 Podkaast Dedup Test")
+    print("=" * 40)
+
+    tests = [
+        ("MinHash Similarity", test_minhash_similarity),
+        ("Deduplicate Text", test_deduplicate_text),
+        ("Linear Scaling", test_linear_scaling)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            results.append((test_name, True))
+        except Exception as e:
+            print(f"❌ {test_name} test failed: {e}")
+            results.append((test_name, False))
+
+    print("\n" + "=" * 40)
+    print("📊 Test Results Summary:")
+
+    all_passed = True
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{test_name}: {status}")
+        if not result:
+            all_passed = False
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
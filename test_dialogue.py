@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+import sys
+import tempfile
+import threading
+import time
+import wave
+
+import podkaast_app
+from audio_store import AudioStore
+from duration import DurationEstimator
+from languages import get_language
+from phrase_memo import PhraseMemo, assemble_audio
+from sample_pdf import make_text_pdf
+
+DOCUMENT = " ".join(
+    f"Solar finding number {index} shows that batteries and panels work together on the grid."
+    for index in range(12)
+)
+
+
+def write_tone(value, frames=80):
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_file:
+        path = tmp_file.name
+    with wave.open(path, "wb") as output:
+        output.setnchannels(1)
+        output.setsampwidth(2)
+        output.setframerate(8000)
+        output.writeframes(bytes([value % 256, 0]) * frames)
+    return path
+
+
+def test_dialogue_script():
+    print("🧪 Testing two-host dialogue scripts...")
+    segments = podkaast_app.build_dialogue_segments(DOCUMENT, "", "Fun", "Short (1-2 min)", "English")
+    speakers = [speaker for _, _, speaker in segments if speaker is not None]
+    assert set(speakers) == {0, 1}
+    assert all(text.strip() for text, _, _ in segments)
+    assert any(text in get_language("English").templates["prompts"] for text, _, _ in segments)
+
+    transcript = podkaast_app.join_script_segments(segments)
+    assert transcript.startswith("# Podcast Script")
+    assert "**Alex:**" in transcript and "**Sam:**" in transcript
+
+    spanish = podkaast_app.build_dialogue_segments(DOCUMENT, "", "Fun", "Short (1-2 min)", "Spanish")
+    assert spanish[1][0] == get_language("Spanish").templates["intro_text"]
+
+    english = get_language("English")
+    assert english.voice_id("gtts", 0) != english.voice_id("gtts", 1)
+    assert english.voice_id("pyttsx3", 0) != english.voice_id("pyttsx3", 1)
+    print(f"✅ {len(segments)} turns alternating between {podkaast_app.HOSTS[0]} and {podkaast_app.HOSTS[1]}")
+
+
+def test_parallel_synthesis_keeps_turn_order():
+    print("\n🧪 Testing concurrent per-speaker synthesis...")
+    calls = []
+    active = []
+    peak = [0]
+    lock = threading.Lock()
+
+    def synthesize(text, speaker):
+        with lock:
+            calls.append((text, speaker))
+            active.append(text)
+            peak[0] = max(peak[0], len(active))
+        time.sleep(0.1)
+        with lock:
+            active.remove(text)
+        return write_tone(int(text.split()[1]))
+
+    segments = [(f"turn {index}", index == 0, index % 2) for index in range(8)]
+    with tempfile.TemporaryDirectory() as memo_dir:
+        memo = PhraseMemo(memo_dir)
+        started = time.perf_counter()
+        path = assemble_audio(segments, synthesize, memo, "English", "fake", ["voice-a", "voice-b"], ".wav", workers=4)
+        elapsed = time.perf_counter() - started
+
+        with wave.open(path, "rb") as audio:
+            frames = audio.readframes(audio.getnframes())
+        assert [frames[index * 160] for index in range(8)] == list(range(8))
+        assert elapsed < 0.5, elapsed
+        assert peak[0] > 1
+        assert {speaker for _, speaker in calls} == {0, 1}
+        assert memo.path_for("turn 0", "English", "fake", "voice-a", ".wav").exists()
+    print(f"✅ 8 turns in {elapsed:.2f}s (serial would take 0.8s), stitched in turn order")
+
+
+def test_dialogue_conversion():
+    print("\n🧪 Testing a dialogue conversion end to end...")
+    speakers = []
+
+    def fake_tts(text, language, token=None, speaker=0):
+        speakers.append(speaker)
+        return write_tone(speaker)
+
+    engines = dict(podkaast_app.TTS_ENGINES)
+    memo = podkaast_app.phrase_memo
+    estimator = podkaast_app.duration_estimator
+    store_root = podkaast_app.audio_store.root
+    podkaast_app.TTS_ENGINES.update(gtts=(fake_tts, ".wav"), pyttsx3=(fake_tts, ".wav"))
+    podkaast_app.phrase_memo = PhraseMemo(tempfile.mkdtemp())
+    podkaast_app.duration_estimator = DurationEstimator(tempfile.mktemp(suffix=".json"))
+    podkaast_app.audio_store.root = AudioStore(tempfile.mkdtemp()).root
+    try:
+        audio, transcript = podkaast_app.convert_pdf_to_podcast(
+            [make_text_pdf([DOCUMENT])], "", "", "Formal", "Short (1-2 min)", "English", True, "Dialogue"
+        )
+    finally:
+        podkaast_app.TTS_ENGINES.update(engines)
+        podkaast_app.phrase_memo = memo
+        podkaast_app.duration_estimator = estimator
+        podkaast_app.audio_store.root = store_root
+
+    assert audio, transcript
+    assert "**Sam:**" in transcript
+    assert set(speakers) == {0, 1}
+    print("✅ Dialogue episode rendered with both voices")
+
+
+def main():
+    print("🎙️ Podkaast Dialogue Test")
+    print("=" * 40)
+
+    tests = [
+        ("Dialogue Script", test_dialogue_script),
+        ("Parallel Synthesis", test_parallel_synthesis_keeps_turn_order),
+        ("Dialogue Conversion", test_dialogue_conversion)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            results.append((test_name, True))
+        except Exception as e:
+            print(f"❌ {test_name} test failed: {e}")
+            results.append((test_name, False))
+
+    print("\n" + "=" * 40)
+    print("📊 Test Results Summary:")
+
+    all_passed = True
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{test_name}: {status}")
+        if not result:
+            all_passed = False
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
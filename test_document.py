@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+import sys
+
+from document import Document, Segment
+
+PAGES = [
+    "Café owners in Zürich said hello. Dr. Müller agreed!\n\nA second paragraph starts here.",
+    "",
+    "今天天气很好。Page three ends here.",
+]
+
+
+def test_offsets_and_tables():
+    print("🧪 Testing page, paragraph and sentence tables...")
+    document = Document.from_pages(PAGES)
+
+    assert len(document.pages) == 3
+    assert [page.text for page in document.pages] == [PAGES[0], "", PAGES[2]]
+    assert [paragraph.text for paragraph in document.paragraphs] == [
+        "Café owners in Zürich said hello. Dr. Müller agreed!",
+        "A second paragraph starts here.",
+        "今天天气很好。Page three ends here.",
+    ]
+    assert [sentence.text for sentence in document.sentences] == [
+        "Café owners in Zürich said hello.",
+        "Dr. Müller agreed!",
+        "A second paragraph starts here.",
+        "今天天气很好。Page three ends here.",
+    ]
+    assert document.text == f"{PAGES[0]}\n\n{PAGES[2]}"
+    print("✅ Offsets line up with multi-byte UTF-8 text")
+
+
+def test_views_share_the_buffer():
+    print("\n🧪 Testing zero-copy segment views...")
+    document = Document.from_pages(PAGES)
+    sentence = document.sentences[1]
+
+    assert isinstance(sentence, Segment) and not hasattr(sentence, "__dict__")
+    with sentence.view() as view:
+        assert view.obj is document.buffer
+        assert bytes(view) == "Dr. Müller agreed!".encode("utf-8")
+
+    document.add_page("Pages can still be added after views are released.")
+    assert document.sentences[-1].text == "Pages can still be added after views are released."
+    assert [segment.text for segment in document.sentences[0:2]] == ["Café owners in Zürich said hello.", "Dr. Müller agreed!"]
+    print("✅ Views slice the shared buffer")
+
+
+def test_thousand_page_footprint():
+    print("\n🧪 Testing memory for a 1000-page document...")
+    page = " ".join(f"Sentence {index} of this page explains one more detail about the topic." for index in range(30))
+    document = Document.from_pages([page] * 1000)
+
+    assert len(document.pages) == 1000 and len(document.sentences) == 30000
+    overhead = document.nbytes() - len(document.buffer)
+    as_strings = sum(sys.getsizeof(sentence.text) for sentence in document.sentences)
+
+    assert overhead < len(document.buffer) * 0.15, overhead
+    assert document.nbytes() < as_strings
+    print(f"✅ {document.nbytes() / 1e6:.1f} MB indexed vs {as_strings / 1e6:.1f} MB as separate strings")
+
+
+def main():
+    print("📚 Podkaast Document Model Test")
+    print("=" * 40)
+
+    tests = [
+        ("Offset Tables", test_offsets_and_tables),
+        ("Segment Views", test_views_share_the_buffer),
+        ("Footprint", test_thousand_page_footprint)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            results.append((test_name, True))
+        except Exception as e:
+            print(f"❌ {test_name} test failed: {e}")
+            results.append((test_name, False))
+
+    print("\n" + "=" * 40)
+    print("📊 Test Results Summary:")
+
+    all_passed = True
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{test_name}: {status}")
+        if not result:
+            all_passed = False
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
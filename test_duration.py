@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+import sys
+import tempfile
+import wave
+
+import duration
+import podkaast_app
+from cache import content_hash
+from document import Document
+from duration import DurationEstimator, audio_seconds, count_words, trim_segments
+from sample_pdf import make_text_pdf
+from test_api import stub_engines
+
+DOCUMENT = " ".join(
+    f"Glacier survey number {index} measured how quickly the ice sheet retreats each summer."
+    for index in range(40)
+)
+
+
+def write_mp3(frames):
+    # MPEG-2 Layer III, 32 kbit/s, 24 kHz mono: 96-byte frames of 24 ms, like gTTS output
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as tmp_file:
+        tmp_file.write((b"\xff\xf3\x44\xc4" + b"\x00" * 92) * frames)
+        return tmp_file.name
+
+
+def write_wav(seconds):
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_file:
+        path = tmp_file.name
+    with wave.open(path, "wb") as output:
+        output.setnchannels(1)
+        output.setsampwidth(2)
+        output.setframerate(8000)
+        output.writeframes(b"\x00\x00" * int(8000 * seconds))
+    return path
+
+
+def test_measurement():
+    print("🧪 Testing word counts and audio lengths...")
+    assert count_words("The quick brown fox, jumping.") == 5
+    assert count_words("你好世界") == 4
+    assert abs(audio_seconds(write_mp3(250)) - 6.0) < 1e-6
+    assert abs(audio_seconds(write_wav(1.5)) - 1.5) < 1e-6
+    print("✅ MP3 frames and WAV headers measured")
+
+
+def test_calibration():
+    print("\n🧪 Testing estimator calibration...")
+    path = tempfile.mktemp(suffix=".json")
+    estimator = DurationEstimator(path)
+    text = "word " * 100
+
+    prior = estimator.estimate(text, "gtts", "English")
+    assert prior.words == 100 and prior.audio_seconds > 0
+
+    estimator.record(text, "gtts", "English", audio=50.0, synthesis=10.0)
+    calibrated = estimator.estimate(text, "gtts", "English")
+    assert abs(calibrated.audio_seconds - 50.0) < 1e-6 and abs(calibrated.synthesis_seconds - 10.0) < 1e-6
+
+    estimator.record(text, "gtts", "English", audio=70.0)
+    reloaded = DurationEstimator(path).estimate(text, "gtts", "English")
+    assert 50.0 < reloaded.audio_seconds < 70.0
+    assert abs(reloaded.synthesis_seconds - 10.0) < 1e-6
+    assert estimator.estimate(text, "pyttsx3", "English").audio_seconds == prior.audio_seconds
+
+    assert abs(estimator.planned(500, "gtts", "English").words - 100) <= 1
+    assert estimator.audio_limit("gtts", "English", max_audio=600, max_synthesis=20) < 600
+    print(f"✅ 100 words: prior {prior.audio_seconds:.0f}s, calibrated {reloaded.audio_seconds:.0f}s")
+
+
+def test_trim():
+    print("\n🧪 Testing budget trimming...")
+    segments = [
+        ("Intro music.", True),
+        ("One two three. Four five six. Seven eight nine.", False, 0),
+        ("Ten eleven twelve.", False, 1),
+        ("Outro music.", True),
+    ]
+    seconds = lambda text: float(count_words(text))
+    trimmed = list(trim_segments(segments, seconds, 8, "English"))
+    assert trimmed == [("Intro music.", True), ("One two three. Four five six.", False, 0), ("Outro music.", True)]
+    assert list(trim_segments(segments, seconds, 100, "English")) == segments
+    print("✅ Dynamic text cut at a sentence boundary, templates kept")
+
+
+def test_admission():
+    print("\n🧪 Testing admission control before synthesis...")
+    calls = []
+    engines = dict(podkaast_app.TTS_ENGINES)
+    limits = duration.MAX_AUDIO_SECONDS, duration.MAX_SYNTHESIS_SECONDS
+    policy = podkaast_app.OVER_BUDGET_POLICY
+    args = ([make_text_pdf([DOCUMENT])], "", "", "Formal", "Medium (3-5 min)", "English", False)
+    try:
+        with stub_engines():
+            synthesize = podkaast_app.TTS_ENGINES["pyttsx3"][0]
+            counting = lambda text, *rest, **kwargs: calls.append(text) or synthesize(text, *rest, **kwargs)
+            podkaast_app.TTS_ENGINES.update(pyttsx3=(counting, ".wav"))
+            # the stub engines' short clips would calibrate every later estimate down, so go over budget first
+            normal_cost = podkaast_app.estimate_conversion_cost(*args)
+            duration.MAX_AUDIO_SECONDS = 20
+            assert podkaast_app.estimate_conversion_cost(*args) == normal_cost * duration.OVER_BUDGET_PENALTY
+
+            podkaast_app.OVER_BUDGET_POLICY = "reject"
+            audio, message = podkaast_app.convert_pdf_to_podcast(*args)
+            assert audio is None and "over the" in message, message
+            assert calls == []
+
+            podkaast_app.OVER_BUDGET_POLICY = "truncate"
+            audio, trimmed = podkaast_app.convert_pdf_to_podcast(*args)
+            assert audio and calls
+
+            duration.MAX_AUDIO_SECONDS = limits[0]
+            _, full = podkaast_app.convert_pdf_to_podcast(*args)
+            assert len(trimmed) < len(full) and "Thank you for listening" in trimmed
+    finally:
+        duration.MAX_AUDIO_SECONDS, duration.MAX_SYNTHESIS_SECONDS = limits
+        podkaast_app.OVER_BUDGET_POLICY = policy
+        podkaast_app.TTS_ENGINES.update(engines)
+    print(f"✅ Over-budget script rejected before TTS, or trimmed from {len(full)} to {len(trimmed)} characters")
+
+
+def test_cost_follows_input():
+    print("\n🧪 Testing the over-budget prediction against the input size...")
+    note = "A short note about one glacier."
+    small, large = make_text_pdf([note]), make_text_pdf([DOCUMENT, DOCUMENT])
+    args = lambda pdf: ([pdf], "", "", "Formal", "Medium (3-5 min)", "English", False)
+    limit = duration.MAX_AUDIO_SECONDS
+    try:
+        with stub_engines():
+            podkaast_app.page_index.save(content_hash(small), Document.from_pages([note]))
+            podkaast_app.page_index.save(content_hash(large), Document.from_pages([DOCUMENT, DOCUMENT]))
+            chars = lambda pdf, pages="": podkaast_app.planned_chars([pdf], "", "Medium (3-5 min)", "English", pages)
+            full = chars(make_text_pdf(["Not parsed yet."]))
+            assert chars(small) == full - podkaast_app.speech_budget("Medium (3-5 min)") + len(note)
+            assert chars(large) == full and chars(large, "1") == full
+            assert podkaast_app.planned_chars([], "https://example.com", "Medium (3-5 min)", "English") == full
+
+            # about 100 s for the short note with its intro and outro, 240 s for a full episode
+            duration.MAX_AUDIO_SECONDS = 150
+            base = lambda pdf: (0.2 + len(pdf) / (1024 * 1024)) * podkaast_app.LENGTH_COST["Medium (3-5 min)"]
+            assert podkaast_app.estimate_conversion_cost(*args(small)) == base(small)
+            assert podkaast_app.estimate_conversion_cost(*args(large)) == base(large) * duration.OVER_BUDGET_PENALTY
+    finally:
+        duration.MAX_AUDIO_SECONDS = limit
+    print(f"✅ Short document predicted at {chars(small)} characters, a long one at the full {full}")
+
+
+def main():
+    print("⏱️ Podkaast Duration Estimator Test")
+    print("=" * 40)
+
+    tests = [
+        ("Measurement", test_measurement),
+        ("Calibration", test_calibration),
+        ("Trim", test_trim),
+        ("Admission", test_admission),
+        ("Cost Follows Input", test_cost_follows_input)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            results.append((test_name, True))
+        except Exception as e:
+            print(f"❌ {test_name} test failed: {e}")
+            results.append((test_name, False))
+
+    print("\n" + "=" * 40)
+    print("📊 Test Results Summary:")
+
+    all_passed = True
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{test_name}: {status}")
+        if not result:
+            all_passed = False
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
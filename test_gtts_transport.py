@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+import base64
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cancellation import CancelToken, Cancelled
+from gtts_transport import GTTSTransport, TransportError, chunk_bodies
+
+# long enough for gTTS to split it into several chunks
+TEXT = " ".join(f"Sentence number {index} talks about solar panels and batteries." for index in range(8))
+
+
+class StubTTS:
+    """Stand-in for the batchexecute endpoint that can fail the first N tries of each chunk"""
+
+    def __init__(self, failures_per_chunk=0, status=503):
+        self.failures_per_chunk = failures_per_chunk
+        self.status = status
+        self.attempts = {}
+        self.ports = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def handle(self, handler):
+        length = int(handler.headers["Content-Length"])
+        text = chunk_text(handler.rfile.read(length).decode())
+
+        with self.lock:
+            self.ports.add(handler.client_address[1])
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            attempt = self.attempts[text] = self.attempts.get(text, 0) + 1
+        time.sleep(0.02)
+        with self.lock:
+            self.in_flight -= 1
+
+        if attempt <= self.failures_per_chunk:
+            return self.status, b"busy"
+        audio = base64.b64encode(f"<{text}>".encode()).decode()
+        return 200, f')]}}\'\n\n[["wrb.fr","jQ1olc","[\\"{audio}\\"]",null,null,null,"generic"]]\n'.encode()
+
+
+def chunk_text(body):
+    return urllib.parse.unquote(body).split('\\"', 2)[1]
+
+
+def start_stub(stub):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            status, payload = stub.handle(self)
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/batchexecute?tld={{tld}}"
+
+
+def expected_audio(text):
+    return b"".join(f"<{chunk_text(body)}>".encode() for body in chunk_bodies(text, "en"))
+
+
+def test_chunks_reuse_connections():
+    print("🧪 Testing pooled, parallel chunk requests...")
+    stub = StubTTS()
+    server, url = start_stub(stub)
+    try:
+        transport = GTTSTransport(url=url, concurrency=2)
+        audio = transport.synthesize(TEXT, "en")
+        audio += transport.synthesize(TEXT, "en")
+
+        chunks = len(stub.attempts)
+        assert chunks > 2, stub.attempts
+        assert audio == expected_audio(TEXT) * 2
+        assert stub.max_in_flight <= 2
+        assert len(stub.ports) <= 2, stub.ports
+        assert transport.stats() == {"requests": chunks * 2, "chunks": chunks * 2, "retried_chunks": 0, "failed_chunks": 0}
+        print(f"✅ {chunks * 2} chunks over {len(stub.ports)} keep-alive connections")
+    finally:
+        server.shutdown()
+
+
+def test_transient_errors_are_retried():
+    print("\n🧪 Testing per-chunk retry with backoff...")
+    stub = StubTTS(failures_per_chunk=2)
+    server, url = start_stub(stub)
+    try:
+        transport = GTTSTransport(url=url, concurrency=4, backoff=0.01, max_backoff=0.05)
+        with tempfile.NamedTemporaryFile(suffix=".mp3") as output:
+            transport.save(TEXT, "en", output.name)
+            assert open(output.name, "rb").read() == expected_audio(TEXT)
+
+        stats = transport.stats()
+        assert stats["retried_chunks"] == len(stub.attempts)
+        assert stats["requests"] == 3 * len(stub.attempts)
+        print(f"✅ {stats['retried_chunks']} chunks recovered after retries")
+    finally:
+        server.shutdown()
+
+
+def test_permanent_errors_fail_fast():
+    print("\n🧪 Testing non-retryable errors...")
+    stub = StubTTS(failures_per_chunk=10, status=400)
+    server, url = start_stub(stub)
+    try:
+        transport = GTTSTransport(url=url, backoff=0.01)
+        try:
+            transport.synthesize("Short text.", "en")
+            raise AssertionError("HTTP 400 should not be retried")
+        except TransportError as e:
+            assert e.status == 400
+        assert stub.attempts == {"Short text.": 1}
+
+        token = CancelToken()
+        token.cancel("gone")
+        try:
+            transport.synthesize("Short text.", "en", token=token)
+            raise AssertionError("cancelled token should stop the request")
+        except Cancelled:
+            pass
+        assert stub.attempts == {"Short text.": 1}
+        print("✅ Client errors and cancellations are not retried")
+    finally:
+        server.shutdown()
+
+
+def main():
+    print("🗣️ Podkaast gTTS Transport Test")
+    print("=" * 40)
+
+    tests = [
+        ("Connection Reuse", test_chunks_reuse_connections),
+        ("Retries", test_transient_errors_are_retried),
+        ("Permanent Errors", test_permanent_errors_fail_fast)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            results.append((test_name, True))
+        except Exception as e:
+            print(f"❌ {test_name} test failed: {e}")
+            results.append((test_name, False))
+
+    print("\n" + "=" * 40)
+    print("📊 Test Results Summary:")
+
+    all_passed = True
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{test_name}: {status}")
+        if not result:
+            all_passed = False
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
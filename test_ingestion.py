@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import ingestion
+
+ALLOW_PRIVATE_URLS = ingestion.ALLOW_PRIVATE_URLS
+PAGES = {
+    "/article.html": ("text/html", b"<html><head><style>p{}</style></head><body><h1>Solar Power</h1><p>Panels convert light.</p><script>var x;</script></body></html>"),
+    "/notes.txt": ("text/plain", b"Panels convert light.\n\nBatteries store energy."),
+    "/paper.pdf": ("application/pdf", b"%PDF-1.4 fake"),
+    "/huge.txt": ("text/plain", b"x" * 4096),
+    "/slow.txt": ("text/plain", b"slow"),
+}
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith("/redirect"):
+            # /redirect?3 redirects three times before landing on the notes
+            hops = int(self.path.partition("?")[2] or 1)
+            self.send_response(302)
+            self.send_header("Location", f"/redirect?{hops - 1}" if hops > 1 else "/notes.txt")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path not in PAGES:
+            self.send_error(404)
+            return
+        if self.path == "/slow.txt":
+            time.sleep(0.5)
+        content_type, body = PAGES[self.path]
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        try:
+            self.end_headers()
+            self.wfile.write(body)
+        except BrokenPipeError:
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stand_in():
+    # the stand-in listens on loopback, which fetches refuse unless private addresses are allowed
+    ingestion.ALLOW_PRIVATE_URLS = True
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def stop_stand_in(server):
+    server.shutdown()
+    ingestion.ALLOW_PRIVATE_URLS = ALLOW_PRIVATE_URLS
+
+
+def fake_pdf_extractor(content):
+    return f"PDF text ({len(content)} bytes)"
+
+
+def test_parse_urls():
+    print("🧪 Testing URL parsing...")
+    urls = ingestion.parse_urls("https://a.example/x, ftp://nope\nhttp://b.example https://a.example/x")
+    assert urls == ["https://a.example/x", "http://b.example"]
+    assert ingestion.parse_urls("") == []
+    print("✅ URL parsing works")
+
+
+def test_html_to_text():
+    print("\n🧪 Testing HTML extraction...")
+    text = ingestion.html_to_text(PAGES["/article.html"][1].decode())
+    assert "Solar Power" in text and "Panels convert light." in text
+    assert "var x" not in text and "p{}" not in text
+    print("✅ HTML extraction works")
+
+
+def test_ingest_sources():
+    print("\n🧪 Testing parallel ingestion against a local HTTP stand-in...")
+    server, base = start_stand_in()
+    try:
+        urls = f"{base}/article.html {base}/notes.txt {base}/paper.pdf {base}/missing.txt"
+        corpus, errors = ingestion.ingest_sources([b"one", b"two"], urls, fake_pdf_extractor)
+
+        assert corpus.count("Panels convert light.") == 1
+        assert "Batteries store energy." in corpus
+        assert "PDF text (3 bytes)" in corpus
+        assert "PDF text (13 bytes)" in corpus
+        assert len(errors) == 1 and "missing.txt" in errors[0]
+        print("✅ Ingestion merged and deduplicated all sources")
+    finally:
+        stop_stand_in(server)
+
+
+def test_fetch_limits():
+    print("\n🧪 Testing fetch size cap and timeout...")
+    server, base = start_stand_in()
+    try:
+        try:
+            ingestion.fetch_url(f"{base}/huge.txt", max_bytes=1024)
+            raise AssertionError("size cap was not enforced")
+        except ingestion.FetchError:
+            pass
+
+        try:
+            ingestion.fetch_url(f"{base}/slow.txt", timeout=(1, 0.1))
+            raise AssertionError("timeout was not enforced")
+        except ingestion.requests.Timeout:
+            pass
+        print("✅ Size cap and timeout enforced")
+    finally:
+        stop_stand_in(server)
+
+
+def test_private_addresses():
+    print("\n🧪 Testing that fetches stay on public addresses...")
+    for url in ("http://127.0.0.1/", "http://169.254.169.254/latest/meta-data", "http://10.0.0.8/",
+                "http://[::1]/", "http://[::ffff:192.168.0.1]/", "http://224.0.0.1/", "ftp://example.com/"):
+        try:
+            ingestion.check_public_url(url)
+            raise AssertionError(f"{url} was allowed")
+        except ingestion.FetchError:
+            pass
+    ingestion.check_public_url("http://93.184.216.34/")
+
+    server, base = start_stand_in()
+    try:
+        assert ingestion.fetch_url(f"{base}/redirect?2")[0].startswith(b"Panels convert light.")
+        try:
+            ingestion.fetch_url(f"{base}/redirect?{ingestion.MAX_REDIRECTS + 1}")
+            raise AssertionError("redirect loop was followed")
+        except ingestion.FetchError:
+            pass
+
+        # with private addresses refused, every redirect is checked, not only the first URL
+        ingestion.ALLOW_PRIVATE_URLS = False
+        checked = []
+        check_public_url = ingestion.check_public_url
+
+        def trust_first_url(url):
+            checked.append(url)
+            if len(checked) > 1:
+                check_public_url(url)
+
+        ingestion.check_public_url = trust_first_url
+        try:
+            try:
+                ingestion.fetch_url(f"{base}/redirect")
+                raise AssertionError("redirect to a loopback address was followed")
+            except ingestion.FetchError:
+                pass
+        finally:
+            ingestion.check_public_url = check_public_url
+        assert checked == [f"{base}/redirect", f"{base}/notes.txt"]
+        try:
+            ingestion.fetch_url(f"{base}/notes.txt")
+            raise AssertionError("loopback address was fetched")
+        except ingestion.FetchError:
+            pass
+        print("✅ Private, loopback and link-local targets refused, redirects included")
+    finally:
+        stop_stand_in(server)
+
+
+def main():
+    print("🌐 Podkaast Ingestion Test")
+    print("=" * 40)
+
+    tests = [
+        ("URL Parsing", test_parse_urls),
+        ("HTML Extraction", test_html_to_text),
+        ("Parallel Ingestion", test_ingest_sources),
+        ("Fetch Limits", test_fetch_limits),
+        ("Private Addresses", test_private_addresses)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            results.append((test_name, True))
+        except Exception as e:
+            print(f"❌ {test_name} test failed: {e}")
+            results.append((test_name, False))
+
+    print("\n" + "=" * 40)
+    print("📊 Test Results Summary:")
+
+    all_passed = True
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{test_name}: {status}")
+        if not result:
+            all_passed = False
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+import sys
+
+from languages import SUPPORTED_LANGUAGES, TEMPLATES, get_language, preload_languages, split_sentences
+
+
+def test_resources_preloaded():
+    print("🧪 Testing language resource preloading...")
+    resources = preload_languages(match_voices=False)
+    assert set(resources) == set(SUPPORTED_LANGUAGES) and len(resources) == 13
+    assert get_language("Klingon").name == "English"
+    assert get_language("Japanese").voice_id("gtts") == "ja-co.jp"
+    print("✅ All 13 languages preloaded")
+
+
+def test_templates_complete():
+    print("\n🧪 Testing localized templates...")
+    keys = set(TEMPLATES["English"])
+    for language in SUPPORTED_LANGUAGES:
+        assert set(TEMPLATES[language]) == keys, language
+        TEMPLATES[language]["summary_text"].format(tone="x", length="y")
+        TEMPLATES[language]["focus_question"].format(question="z")
+    print("✅ Every language has a full template set")
+
+
+def test_sentence_segmenters():
+    print("\n🧪 Testing sentence segmenters...")
+    assert split_sentences('Dr. Smith said "hi." Then he left! Was it 3.5 m?', "English") == [
+        'Dr. Smith said "hi."', "Then he left!", "Was it 3.5 m?"
+    ]
+    assert split_sentences("今天天气很好。我们去公园吧！「你好。」他说。", "Chinese") == [
+        "今天天气很好。", "我们去公园吧！", "「你好。」", "他说。"
+    ]
+    assert split_sentences("東京は大きいです。本当ですか？はい", "Japanese") == ["東京は大きいです。", "本当ですか？", "はい"]
+    assert split_sentences("안녕하세요. 반갑습니다! 네", "Korean") == ["안녕하세요.", "반갑습니다!", "네"]
+    assert split_sentences("यह एक वाक्य है। यह दूसरा है।", "Hindi") == ["यह एक वाक्य है।", "यह दूसरा है।"]
+    print("✅ Segmenters respect each script's punctuation")
+
+
+def main():
+    print("🌍 Podkaast Language Resources Test")
+    print("=" * 40)
+
+    tests = [
+        ("Resource Preloading", test_resources_preloaded),
+        ("Localized Templates", test_templates_complete),
+        ("Sentence Segmenters", test_sentence_segmenters)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            results.append((test_name, True))
+        except Exception as e:
+            print(f"❌ {test_name} test failed: {e}")
+            results.append((test_name, False))
+
+    print("\n" + "=" * 40)
+    print("📊 Test Results Summary:")
+
+    all_passed = True
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{test_name}: {status}")
+        if not result:
+            all_passed = False
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+import glob
+import os
+import sys
+import tempfile
+
+import podkaast_app
+from load_test import parse_mix, print_report, run_load_test
+
+
+def workspaces():
+    return set(glob.glob(os.path.join(tempfile.gettempdir(), "podkaast-load-*")))
+
+
+def test_parse_mix():
+    print("🧪 Testing the page mix parser...")
+    assert parse_mix("1:6,5:3,40") == [(1, 6.0), (5, 3.0), (40, 1.0)]
+    print("✅ Page counts and weights parsed")
+
+
+def test_smoke_run():
+    print("\n🧪 Testing a few requests through the load-test harness...")
+    before = workspaces()
+    caches = [podkaast_app.page_index, podkaast_app.chapter_cache, podkaast_app.transcript_pages, podkaast_app.text_cache]
+
+    report = run_load_test(requests=3, rate=50, users=2, tts_latency=0.0, mix="1:1", sample_interval=0.2, verbose=False)
+    assert report["requests"] == 3 and report["succeeded"] == 3, report["errors"]
+    assert report["error_rate"] == 0 and report["latency"]["max"] > 0 and report["rss"]
+    print_report(report)
+
+    # the workspace is gone and the app is back on its own caches
+    assert workspaces() == before
+    assert caches == [podkaast_app.page_index, podkaast_app.chapter_cache, podkaast_app.transcript_pages,
+                      podkaast_app.text_cache]
+    assert podkaast_app.conversion_pipeline.caches["text"] is podkaast_app.text_cache
+    print("✅ Conversions ran end to end and the workspace was removed")
+
+
+def main():
+    print("🚦 Podkaast Load Test Harness Test")
+    print("=" * 40)
+
+    tests = [
+        ("Page Mix", test_parse_mix),
+        ("Smoke Run", test_smoke_run)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            results.append((test_name, True))
+        except Exception as e:
+            print(f"❌ {test_name} test failed: {e}")
+            results.append((test_name, False))
+
+    print("\n" + "=" * 40)
+    print("📊 Test Results Summary:")
+
+    all_passed = True
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{test_name}: {status}")
+        if not result:
+            all_passed = False
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
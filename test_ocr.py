@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+import io
+import multiprocessing
+import os
+import sys
+
+import pypdf
+from PIL import Image
+
+import podkaast_app
+from ocr import OcrEngine, OcrFallback, is_garbage_text
+from sample_pdf import make_text_pdf
+
+
+class FakeOcr(OcrEngine):
+    name = "fake"
+
+    def available(self):
+        return True
+
+    def recognize(self, image_bytes, languages="eng"):
+        return f"Recognized scanned page ({languages})"
+
+
+def build_mixed_pdf():
+    writer = pypdf.PdfWriter()
+    writer.append(pypdf.PdfReader(io.BytesIO(make_text_pdf(["This page has a real text layer for extraction."]))))
+
+    scan = io.BytesIO()
+    Image.new("RGB", (300, 400), "white").save(scan, "PDF")
+    writer.append(pypdf.PdfReader(io.BytesIO(scan.getvalue())))
+
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+def test_garbage_detection():
+    print("🧪 Testing empty/garbage page detection...")
+    assert is_garbage_text("")
+    assert is_garbage_text("  \n 12 ")
+    assert is_garbage_text("(cid:12)(cid:44)(cid:90)(cid:3)(cid:17)(cid:80)")
+    assert is_garbage_text("@@@@ #### $$$$ %%%% ^^^^ &&&& ****")
+    assert not is_garbage_text("A perfectly normal sentence extracted from a PDF page.")
+    assert not is_garbage_text("这是从PDF页面中提取的一个完全正常的中文句子。")
+    print("✅ Scanned and broken pages are detected")
+
+
+def test_only_scanned_pages_are_ocrd():
+    print("\n🧪 Testing OCR fallback on a mixed text/scan PDF...")
+    original = podkaast_app.ocr_fallback
+    podkaast_app.ocr_fallback = OcrFallback(engine=FakeOcr(), max_workers=2)
+    try:
+        text = podkaast_app.extract_text_from_pdf(build_mixed_pdf())
+        assert "This page has a real text layer" in text
+        assert text.count("Recognized scanned page (eng)") == 1
+
+        podkaast_app.ocr_fallback.recover({0: b"same image"})
+        podkaast_app.ocr_fallback.recover({5: b"same image"})
+        assert podkaast_app.ocr_fallback.cache.hits == 1
+
+        # workers come from the forkserver, never from a fork of this threaded process
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            assert podkaast_app.ocr_fallback._get_pool().submit(os.getppid).result(timeout=30) != os.getpid()
+        print("✅ Only the scanned page went through OCR, results are cached")
+    finally:
+        podkaast_app.ocr_fallback.shutdown()
+        podkaast_app.ocr_fallback = original
+
+
+def main():
+    print("🔎 Podkaast OCR Fallback Test")
+    print("=" * 40)
+
+    tests = [
+        ("Garbage Detection", test_garbage_detection),
+        ("Scanned Page OCR", test_only_scanned_pages_are_ocrd)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            results.append((test_name, True))
+        except Exception as e:
+            print(f"❌ {test_name} test failed: {e}")
+            results.append((test_name, False))
+
+    print("\n" + "=" * 40)
+    print("📊 Test Results Summary:")
+
+    all_passed = True
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{test_name}: {status}")
+        if not result:
+            all_passed = False
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+import os
+import sys
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+
+import podkaast_app
+from document import Document
+from page_index import PageIndexStore, parse_page_spec
+from sample_pdf import make_text_pdf
+from test_api import API, stub_engines, wait_for
+
+PAGES = [
+    "Welcome to the field guide about river birds.",
+    "Herons wade slowly through the shallow water.",
+    "Kingfishers dive from branches to catch small fish.",
+    "Dippers walk underwater along the stream bed.",
+    "Counting birds at dawn gives the most reliable numbers.",
+    "Our survey found more dippers than expected.",
+]
+OUTLINE = [("Introduction", 0), ("Chapter 2: Species", 1), ("Chapter 3: Results", 4)]
+
+
+class NoParsing:
+    def extract_document(self, path, token=None):
+        raise AssertionError("the PDF was parsed again")
+
+
+def test_page_spec():
+    print("🧪 Testing page selection parsing...")
+    assert parse_page_spec("") == []
+    assert parse_page_spec("40-60, 72; Chapter 3") == [("pages", 40, 60), ("pages", 72, 72), ("chapter", "Chapter 3")]
+    assert parse_page_spec("12-") == [("pages", 12, None)]
+    assert parse_page_spec("3 to 5") == [("pages", 3, 5)]
+    for bad in ("5-3", "0"):
+        try:
+            parse_page_spec(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"{bad!r} was accepted")
+    print("✅ Ranges, open ranges and chapter names parsed")
+
+
+def test_indexed_ranges():
+    print("\n🧪 Testing page-range extraction from the saved index...")
+    pdf = make_text_pdf(PAGES, outline=OUTLINE)
+    index_store = podkaast_app.page_index
+    sandbox = podkaast_app.pdf_sandbox
+    podkaast_app.page_index = PageIndexStore(tempfile.mkdtemp())
+    try:
+        chapter = podkaast_app.extract_text_from_pdf(pdf, pages="chapter 2")
+        assert "Herons" in chapter and "Dippers" in chapter, chapter
+        assert "Welcome" not in chapter and "Counting" not in chapter
+
+        index = podkaast_app.page_index.load(podkaast_app.content_hash(pdf))
+        assert index.page_count == 6
+        assert [node["title"] for node in index.outline] == [title for title, _ in OUTLINE]
+        assert list(index.chapter_pages("Results")) == [4, 5]
+
+        # a fresh store reads the header from disk, and nothing parses the PDF again
+        podkaast_app.page_index = PageIndexStore(podkaast_app.page_index.root)
+        podkaast_app.pdf_sandbox = NoParsing()
+        assert podkaast_app.extract_text_from_pdf(pdf, pages="5-") == "\n\n".join(PAGES[4:])
+        assert podkaast_app.extract_text_from_pdf(pdf, pages="1, 3") == PAGES[0] + "\n\n" + PAGES[2]
+        assert podkaast_app.extract_text_from_pdf(pdf, pages="9").startswith("Error: page 9 is past the end")
+        assert "no chapter matching" in podkaast_app.extract_text_from_pdf(pdf, pages="Epilogue")
+    finally:
+        podkaast_app.page_index = index_store
+        podkaast_app.pdf_sandbox = sandbox
+    print("✅ Chapters resolved from the outline; later ranges read only the index")
+
+
+def test_api_pages():
+    print("\n🧪 Testing the pages option through the API...")
+    client = TestClient(podkaast_app.app)
+    pdf = make_text_pdf(PAGES, outline=OUTLINE)
+    files = [("files", ("guide.pdf", pdf, "application/pdf"))]
+    index_store = podkaast_app.page_index
+    podkaast_app.page_index = PageIndexStore(tempfile.mkdtemp())
+    try:
+        assert client.post(f"{API}/conversions", files=files, data={"pages": "5-3"}).status_code == 422
+        with stub_engines():
+            response = client.post(
+                f"{API}/conversions", files=files,
+                data={"pages": "Chapter 3", "advanced_audio": "false", "length": "Short (1-2 min)"}
+            )
+            assert response.status_code == 202, response.text
+            status = wait_for(client, response.json()["job_id"])
+    finally:
+        podkaast_app.page_index = index_store
+
+    assert status["status"] == "done", status
+    assert "survey found more dippers" in status["transcript"]
+    assert "Kingfishers" not in status["transcript"]
+    print("✅ Conversion limited to the requested chapter")
+
+
+def test_pruning():
+    print("\n🧪 Testing page index pruning...")
+    store = PageIndexStore(tempfile.mkdtemp(), max_bytes=2500, max_age=3600)
+    document = Document.from_pages(["x" * 900])
+    for key in ("a" * 64, "b" * 64, "c" * 64):
+        assert store.save(key, document) is not None
+        time.sleep(0.01)
+    # the oldest index no longer fits; loading the second marks it used, so the third is next to go
+    assert store.load("a" * 64) is None and store.load("b" * 64) is not None
+    time.sleep(0.01)
+    store.save("d" * 64, document)
+    assert store.load("c" * 64) is None and store.load("b" * 64) and store.load("d" * 64)
+
+    header = store._paths("b" * 64)[1]
+    os.utime(header, (time.time() - 7200, time.time() - 7200))
+    store.prune()
+    assert store.load("b" * 64) is None and not store._paths("b" * 64)[0].exists()
+    assert store.load("d" * 64) is not None
+    print("✅ Least recently used and expired indexes deleted with their text")
+
+
+def main():
+    print("📑 Podkaast Page Index Test")
+    print("=" * 40)
+
+    tests = [
+        ("Page Spec", test_page_spec),
+        ("Indexed Ranges", test_indexed_ranges),
+        ("API Pages", test_api_pages),
+        ("Pruning", test_pruning)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            results.append((test_name, True))
+        except Exception as e:
+            print(f"❌ {test_name} test failed: {e}")
+            results.append((test_name, False))
+
+    print("\n" + "=" * 40)
+    print("📊 Test Results Summary:")
+
+    all_passed = True
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{test_name}: {status}")
+        if not result:
+            all_passed = False
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
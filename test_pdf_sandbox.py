@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+import os
+import sys
+import tempfile
+import time
+
+from cancellation import CancelToken, Cancelled
+from pdf_sandbox import PdfSandbox, SandboxError
+from sample_pdf import make_text_pdf
+
+
+def write_pdf(pages):
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
+        tmp_file.write(make_text_pdf(pages))
+        return tmp_file.name
+
+
+def pid_parser(path):
+    yield 0, str(os.getpid()), None
+
+
+def parent_parser(path):
+    yield 0, str(os.getppid()), None
+
+
+def sleepy_parser(path):
+    if path == "slow":
+        time.sleep(30)
+    index = 0
+    while path == "endless":
+        yield index, "more", None
+        index += 1
+    yield 0, "fast", None
+
+
+def greedy_parser(path):
+    hoard = bytearray(512 * 1024 * 1024)
+    yield 0, str(len(hoard)), None
+
+
+def spinning_parser(path):
+    while True:
+        pass
+    yield
+
+
+def test_extracts_pages_out_of_process():
+    print("🧪 Testing sandboxed page extraction...")
+    path = write_pdf(["First page about rivers.", "Second page about lakes."])
+    sandbox = PdfSandbox(max_workers=1)
+    try:
+        pages, images = sandbox.extract_pages(path)
+        assert "rivers" in pages[0] and "lakes" in pages[1]
+        assert images == {}
+        assert sandbox.stats()["started"] == 1
+        print("✅ Page text streamed back from the worker")
+    finally:
+        sandbox.shutdown()
+        os.unlink(path)
+
+
+def test_workers_are_recycled():
+    print("\n🧪 Testing worker recycling...")
+    sandbox = PdfSandbox(max_workers=1, max_jobs=2, parser=pid_parser)
+    try:
+        pids = [sandbox.extract_pages("any")[0][0] for _ in range(4)]
+        assert pids[0] == pids[1] and pids[2] == pids[3] and pids[1] != pids[2]
+        assert str(os.getpid()) not in pids
+        print("✅ A fresh worker replaces one that reached its job limit")
+    finally:
+        sandbox.shutdown()
+
+
+def test_workers_are_not_forked_from_the_server():
+    print("\n🧪 Testing workers start from the forkserver...")
+    sandbox = PdfSandbox(max_workers=1, parser=parent_parser)
+    try:
+        # the server runs threads by now, so forking it directly could copy a held lock into the worker
+        assert sandbox.extract_pages("any")[0][0] != str(os.getpid())
+        print("✅ Workers are forked from the single-threaded forkserver")
+    finally:
+        sandbox.shutdown()
+
+
+def test_timeout_and_cancel_kill_the_worker():
+    print("\n🧪 Testing per-document timeout and cancellation...")
+    sandbox = PdfSandbox(max_workers=1, timeout=0.5, parser=sleepy_parser)
+    try:
+        started = time.monotonic()
+        try:
+            sandbox.extract_pages("slow")
+            raise AssertionError("slow document should time out")
+        except SandboxError as e:
+            assert "timed out" in str(e)
+        assert time.monotonic() - started < 3
+
+        # a worker that keeps sending pages never lets a poll time out
+        started = time.monotonic()
+        try:
+            sandbox.extract_pages("endless")
+            raise AssertionError("endless document should time out")
+        except SandboxError as e:
+            assert "timed out" in str(e)
+        assert time.monotonic() - started < 3
+
+        token = CancelToken()
+        token.cancel("user left")
+        try:
+            sandbox.extract_pages("slow", token)
+            raise AssertionError("cancelled extraction should stop")
+        except Cancelled:
+            pass
+
+        assert sandbox.extract_pages("quick")[0] == ["fast"]
+        assert sandbox.stats()["killed"] == 3
+        print("✅ Stuck workers are killed and replaced")
+    finally:
+        sandbox.shutdown()
+
+
+def test_resource_limits():
+    print("\n🧪 Testing memory and CPU limits...")
+    sandbox = PdfSandbox(max_workers=1, memory_mb=256, parser=greedy_parser)
+    try:
+        try:
+            sandbox.extract_pages("big")
+            raise AssertionError("allocation above the memory limit should fail")
+        except SandboxError as e:
+            assert "256 MB" in str(e)
+    finally:
+        sandbox.shutdown()
+
+    sandbox = PdfSandbox(max_workers=1, cpu_seconds=1, timeout=30, parser=spinning_parser)
+    try:
+        started = time.monotonic()
+        try:
+            sandbox.extract_pages("loop")
+            raise AssertionError("CPU-bound parse should be stopped")
+        except SandboxError as e:
+            assert "limit" in str(e)
+        assert time.monotonic() - started < 10
+        print("✅ Memory and CPU limits stop runaway parses")
+    finally:
+        sandbox.shutdown()
+
+
+def main():
+    print("🧱 Podkaast PDF Sandbox Test")
+    print("=" * 40)
+
+    tests = [
+        ("Extraction", test_extracts_pages_out_of_process),
+        ("Recycling", test_workers_are_recycled),
+        ("Forkserver", test_workers_are_not_forked_from_the_server),
+        ("Timeout and Cancel", test_timeout_and_cancel_kill_the_worker),
+        ("Resource Limits", test_resource_limits)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            results.append((test_name, True))
+        except Exception as e:
+            print(f"❌ {test_name} test failed: {e}")
+            results.append((test_name, False))
+
+    print("\n" + "=" * 40)
+    print("📊 Test Results Summary:")
+
+    all_passed = True
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{test_name}: {status}")
+        if not result:
+            all_passed = False
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+import os
+import sys
+import tempfile
+import wave
+
+from phrase_memo import PhraseMemo, assemble_audio
+
+
+class FakeEngine:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, text):
+        self.calls.append(text)
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_file:
+            path = tmp_file.name
+        with wave.open(path, "wb") as output:
+            output.setnchannels(1)
+            output.setsampwidth(2)
+            output.setframerate(8000)
+            output.writeframes(b"\x01\x00" * len(text))
+        return path
+
+
+def test_static_segments_are_memoized():
+    print("🧪 Testing phrase memo splicing...")
+    segments = [("Welcome!", True), ("Dynamic body text", False), ("Goodbye!", True)]
+
+    with tempfile.TemporaryDirectory() as memo_dir:
+        memo = PhraseMemo(memo_dir)
+        engine = FakeEngine()
+
+        first = assemble_audio(segments, engine, memo, "English", "fake", "default", ".wav")
+        second = assemble_audio(segments, engine, memo, "English", "fake", "default", ".wav")
+        third = assemble_audio(segments, engine, memo, "Spanish", "fake", "default", ".wav")
+
+        try:
+            assert engine.calls.count("Welcome!") == 2
+            assert engine.calls.count("Dynamic body text") == 3
+            assert memo.hits == 2
+
+            with wave.open(second, "rb") as audio:
+                assert audio.getnframes() == len("Welcome!Dynamic body textGoodbye!")
+            print("✅ Static segments synthesized once per language")
+        finally:
+            for path in (first, second, third):
+                os.unlink(path)
+
+
+def test_failed_segment_returns_none():
+    print("\n🧪 Testing failed synthesis...")
+    with tempfile.TemporaryDirectory() as memo_dir:
+        result = assemble_audio([("Hello", False)], lambda text: None, PhraseMemo(memo_dir), "English", "fake", "default", ".wav")
+        assert result is None
+    print("✅ Failure is reported so callers can fall back")
+
+
+def main():
+    print("🎵 Podkaast Phrase Memo Test")
+    print("=" * 40)
+
+    tests = [
+        ("Static Segment Memo", test_static_segments_are_memoized),
+        ("Failed Segment", test_failed_segment_returns_none)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            results.append((test_name, True))
+        except Exception as e:
+            print(f"❌ {test_name} test failed: {e}")
+            results.append((test_name, False))
+
+    print("\n" + "=" * 40)
+    print("📊 Test Results Summary:")
+
+    all_passed = True
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{test_name}: {status}")
+        if not result:
+            all_passed = False
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+import importlib
+import os
+import sys
+
+from fastapi.testclient import TestClient
+
+import pipeline
+import podkaast_app
+import profiler
+from pipeline import Pipeline, convert_mock, convert_remote
+from sample_pdf import make_text_pdf
+from test_api import stub_engines
+
+ARGS = ("", "Why bees dance", "Fun", "Short (1-2 min)", "English", True)
+
+
+def staged(name, audio, calls):
+    def convert(pdf_file, url, question, tone, length, language, use_advanced_audio, style="Monologue",
+                pages="", output="Episode", report=None, token=None):
+        calls.append(name)
+        report("scripting")
+        report("synthesizing")
+        if audio == "raise":
+            raise RuntimeError(f"{name} is down")
+        return audio, f"{name} transcript"
+    return convert
+
+
+def test_stage_order_and_hooks():
+    print("🧪 Testing stage selection, fallback and timing hooks...")
+    calls, timed, reported, stored = [], [], [], []
+    stages = {
+        "local": staged("local", "local.wav", calls),
+        "remote": staged("remote", "raise", calls),
+        "mock": staged("mock", None, calls),
+    }
+    core = Pipeline(stages, config="remote,local", store=lambda path: stored.append(path) or f"stored/{path}")
+    core.add_hook(lambda stage, step, seconds: timed.append((stage, step)))
+
+    audio, transcript = core.convert([b"%PDF"], *ARGS, report=reported.append)
+    assert (audio, transcript) == ("stored/local.wav", "local transcript")
+    assert calls == ["remote", "local"] and stored == ["local.wav"]
+    assert reported == ["scripting", "synthesizing"] * 2
+    assert timed == [("remote", "scripting"), ("remote", "synthesizing"),
+                     ("local", "scripting"), ("local", "synthesizing")]
+    assert core.stats()["steps"]["local.synthesizing"]["runs"] == 1
+
+    # the last stage's answer stands even without audio
+    assert core.configure("remote,mock").convert([b"%PDF"], *ARGS) == (None, "mock transcript")
+    assert stored == ["local.wav"]
+
+    for bad in ("", "local,cloud"):
+        try:
+            core.configure(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"{bad!r} was accepted")
+    assert Pipeline(stages, config="cloud").active == ["local"]
+    print("✅ Stages tried in order, every step timed, only audio stored")
+
+
+class FakeClient:
+    calls = []
+
+    def __init__(self, space):
+        self.space = space
+
+    def predict(self, files, **kwargs):
+        with open(files[0], "rb") as pdf:
+            FakeClient.calls.append((self.space, pdf.read(), kwargs))
+        return "remote.mp3", "remote transcript"
+
+
+def test_remote_and_mock():
+    print("\n🧪 Testing the remote and mock stages...")
+    client, handle = pipeline.Client, pipeline.handle_file
+    pipeline.Client, pipeline.handle_file = FakeClient, lambda path: path
+    try:
+        assert convert_remote([b"%PDF-1", b"%PDF-2"], *ARGS) == ("remote.mp3", "remote transcript")
+        assert convert_remote([], *ARGS)[0] is None
+    finally:
+        pipeline.Client, pipeline.handle_file = client, handle
+    space, pdf, kwargs = FakeClient.calls[0]
+    assert space == pipeline.REMOTE_SPACE and pdf == b"%PDF-1"
+    assert kwargs["question"] == "Why bees dance" and kwargs["api_name"] == "/generate_podcast"
+
+    audio, transcript = convert_mock([b"%PDF"], *ARGS)
+    assert audio is None and "**Topic:** Why bees dance" in transcript and "Size: 4 bytes" in transcript
+    assert convert_mock(None, *ARGS)[1].startswith("Error")
+    print("✅ Remote sends the first PDF to the Space, mock answers without audio")
+
+
+def test_app_entry_points():
+    print("\n🧪 Testing that the app and the legacy entry points share the core...")
+    core = podkaast_app.conversion_pipeline
+    assert podkaast_app.convert_pdf_to_podcast == core.convert
+    demo = podkaast_app.demo
+    mount_routes = podkaast_app.mount_routes
+    launched = []
+    demo.launch = lambda **kwargs: launched.append(kwargs)
+    demo.block_thread = lambda: None
+    podkaast_app.mount_routes = lambda app: None
+    try:
+        for module, stages in (("podcast_app", ["remote"]), ("podcast_app_fallback", ["remote", "mock"]),
+                               ("podcast_app_working", ["local"])):
+            core.configure("local")
+            entry = importlib.import_module(module)
+            # importing an entry point leaves the shared core alone; launching it picks the stages
+            assert entry.demo is demo and core.active == ["local"], (module, core.active)
+            podkaast_app.launch_app(pipeline=entry.PIPELINE, share=True)
+            assert core.active == stages and launched[-1]["share"], (module, core.active)
+    finally:
+        del demo.launch, demo.block_thread
+        podkaast_app.mount_routes = mount_routes
+        core.configure("local")
+
+    token = profiler.ADMIN_TOKEN
+    profiler.ADMIN_TOKEN = "secret"
+    try:
+        with stub_engines():
+            audio, transcript = podkaast_app.convert_pdf_to_podcast(
+                [make_text_pdf(["Honeybees share the way to flowers by dancing in the hive."])], *ARGS
+            )
+            assert audio and os.path.dirname(audio).startswith(str(podkaast_app.audio_store.root)), audio
+        client = TestClient(podkaast_app.app)
+        assert client.get("/podkaast/admin/pipeline").status_code == 401
+        stats = client.get("/podkaast/admin/pipeline", headers={"X-Admin-Token": "secret"}).json()
+    finally:
+        profiler.ADMIN_TOKEN = token
+    assert stats["pipeline"] == ["local"] and stats["steps"]["local.synthesizing"]["runs"] >= 1
+    assert "hit_rate" in stats["caches"]["text"]
+    print(f"✅ Local conversion stored in the audio store; {len(stats['steps'])} steps timed")
+
+
+def main():
+    print("🧩 Podkaast Pipeline Test")
+    print("=" * 40)
+
+    tests = [
+        ("Stage Order and Hooks", test_stage_order_and_hooks),
+        ("Remote and Mock", test_remote_and_mock),
+        ("App Entry Points", test_app_entry_points)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            results.append((test_name, True))
+        except Exception as e:
+            print(f"❌ {test_name} test failed: {e}")
+            results.append((test_name, False))
+
+    print("\n" + "=" * 40)
+    print("📊 Test Results Summary:")
+
+    all_passed = True
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{test_name}: {status}")
+        if not result:
+            all_passed = False
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import podkaast_app
+import pregeneration
+from jobs import JobManager
+from pipeline import Pipeline
+from pregeneration import PREGEN_USER, Pregenerator, parse_hours
+from sample_pdf import make_text_pdf
+from test_api import stub_engines
+
+HANDBOOK = make_text_pdf(["New starters receive a laptop, a badge and a mentor during their first week."])
+SETTINGS = ("", "Fun", "Short (1-2 min)", "English", False, "Monologue", "", "Episode")
+
+
+def at_hour(hour):
+    return datetime.now().replace(hour=hour, minute=30).timestamp()
+
+
+def test_hours():
+    print("🧪 Testing off-peak hour windows...")
+    assert parse_hours("") == set()
+    assert parse_hours("1-4") == {1, 2, 3}
+    assert parse_hours("22-2") == {22, 23, 0, 1}
+    assert parse_hours("0-24, 5") == set(range(24))
+    for bad in ("3-3", "25-2", "night"):
+        try:
+            parse_hours(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"{bad!r} was accepted")
+    assert not Pregenerator(tempfile.mkdtemp(), hours="night").enabled
+    print("✅ Ranges, wrap-around and invalid windows handled")
+
+
+def test_popularity():
+    print("\n🧪 Testing request tracking and decay...")
+    pregenerator = Pregenerator(tempfile.mkdtemp(), hours="1-5", min_requests=2, half_life=3600)
+    now = at_hour(12)
+    popular = ([HANDBOOK], "") + SETTINGS
+    rare = ([HANDBOOK], "", "", "Formal") + SETTINGS[2:]
+
+    assert pregenerator.get(popular, now) is None and pregenerator.get(rare, now) is None
+    assert list(pregenerator.candidates(now)) == []
+    assert pregenerator.get(popular, now + 60) is None
+    assert pregenerator.get(([HANDBOOK], "https://example.com/news") + SETTINGS, now) is None
+
+    candidates = list(pregenerator.candidates(now + 60))
+    assert len(candidates) == 1 and candidates[0][1]["settings"]["tone"] == "Fun"
+    assert candidates[0][1]["requests"] == 2
+    # three half-lives later the combination is no longer popular
+    assert list(pregenerator.candidates(now + 60 + 10800)) == []
+
+    reloaded = Pregenerator(pregenerator.root, min_requests=2, half_life=3600)
+    assert len(list(reloaded.candidates(now + 60))) == 1
+    stats = pregenerator.stats()
+    assert stats["tracked"] == 2 and stats["misses"] == 3 and stats["hits"] == 0
+    print("✅ Popular combination found, URL requests ignored, counts decay and persist")
+
+
+def test_off_peak_render():
+    print("\n🧪 Testing off-peak pre-generation through the job queue...")
+    pregenerator = Pregenerator(tempfile.mkdtemp(), hours="1-5", min_requests=2)
+    jobs = JobManager(2)
+    args = ([HANDBOOK], "") + SETTINGS
+    with stub_engines():
+        pregenerator.start(jobs, podkaast_app.conversion_pipeline.render)
+        for _ in range(2):
+            pregenerator.get(args, at_hour(12))
+
+        assert pregenerator.run_once(at_hour(12)) is None
+        key = pregenerator.run_once(at_hour(2))
+        assert key is not None
+        assert [job.user for job in jobs._jobs.values()] == [PREGEN_USER]
+        assert pregenerator.run_once(at_hour(3)) is None
+
+        started = time.perf_counter()
+        audio, transcript = pregenerator.get(args, at_hour(13))
+        served = time.perf_counter() - started
+    assert os.path.exists(audio) and "laptop, a badge and a mentor" in transcript
+    stats = pregenerator.stats()
+    assert stats["pregenerated"] == 1 and stats["hits"] == 1 and stats["peak_hit_rate"] == 1 / 3
+    print(f"✅ Rendered off-peak as {PREGEN_USER}; peak request served in {served * 1000:.1f} ms")
+
+
+def test_pipeline_cache():
+    print("\n🧪 Testing the episode cache in the pipeline...")
+    calls, reported = [], []
+
+    def local(pdf_file, url, question, tone, length, language, use_advanced_audio, style="Monologue",
+              pages="", output="Episode", report=None, token=None):
+        calls.append(tone)
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_file:
+            return tmp_file.name, f"{tone} episode"
+
+    pregenerator = Pregenerator(tempfile.mkdtemp(), hours="1-5", min_requests=2)
+    core = Pipeline({"local": local}, config="local", cache=pregenerator)
+    args = ([HANDBOOK], "") + SETTINGS
+    first, second = core.convert(*args), core.convert(*args)
+    assert first[0] != second[0]
+    assert core.convert(*args, report=reported.append) == second
+    # the second conversion made the combination popular and kept its episode for the third
+    assert len(calls) == 2 and reported == ["cached"]
+    assert core.render(*args)[1] == "Fun episode" and len(calls) == 3
+    assert podkaast_app.conversion_pipeline.caches["episodes"] is podkaast_app.pregenerator
+    print("✅ Popular request answered from the cache without running a stage")
+
+
+def test_source_cleanup():
+    print("\n🧪 Testing cleanup of kept PDFs and failed renders...")
+    manual = make_text_pdf(["The coffee machine is descaled every Friday afternoon."])
+    pregenerator = Pregenerator(tempfile.mkdtemp(), hours="1-5", min_requests=1, max_source_age=3600)
+    sources = pregenerator.root / "sources"
+    now = time.time()
+    tracked = pregeneration.MAX_TRACKED
+    pregeneration.MAX_TRACKED = 1
+    try:
+        pregenerator.get(([HANDBOOK], "") + SETTINGS, now)
+        assert len(list(sources.glob("*.pdf"))) == 1
+        # the handbook's combination is forgotten, and its PDF with it
+        pregenerator.get(([manual], "") + SETTINGS, now + 60)
+    finally:
+        pregeneration.MAX_TRACKED = tracked
+    kept = list(sources.glob("*.pdf"))
+    assert len(kept) == 1 and kept[0].read_bytes() == manual
+
+    class FailedRender:
+        def result(self):
+            return None, "Error: renderer unavailable"
+
+    class FailingJobs:
+        scheduler = SimpleNamespace(stats=lambda: {"queued": 0, "running": 0})
+
+        def submit(self, render, *args, user=None):
+            return SimpleNamespace(future=FailedRender())
+
+    pregenerator.start(FailingJobs(), None)
+    assert pregenerator.run_once(at_hour(2)) is not None
+    reloaded = Pregenerator(pregenerator.root, min_requests=1)
+    assert all("failed" in entry for entry in reloaded.popularity.values())
+
+    pregenerator.prune_sources(now + 7200)
+    assert list(sources.glob("*.pdf")) == []
+    print("✅ Unreferenced and stale PDFs deleted; failures survive a restart")
+
+
+def main():
+    print("🌙 Podkaast Pre-generation Test")
+    print("=" * 40)
+
+    tests = [
+        ("Hours", test_hours),
+        ("Popularity", test_popularity),
+        ("Off-peak Render", test_off_peak_render),
+        ("Pipeline Cache", test_pipeline_cache),
+        ("Source Cleanup", test_source_cleanup)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            results.append((test_name, True))
+        except Exception as e:
+            print(f"❌ {test_name} test failed: {e}")
+            results.append((test_name, False))
+
+    print("\n" + "=" * 40)
+    print("📊 Test Results Summary:")
+
+    all_passed = True
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{test_name}: {status}")
+        if not result:
+            all_passed = False
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
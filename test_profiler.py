@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+import io
+import json
+import pstats
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+import podkaast_app
+import profiler
+from profiler import ConversionProfile
+from sample_pdf import make_text_pdf
+from test_api import API, stub_engines, wait_for
+
+
+def fake_convert(size, report=None, token=None):
+    report("parsing")
+    pieces = [str(index) * 20 for index in range(size)]
+    report("waiting")
+    time.sleep(0.05)
+    return "audio.wav", f"{len(pieces)} pieces"
+
+
+def test_stage_profiles():
+    print("🧪 Testing per-stage profiles of a conversion...")
+    stages = []
+    with tempfile.TemporaryDirectory() as profile_dir:
+        result = ConversionProfile(profile_dir).run(fake_convert, 20000, report=stages.append)
+        assert result == ("audio.wav", "20000 pieces")
+        assert stages == ["parsing", "waiting"]
+
+        directory = Path(profile_dir)
+        summary = json.loads((directory / "summary.json").read_text())
+        assert [stage["stage"] for stage in summary["stages"]] == ["starting", "parsing", "waiting"]
+        assert summary["stages"][2]["seconds"] >= 0.05
+
+        calls = pstats.Stats(str(directory / "01-parsing.pstats"))
+        assert any(path.endswith("test_profiler.py") for path, _, _ in calls.stats)
+        snapshot = tracemalloc.Snapshot.load(str(directory / "01-parsing.tracemalloc"))
+        assert snapshot.traces
+        assert "test_profiler.py" in (directory / "01-parsing-allocations.txt").read_text()
+
+        folded = (directory / "flamegraph.folded").read_text().splitlines()
+        assert any(line.startswith("waiting;") and "fake_convert" in line for line in folded)
+        assert all(line.rsplit(" ", 1)[1].isdigit() for line in folded)
+    assert not tracemalloc.is_tracing()
+    print(f"✅ {len(summary['stages'])} stages profiled, {summary['samples']} stack samples")
+
+
+def test_admin_routes():
+    print("\n🧪 Testing profiled API conversions and admin downloads...")
+    client = TestClient(podkaast_app.app)
+    pdf = make_text_pdf(["Profiling shows where a slow conversion spends its time."])
+    files = [("files", ("doc.pdf", pdf, "application/pdf"))]
+    data = {"language": "English", "advanced_audio": "false", "profile": "true"}
+    admin = {"X-Admin-Token": "secret"}
+
+    token = profiler.ADMIN_TOKEN
+    root = podkaast_app.profile_store.root
+    profiler.ADMIN_TOKEN = "secret"
+    podkaast_app.profile_store.root = Path(tempfile.mkdtemp())
+    try:
+        with stub_engines():
+            assert client.post(f"{API}/conversions", files=files, data=data).status_code == 403
+            response = client.post(f"{API}/conversions", files=files, data=data, headers=admin)
+            assert response.status_code == 202, response.text
+            job_id = response.json()["job_id"]
+            status = wait_for(client, job_id)
+        assert status["status"] == "done" and status["profile"] == job_id, status
+
+        assert client.get("/podkaast/admin/profiles").status_code == 401
+        listing = client.get("/podkaast/admin/profiles", headers=admin).json()["profiles"]
+        assert listing[0]["name"] == job_id
+        assert [stage["stage"] for stage in listing[0]["stages"]][1:] == ["extracting", "deduplicating", "scripting", "synthesizing"]
+
+        archive = client.get(f"/podkaast/admin/profiles/{job_id}.zip", headers=admin)
+        assert archive.status_code == 200
+        names = zipfile.ZipFile(io.BytesIO(archive.content)).namelist()
+        assert f"{job_id}/summary.json" in names and f"{job_id}/flamegraph.folded" in names
+
+        artifact = client.get(f"/podkaast/admin/profiles/{job_id}/04-synthesizing-calls.txt", headers=admin)
+        assert artifact.status_code == 200 and "function calls" in artifact.text
+        assert client.get(f"/podkaast/admin/profiles/{job_id}/..%2Fsummary.json", headers=admin).status_code == 404
+
+        profiler.ADMIN_TOKEN = ""
+        assert client.get("/podkaast/admin/profiles", headers=admin).status_code == 403
+    finally:
+        profiler.ADMIN_TOKEN = token
+        podkaast_app.profile_store.root = root
+    print(f"✅ Profile {job_id[:8]} downloaded with {len(names)} artifacts")
+
+
+def main():
+    print("🔬 Podkaast Profiler Test")
+    print("=" * 40)
+
+    tests = [
+        ("Stage Profiles", test_stage_profiles),
+        ("Admin Routes", test_admin_routes)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            results.append((test_name, True))
+        except Exception as e:
+            print(f"❌ {test_name} test failed: {e}")
+            results.append((test_name, False))
+
+    print("\n" + "=" * 40)
+    print("📊 Test Results Summary:")
+
+    all_passed = True
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{test_name}: {status}")
+        if not result:
+            all_passed = False
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
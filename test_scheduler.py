@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+import sys
+import threading
+import time
+
+from scheduler import FairScheduler, RateLimited, TokenBucket
+
+
+def blocker(gate, log=None, name=None):
+    def run():
+        if log is not None:
+            log.append(name)
+        gate.wait(5)
+        return name
+    return run
+
+
+def test_small_jobs_jump_ahead():
+    print("🧪 Testing size-aware fair ordering...")
+    scheduler = FairScheduler(1, user_share=1.0, rate_per_minute=600, burst=100)
+    gate = threading.Event()
+    order = []
+
+    scheduler.submit("heavy", 1, blocker(gate))
+    time.sleep(0.05)
+    futures = [scheduler.submit("heavy", 10, lambda index=index: order.append(f"heavy-{index}")) for index in range(3)]
+    futures.append(scheduler.submit("light", 1, lambda: order.append("light")))
+    gate.set()
+
+    for future in futures:
+        future.result(timeout=5)
+    assert order[0] == "light", order
+    print(f"✅ Order: {order}")
+
+
+def test_interleaves_users():
+    print("\n🧪 Testing weighted fair queuing across users...")
+    scheduler = FairScheduler(1, user_share=1.0, rate_per_minute=600, burst=100)
+    gate = threading.Event()
+    order = []
+
+    scheduler.submit("batch", 1, blocker(gate))
+    time.sleep(0.05)
+    futures = [scheduler.submit("batch", 1, lambda: order.append("batch")) for _ in range(6)]
+    futures += [scheduler.submit("other", 1, lambda: order.append("other")) for _ in range(2)]
+    gate.set()
+
+    for future in futures:
+        future.result(timeout=5)
+    assert order.index("other") <= 1 and order[:4].count("other") == 2, order
+    print("✅ A 6-job batch does not starve a second user")
+
+
+def test_user_share_cap():
+    print("\n🧪 Testing per-user worker cap...")
+    scheduler = FairScheduler(4, user_share=0.5, rate_per_minute=600, burst=100)
+    gate = threading.Event()
+    started = []
+
+    futures = [scheduler.submit("batch", 1, blocker(gate, started, index)) for index in range(4)]
+    time.sleep(0.2)
+    assert len(started) == 2, started
+    assert scheduler.stats()["queued"] == 2
+
+    other = scheduler.submit("other", 1, lambda: "done")
+    assert other.result(timeout=5) == "done"
+
+    gate.set()
+    assert sorted(future.result(timeout=5) for future in futures) == [0, 1, 2, 3]
+    print("✅ One user holds at most half the pool")
+
+
+def test_rate_limit():
+    print("\n🧪 Testing token-bucket rate limiting...")
+    scheduler = FairScheduler(1, rate_per_minute=1, burst=2)
+    scheduler.submit("spammer", 1, lambda: None).result(timeout=5)
+    scheduler.submit("spammer", 1, lambda: None).result(timeout=5)
+    try:
+        scheduler.submit("spammer", 1, lambda: None)
+        raise AssertionError("third submission should be limited")
+    except RateLimited as e:
+        assert 0 < e.retry_after <= 60
+    assert scheduler.submit("polite", 1, lambda: "ok").result(timeout=5) == "ok"
+
+    bucket = TokenBucket(rate=100, capacity=1)
+    assert bucket.take() == 0
+    assert bucket.take() > 0
+    time.sleep(0.02)
+    assert bucket.take() == 0
+    print("✅ Bursts are capped per user and refill over time")
+
+
+def main():
+    print("⚖️ Podkaast Scheduler Test")
+    print("=" * 40)
+
+    tests = [
+        ("Size Priority", test_small_jobs_jump_ahead),
+        ("Fair Queuing", test_interleaves_users),
+        ("User Cap", test_user_share_cap),
+        ("Rate Limit", test_rate_limit)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            results.append((test_name, True))
+        except Exception as e:
+            print(f"❌ {test_name} test failed: {e}")
+            results.append((test_name, False))
+
+    print("\n" + "=" * 40)
+    print("📊 Test Results Summary:")
+
+    all_passed = True
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{test_name}: {status}")
+        if not result:
+            all_passed = False
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
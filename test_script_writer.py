@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+import os
+import sys
+import tempfile
+import threading
+import time
+import wave
+
+import podkaast_app
+from audio_store import AudioStore
+from cancellation import CancelToken, Cancelled
+from duration import DurationEstimator
+from model_server_stub import StubModelServer
+from phrase_memo import PhraseMemo
+from sample_pdf import make_text_pdf
+from script_writer import LocalModelWriter, PromptCache, WriterService, section_prompt, stream_paragraphs
+
+DOCUMENT = " ".join(
+    f"Tidal study number {index} shows that coastal turbines deliver steady power through the night."
+    for index in range(16)
+)
+
+
+def make_service(stub, **kwargs):
+    return WriterService(LocalModelWriter(url=stub.url), PromptCache(tempfile.mkdtemp()), **kwargs)
+
+
+def fake_tts(text, language, token=None, speaker=0):
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_file:
+        path = tmp_file.name
+    with wave.open(path, "wb") as output:
+        output.setnchannels(1)
+        output.setsampwidth(2)
+        output.setframerate(8000)
+        output.writeframes(b"\x00\x01" * 200)
+    return path
+
+
+def test_batching_and_cache():
+    print("🧪 Testing micro-batching and the prompt cache...")
+    stub = StubModelServer().start()
+    try:
+        service = make_service(stub, window=0.2)
+        prompts = [section_prompt(f"Passage number {index} about tides and turbines.", "Fun", "English", 200)
+                   for index in range(4)]
+        results = [None, None]
+
+        def run(slot, subset):
+            results[slot] = service.complete(subset)
+
+        threads = [threading.Thread(target=run, args=(0, prompts[:2])), threading.Thread(target=run, args=(1, prompts[2:]))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(stub.requests) == 1 and len(stub.requests[0]) == 4, stub.requests
+        assert "Passage number 0" in results[0][0] and "Passage number 3" in results[1][1]
+
+        assert service.complete(prompts) == results[0] + results[1]
+        assert len(stub.requests) == 1
+    finally:
+        stub.stop()
+    print("✅ Two callers shared one batch of 4 prompts; the repeat was served from the cache")
+
+
+def test_paragraph_streaming():
+    print("\n🧪 Testing ordered paragraph streaming...")
+    stub = StubModelServer(token_delay=0.01).start()
+    try:
+        service = make_service(stub)
+        prompts = [section_prompt(" ".join(["word"] * 40 + [f"section{index}"]), "Formal", "English", 200)
+                   for index in range(2)]
+        started = time.perf_counter()
+        arrivals = []
+        paragraphs = []
+        for paragraph in stream_paragraphs(service.stream(prompts), len(prompts)):
+            arrivals.append(time.perf_counter() - started)
+            paragraphs.append(paragraph)
+    finally:
+        stub.stop()
+
+    assert len(paragraphs) == 4, paragraphs
+    assert paragraphs[1].endswith("section0") and paragraphs[3].endswith("section1")
+    assert arrivals[0] < arrivals[-1] - 0.1, arrivals
+    print(f"✅ First paragraph after {arrivals[0]:.2f}s, last after {arrivals[-1]:.2f}s")
+
+
+def test_failure_falls_back():
+    print("\n🧪 Testing fallback when the model server fails...")
+    stub = StubModelServer(fail=True).start()
+    try:
+        service = make_service(stub)
+        prompts = [section_prompt("Anything at all.", "Fun", "English", 100)]
+        paragraphs = list(stream_paragraphs(service.stream(prompts), 1, ["extractive text"]))
+        assert service.complete(prompts) == [None]
+    finally:
+        stub.stop()
+    assert paragraphs == ["extractive text"]
+    print("✅ Failed sections fall back to the extractive summary")
+
+
+class BlockingBackend:
+    """Writes the first piece of a batch, then waits to be released"""
+
+    model_id = "blocking"
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.batches = []
+
+    def stream_batch(self, prompts, token=None):
+        self.batches.append(list(prompts))
+        yield 0, "First piece."
+        self.release.wait(10)
+        for index in range(len(prompts)):
+            yield index, " The rest."
+
+
+def test_cancel_unsubscribes():
+    print("\n🧪 Testing a cancelled stream leaves the writer...")
+    backend = BlockingBackend()
+    service = WriterService(backend, PromptCache(tempfile.mkdtemp()), max_batch=1, window=0, concurrency=1)
+    token = CancelToken()
+    stream = service.stream(["First prompt.", "Second prompt."], token)
+    assert next(stream) == (0, "First piece.", False)
+
+    token.cancel()
+    try:
+        next(stream)
+        raise AssertionError("the stream was not cancelled")
+    except Cancelled:
+        pass
+    # the prompt being written keeps going without listeners; the one not sent yet is dropped
+    assert [pending.listeners for pending in service._inflight.values()] == [[]]
+    assert service._queue == []
+    backend.release.set()
+    deadline = time.time() + 10
+    while service._inflight and time.time() < deadline:
+        time.sleep(0.01)
+    assert not service._inflight
+    assert backend.batches == [["First prompt."]] and list(service.batches) == [1]
+    print("✅ Listeners removed on cancel and the unsent prompt never reached the backend")
+
+
+def test_cache_pruning():
+    print("\n🧪 Testing prompt cache pruning...")
+    cache = PromptCache(tempfile.mkdtemp(), max_age=3600)
+    keys = [PromptCache.key("local", prompt) for prompt in ("old", "used", "new")]
+    for age, key in zip((30, 20, 10), keys):
+        cache.put(key, "x" * 1000)
+        os.utime(cache.path_for(key), (time.time() - age, time.time() - age))
+    assert PromptCache(cache.root).get(keys[1]) is not None
+
+    cache.max_bytes = 2500
+    cache.prune()
+    assert [cache.path_for(key).exists() for key in keys] == [False, True, True]
+    cache.prune(now=time.time() + 7200)
+    assert not any(cache.path_for(key).exists() for key in keys)
+    print("✅ Least recently used and expired texts are deleted from disk")
+
+
+def test_conversion_with_writer():
+    print("\n🧪 Testing a conversion scripted by the local model...")
+    stub = StubModelServer().start()
+    writer = podkaast_app.script_writer
+    engines = dict(podkaast_app.TTS_ENGINES)
+    memo = podkaast_app.phrase_memo
+    estimator = podkaast_app.duration_estimator
+    store_root = podkaast_app.audio_store.root
+    podkaast_app.script_writer = make_service(stub)
+    podkaast_app.TTS_ENGINES.update(gtts=(fake_tts, ".wav"), pyttsx3=(fake_tts, ".wav"))
+    podkaast_app.phrase_memo = PhraseMemo(tempfile.mkdtemp())
+    podkaast_app.duration_estimator = DurationEstimator(tempfile.mktemp(suffix=".json"))
+    podkaast_app.audio_store.root = AudioStore(tempfile.mkdtemp()).root
+    try:
+        audio, transcript = podkaast_app.convert_pdf_to_podcast(
+            [make_text_pdf([DOCUMENT])], "", "", "Formal", "Short (1-2 min)", "English", True
+        )
+        dialogue_audio, dialogue = podkaast_app.convert_pdf_to_podcast(
+            [make_text_pdf([DOCUMENT])], "", "", "Formal", "Short (1-2 min)", "English", True, "Dialogue"
+        )
+    finally:
+        podkaast_app.script_writer = writer
+        podkaast_app.TTS_ENGINES.update(engines)
+        podkaast_app.phrase_memo = memo
+        podkaast_app.duration_estimator = estimator
+        podkaast_app.audio_store.root = store_root
+        stub.stop()
+
+    assert audio and dialogue_audio, transcript
+    assert "## Main Content" in transcript and "Tidal study" in transcript
+    assert "**Alex:**" in dialogue
+    # both episodes summarize the same document the same way, so the dialogue reuses the cached sections
+    assert len(stub.requests) == 1, stub.requests
+    print(f"✅ Episode scripted from {len(stub.requests[0])} model-written sections")
+
+
+def main():
+    print("✍️ Podkaast Script Writer Test")
+    print("=" * 40)
+
+    tests = [
+        ("Batching and Cache", test_batching_and_cache),
+        ("Paragraph Streaming", test_paragraph_streaming),
+        ("Failure Fallback", test_failure_falls_back),
+        ("Cancel Unsubscribes", test_cancel_unsubscribes),
+        ("Cache Pruning", test_cache_pruning),
+        ("Conversion with Writer", test_conversion_with_writer)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            results.append((test_name, True))
+        except Exception as e:
+            print(f"❌ {test_name} test failed: {e}")
+            results.append((test_name, False))
+
+    print("\n" + "=" * 40)
+    print("📊 Test Results Summary:")
+
+    all_passed = True
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{test_name}: {status}")
+        if not result:
+            all_passed = False
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+import random
+import sys
+import time
+
+from summarizer import Summarizer, speech_budget, summarize_text
+
+DOCUMENT = """
+Solar panels convert sunlight into electricity using photovoltaic cells.
+The photovoltaic cells in solar panels are made from silicon wafers.
+Electricity from solar panels can be stored in batteries for use at night.
+Batteries let households use solar electricity after sunset.
+My neighbour painted his fence green last summer.
+Grid operators balance solar electricity with other sources of power.
+The cafeteria serves soup on Tuesdays and Thursdays.
+"""
+
+
+def test_central_sentences_win():
+    print("🧪 Testing TF-IDF + TextRank ranking...")
+    summary, points = summarize_text(DOCUMENT, budget=200, key_points=2)
+
+    assert "solar" in summary.lower()
+    assert "fence" not in summary and "cafeteria" not in summary
+    assert len(summary) <= 200
+    assert len(points) == 2 and all("solar" in point.lower() or "batteries" in point.lower() for point in points)
+
+    lines = [line.strip() for line in DOCUMENT.strip().splitlines()]
+    positions = [lines.index(sentence) for sentence in Summarizer().resources.split_sentences(summary)]
+    assert positions == sorted(positions)
+    print(f"✅ Summary keeps on-topic sentences in document order: {summary[:60]}...")
+
+
+def test_query_bias_and_incremental_pages():
+    print("\n🧪 Testing incremental pages and question focus...")
+    summarizer = Summarizer()
+    for page in DOCUMENT.strip().splitlines():
+        summarizer.add_page(page)
+    assert len(summarizer) == 7
+
+    summary, _ = summarizer.summarize(80, query="What do batteries do?")
+    assert "batteries" in summary.lower(), summary
+    print("✅ The question pulls matching sentences into the summary")
+
+
+def test_budget_and_languages():
+    print("\n🧪 Testing duration budgets...")
+    assert speech_budget("Short (1-2 min)") < speech_budget("Medium (3-5 min)")
+    assert speech_budget("Medium (3-5 min)", "Japanese") < speech_budget("Medium (3-5 min)", "English")
+
+    chinese = "太阳能电池板把阳光转化为电能。电池可以储存太阳能电力。我的邻居去年把篱笆漆成绿色。太阳能电力让电网更加清洁。"
+    summary, _ = summarize_text(chinese, "Chinese", budget=30)
+    assert summary and "篱笆" not in summary
+    print("✅ Budgets follow episode length and language speech rate")
+
+
+def test_large_document():
+    print("\n🧪 Testing batched indexing of 100k sentences...")
+    rng = random.Random(7)
+    vocabulary = [f"term{index}" for index in range(20000)]
+    pages = [[" ".join(rng.choices(vocabulary, k=12)) + "." for _ in range(1000)] for _ in range(100)]
+
+    started = time.perf_counter()
+    summarizer = Summarizer()
+    for page in pages:
+        summarizer.add_page(" ".join(page))
+    summary, points = summarizer.summarize(speech_budget("Medium (3-5 min)"), key_points=3)
+    elapsed = time.perf_counter() - started
+
+    sentences = [sentence for page in pages for sentence in page]
+    assert len(summarizer) == len(summarizer.document.sentences) == 100000
+    # every row points at its sentence's bytes and holds its words in order, as per-sentence indexing would
+    for row in rng.sample(range(len(sentences)), 1000):
+        segment = summarizer.document.sentences[summarizer._rows[row]]
+        assert segment.text == sentences[row] and summarizer._lengths[row] == len(sentences[row])
+        terms = summarizer._terms[summarizer._offsets[row]:summarizer._offsets[row + 1]]
+        assert [summarizer.vocabulary[word] for word in sentences[row][:-1].split()] == list(terms)
+    assert len(summarizer.vocabulary) <= len(vocabulary)
+
+    chosen = [sentences.index(sentence) for sentence in summarizer.resources.split_sentences(summary)]
+    assert chosen and chosen == sorted(chosen)
+    assert len(summary) <= speech_budget("Medium (3-5 min)") and len(points) == 3
+    print(f"✅ Offsets and terms match each sentence; {len(chosen)} sentences selected in {elapsed:.2f}s")
+
+
+def main():
+    print("📝 Podkaast Summarizer Test")
+    print("=" * 40)
+
+    tests = [
+        ("Ranking", test_central_sentences_win),
+        ("Incremental and Query", test_query_bias_and_incremental_pages),
+        ("Budgets", test_budget_and_languages),
+        ("Large Document", test_large_document)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            results.append((test_name, True))
+        except Exception as e:
+            print(f"❌ {test_name} test failed: {e}")
+            results.append((test_name, False))
+
+    print("\n" + "=" * 40)
+    print("📊 Test Results Summary:")
+
+    all_passed = True
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{test_name}: {status}")
+        if not result:
+            all_passed = False
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
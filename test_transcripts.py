@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import podkaast_app
+from cancellation import CancelToken
+from cluster import Cluster, RemoteJob, SharedStore
+from jobs import JobManager
+from sample_pdf import make_text_pdf
+from test_api import stub_engines
+from transcripts import TranscriptFeeds, TranscriptPages, paginate
+
+REPORT = "\n\n".join(
+    f"Section {index} covers the quarterly results of region {index}, with sales, costs and the outlook for next year."
+    for index in range(40)
+)
+
+
+def ui_handler(name):
+    return next(block.fn for block in podkaast_app.demo.fns.values() if block.name == name)
+
+
+async def run_conversion(handle_conversion):
+    updates = []
+    async for update in handle_conversion(
+        [make_text_pdf([REPORT])], "", "", "Fun", "Medium (3-5 min)", "English", False
+    ):
+        updates.append(update)
+    return updates
+
+
+def test_pagination():
+    print("🧪 Testing transcript pagination...")
+    transcript = "\n\n".join(["# Episode", "a" * 120, "b" * 120, "## Part two", "c" * 120, "d" * 500, "e" * 40])
+    pages = paginate(transcript, page_chars=300)
+    assert "\n\n".join(pages) == transcript
+    # the heading starts a page once the first one is half full; the long paragraph stands alone
+    assert pages[1].startswith("## Part two") and pages[2] == "d" * 500, pages
+    assert all(len(page) <= 300 for page in pages if "d" * 500 not in page)
+    assert paginate("") == [""] and paginate("Short.", page_chars=300) == ["Short."]
+    print(f"✅ {len(pages)} pages, split at headings and paragraph breaks")
+
+
+def test_page_cache():
+    print("\n🧪 Testing pages cached per transcript hash...")
+    pages = TranscriptPages(tempfile.mkdtemp(), page_chars=1000, max_transcripts=2)
+    digest = pages.add(REPORT)
+    assert digest and pages.add(REPORT) == digest
+    count = pages.count(digest)
+    assert count == len(paginate(REPORT, 1000)) > 3
+
+    first = pages._page_path(digest, 1)
+    written = os.path.getmtime(first)
+    time.sleep(0.01)
+    pages.add(REPORT)
+    assert os.path.getmtime(first) == written
+
+    text, number, total = pages.page(digest, 99)
+    assert number == total == count and "Section 39" in text
+    assert pages.page(digest, 0)[1] == 1 and pages.page("0" * 64, 1) is None
+
+    for extra in ("First other report.", "Second other report."):
+        pages.add(extra)
+        time.sleep(0.01)
+    assert pages.count(digest) == 0 and len(os.listdir(pages.root)) == 2
+    print(f"✅ {count} pages written once, clamped on lookup, oldest transcripts pruned")
+
+
+def test_feeds():
+    print("\n🧪 Testing live transcript feeds...")
+    feeds = TranscriptFeeds()
+    token = CancelToken()
+    segments = [(f"Paragraph {index} " + "x" * 40, False) for index in range(10)]
+    assert list(feeds.follow(segments, token)) == segments
+    count, tail = feeds.tail(token, max_chars=160)
+    assert count == 10 and tail == segments[-3:]
+    assert feeds.tail(token, max_chars=1)[1] == segments[-1:]
+    assert feeds.tail(CancelToken()) == (0, [])
+    feeds.publish(None, segments[0])
+    print("✅ Segments published as consumed; only the latest page read back")
+
+
+def test_streaming_ui():
+    print("\n🧪 Testing the streaming, paginated transcript view...")
+    handle_conversion = ui_handler("handle_conversion")
+    pages = podkaast_app.transcript_pages
+    podkaast_app.transcript_pages = TranscriptPages(tempfile.mkdtemp(), page_chars=400)
+
+    try:
+        with stub_engines():
+            synthesize = podkaast_app.TTS_ENGINES["pyttsx3"][0]
+
+            def slow(text, *rest, **kwargs):
+                time.sleep(0.15)
+                return synthesize(text, *rest, **kwargs)
+
+            podkaast_app.TTS_ENGINES.update(pyttsx3=(slow, ".wav"))
+            updates = asyncio.run(run_conversion(handle_conversion))
+        audio, text, status, digest, number, label = updates[-1]
+        streamed = [update[1] for update in updates[:-1]]
+        assert status.startswith("✅") and os.path.exists(audio), status
+        assert streamed and all(update.endswith("✍️ *Writing...*") for update in streamed)
+        assert len(streamed[-1]) < len(REPORT)
+
+        count = podkaast_app.transcript_pages.count(digest)
+        assert number == 1 and label == f"Page 1 of {count}" and count > 1 and len(text) <= 400
+        last_text, last, last_label = ui_handler("next_page")(digest, count)
+        assert last == count and last_label == label.replace("Page 1", f"Page {count}") and last_text != text
+        assert ui_handler("previous_page")(digest, 2)[:2] == (text, 1)
+        assert podkaast_app.transcript_page(None, 3)[1:] == (1, "")
+    finally:
+        podkaast_app.transcript_pages = pages
+    print(f"✅ {len(streamed)} live updates, then page 1 of {count} with the rest on demand")
+
+
+def test_remote_job_ui():
+    print("\n🧪 Testing the transcript view for a job run by another replica...")
+    store = SharedStore(tempfile.mkdtemp())
+    jobs = podkaast_app.conversion_jobs
+    convert = podkaast_app.convert_pdf_to_podcast
+    # the dispatcher hands the job to a replica whose heartbeat is stale, and the worker adopts it
+    store.write_json("replicas/ghost.json", {"replica": "ghost", "url": "", "capacity": 8, "load": 0, "updated": 0})
+    dispatcher = Cluster(store, JobManager(1), convert, replica_id="dispatcher",
+                         resolve_audio=podkaast_app.audio_store.resolve)
+    dispatcher._replicas = {"ghost": {"replica": "ghost", "capacity": 8, "load": 0, "updated": time.time()}}
+    submitted = []
+    submit = dispatcher.submit
+    dispatcher.submit = lambda *args, **kwargs: submitted.append(submit(*args, **kwargs)) or submitted[-1]
+    podkaast_app.conversion_jobs = dispatcher
+    worker = None
+    try:
+        with stub_engines():
+            worker = Cluster(store, JobManager(1), convert, replica_id="worker", interval=0.05,
+                             resolve_audio=podkaast_app.audio_store.resolve).start()
+            updates = asyncio.run(run_conversion(ui_handler("handle_conversion")))
+    finally:
+        podkaast_app.conversion_jobs = jobs
+        if worker is not None:
+            worker.stop()
+    assert isinstance(submitted[0], RemoteJob)
+    audio, text, status, digest, number, label = updates[-1]
+    assert status.startswith("✅"), status
+    assert len(updates) == 1 and digest and "Section" in text
+    print("✅ Remote job finished without a live tail and shows its first page")
+
+
+def main():
+    print("📜 Podkaast Transcripts Test")
+    print("=" * 40)
+
+    tests = [
+        ("Pagination", test_pagination),
+        ("Page Cache", test_page_cache),
+        ("Feeds", test_feeds),
+        ("Streaming UI", test_streaming_ui),
+        ("Remote Job UI", test_remote_job_ui)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            results.append((test_name, True))
+        except Exception as e:
+            print(f"❌ {test_name} test failed: {e}")
+            results.append((test_name, False))
+
+    print("\n" + "=" * 40)
+    print("📊 Test Results Summary:")
+
+    all_passed = True
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{test_name}: {status}")
+        if not result:
+            all_passed = False
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+import atexit
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# run against an empty cache when started as a script; under pytest conftest.py has set one already
+if "PODKAAST_CACHE_DIR" not in os.environ:
+    os.environ["PODKAAST_CACHE_DIR"] = tempfile.mkdtemp(prefix="podkaast-test-")
+    atexit.register(shutil.rmtree, os.environ["PODKAAST_CACHE_DIR"], True)
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from podkaast_app import app, upload_registry
+from sample_pdf import make_text_pdf
+from uploads import UploadRegistry
+
+PDF = make_text_pdf(["Chunked uploads start work early.", "Second page of the upload test."])
+
+
+def start_upload(client):
+    response = client.post("/podkaast/uploads", json={"size": len(PDF), "filename": "test.pdf"})
+    assert response.status_code == 200, response.text
+    return response.json()["upload_id"]
+
+
+def test_out_of_order_chunks():
+    print("🧪 Testing chunked upload with the tail sent first...")
+    client = TestClient(app)
+    upload_id = start_upload(client)
+
+    tail = len(PDF) - 400
+    status = client.put(f"/podkaast/uploads/{upload_id}?offset={tail}", content=PDF[tail:]).json()
+    assert status["trailer"]["valid"] and status["trailer"]["root"] == 1
+    assert not status["complete"]
+
+    status = client.put(f"/podkaast/uploads/{upload_id}?offset=0", content=PDF[:300]).json()
+    assert status["page_count"] == 2, status
+    assert status["sha256"] is None
+
+    status = client.put(f"/podkaast/uploads/{upload_id}?offset=300", content=PDF[300:tail]).json()
+    assert status["complete"] and status["sha256"] == hashlib.sha256(PDF).hexdigest()
+
+    assert "Chunked uploads start work early." in upload_registry.get(upload_id).text(timeout=30)
+    print("✅ Trailer, page count and hash were ready before extraction")
+
+
+def test_repeat_upload_hits_cache():
+    print("\n🧪 Testing cache lookup for a repeated upload...")
+    client = TestClient(app)
+    pdf = make_text_pdf(["A document uploaded twice.", "Its text is extracted only once."])
+
+    statuses = []
+    for _ in range(2):
+        response = client.post("/podkaast/uploads", json={"size": len(pdf), "filename": "twice.pdf"})
+        upload_id = response.json()["upload_id"]
+        statuses.append(client.put(f"/podkaast/uploads/{upload_id}", content=pdf).json())
+        assert "uploaded twice" in upload_registry.get(upload_id).text(timeout=30)
+    assert statuses[0]["complete"] and not statuses[0]["cached"]
+    assert statuses[1]["complete"] and statuses[1]["cached"]
+    print("✅ Identical upload was answered from the text cache")
+
+
+def test_rejects_bad_chunks():
+    print("\n🧪 Testing upload validation...")
+    client = TestClient(app)
+    assert client.post("/podkaast/uploads", json={"size": 0}).status_code == 400
+    upload_id = start_upload(client)
+    assert client.put(f"/podkaast/uploads/{upload_id}?offset={len(PDF)}", content=b"x").status_code == 400
+    assert client.get("/podkaast/uploads/missing").status_code == 404
+    assert client.delete(f"/podkaast/uploads/{upload_id}").status_code == 200
+    print("✅ Invalid uploads are rejected")
+
+
+def test_upload_limits():
+    print("\n🧪 Testing open upload limits and expiry...")
+    registry = UploadRegistry(lambda path, digest: "text", lambda digest: None, max_sessions=2,
+                              max_bytes=2 * len(PDF), ttl=60, completed_ttl=5)
+    router_app = FastAPI()
+    router_app.include_router(registry.router())
+    client = TestClient(router_app)
+
+    def create(size=len(PDF)):
+        return client.post("/podkaast/uploads", json={"size": size})
+
+    first = create().json()["upload_id"]
+    assert create(len(PDF) + 1).status_code == 503
+    second = create().json()["upload_id"]
+    full = create()
+    assert full.status_code == 503 and full.headers["Retry-After"] == "60"
+
+    # age alone does not expire a session that is still receiving chunks
+    registry.get(second).created = time.time() - 120
+    assert client.put(f"/podkaast/uploads/{second}", content=PDF[:100]).status_code == 200
+    assert registry.get(second) is not None
+
+    # an idle session is discarded by the next chunk, which frees its slot and its file
+    path = registry.get(first).path
+    registry.get(first).last_activity = time.time() - 120
+    assert client.put(f"/podkaast/uploads/{second}?offset=100", content=PDF[100:]).json()["complete"]
+    assert registry.get(first) is None and not path.exists()
+    third = create().json()["upload_id"]
+
+    # a finished upload gives its slot back soon after its last use
+    registry.get(second).text(timeout=30)
+    registry.expire()
+    assert registry.get(second) is not None
+    registry.get(second).last_activity = time.time() - 10
+    registry.expire()
+    assert registry.get(second) is None and create().status_code == 200
+    registry.discard(third)
+    print("✅ Sessions and spooled bytes capped; idle and finished sessions expire")
+
+
+def main():
+    print("📤 Podkaast Chunked Upload Test")
+    print("=" * 40)
+
+    tests = [
+        ("Out-of-order Chunks", test_out_of_order_chunks),
+        ("Repeat Upload Cache", test_repeat_upload_hits_cache),
+        ("Chunk Validation", test_rejects_bad_chunks),
+        ("Upload Limits", test_upload_limits)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            results.append((test_name, True))
+        except Exception as e:
+            print(f"❌ {test_name} test failed: {e}")
+            results.append((test_name, False))
+
+    print("\n" + "=" * 40)
+    print("📊 Test Results Summary:")
+
+    all_passed = True
+    for test_name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{test_name}: {status}")
+        if not result:
+            all_passed = False
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
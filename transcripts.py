@@ -0,0 +1,140 @@
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+from pathlib import Path
+
+from cache import content_hash
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRANSCRIPT_DIR = Path(os.environ.get("PODKAAST_CACHE_DIR", Path.home() / ".cache" / "podkaast")) / "transcripts"
+# characters sent to the browser at once, for a finished page or the live tail of a script being written
+TRANSCRIPT_PAGE_CHARS = int(os.environ.get("PODKAAST_TRANSCRIPT_PAGE_CHARS", "20000"))
+# paginated transcripts kept on disk; the oldest are removed first
+MAX_TRANSCRIPTS = 1000
+
+
+def paginate(transcript, page_chars=TRANSCRIPT_PAGE_CHARS):
+    """Split a transcript into pages of about ``page_chars`` at paragraph breaks.
+
+    A heading starts a new page once the current one is half full, so pages
+    tend to begin at a chapter or section.
+    """
+    pages = []
+    current = []
+    size = 0
+    for paragraph in (transcript or "").split("\n\n"):
+        heading = paragraph.startswith("#")
+        if current and (size + len(paragraph) > page_chars or (heading and size >= page_chars // 2)):
+            pages.append("\n\n".join(current))
+            current, size = [], 0
+        current.append(paragraph)
+        size += len(paragraph) + 2
+    pages.append("\n\n".join(current))
+    return pages
+
+
+class TranscriptPages:
+    """Finished transcripts split into pages once per script hash.
+
+    Each page is its own file, so turning a page reads only that page and
+    a long transcript is never held in memory or sent to the browser whole.
+    """
+
+    def __init__(self, root=DEFAULT_TRANSCRIPT_DIR, page_chars=TRANSCRIPT_PAGE_CHARS, max_transcripts=MAX_TRANSCRIPTS):
+        self.root = Path(root)
+        self.page_chars = page_chars
+        self.max_transcripts = max_transcripts
+
+    def _page_path(self, digest, number):
+        return self.root / digest / f"{number}.md"
+
+    def add(self, transcript):
+        """Paginate a transcript unless it already was; returns its hash, or None when it cannot be stored"""
+        digest = content_hash(f"{self.page_chars}\n{transcript}".encode())
+        target = self.root / digest
+        if target.exists():
+            return digest
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            staging = tempfile.mkdtemp(dir=self.root, prefix=".")
+            for number, page in enumerate(paginate(transcript, self.page_chars), 1):
+                with open(os.path.join(staging, f"{number}.md"), "w", encoding="utf-8") as page_file:
+                    page_file.write(page)
+            try:
+                os.rename(staging, target)
+            except OSError:
+                # another request paginated the same transcript first
+                shutil.rmtree(staging, ignore_errors=True)
+        except OSError as e:
+            logger.warning(f"Could not paginate transcript: {e}")
+            return None
+        self.prune()
+        return digest
+
+    def count(self, digest):
+        try:
+            return len(os.listdir(self.root / digest))
+        except OSError:
+            return 0
+
+    def page(self, digest, number):
+        """``(text, number, count)`` for a page, with ``number`` clamped to the pages there are; None when unknown"""
+        count = self.count(digest) if digest else 0
+        if not count:
+            return None
+        number = min(max(int(number or 1), 1), count)
+        try:
+            return self._page_path(digest, number).read_text(encoding="utf-8"), number, count
+        except OSError as e:
+            logger.warning(f"Could not read transcript page: {e}")
+            return None
+
+    def prune(self):
+        try:
+            entries = [entry for entry in self.root.iterdir() if entry.is_dir() and not entry.name.startswith(".")]
+        except OSError:
+            return
+        if len(entries) <= self.max_transcripts:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_transcripts]:
+            shutil.rmtree(entry, ignore_errors=True)
+
+
+class TranscriptFeeds:
+    """Script segments of running conversions, keyed on their cancel token.
+
+    The conversion publishes segments as synthesis consumes them and the UI
+    reads back only the latest ones; a feed goes away with its token.
+    """
+
+    def __init__(self):
+        self._feeds = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def publish(self, token, segment):
+        if token is None:
+            return
+        with self._lock:
+            self._feeds.setdefault(token, []).append(segment)
+
+    def follow(self, segments, token):
+        """Pass ``segments`` through, publishing each one"""
+        for segment in segments:
+            self.publish(token, segment)
+            yield segment
+
+    def tail(self, token, max_chars=TRANSCRIPT_PAGE_CHARS):
+        """``(count, segments)``: how many segments were published and the latest ones, up to ``max_chars``"""
+        with self._lock:
+            segments = list(self._feeds.get(token, ()))
+        size = 0
+        start = len(segments)
+        while start > 0 and (size == 0 or size + len(segments[start - 1][0]) <= max_chars):
+            start -= 1
+            size += len(segments[start][0])
+        return len(segments), segments[start:]
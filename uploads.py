@@ -0,0 +1,377 @@
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+from fastapi import APIRouter, HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_DIR = Path(tempfile.gettempdir()) / "podkaast-uploads"
+MAX_UPLOAD_BYTES = 200 * 1024 * 1024
+# sessions spooled to disk at once, and their declared bytes in total, so no client can fill the disk
+MAX_OPEN_UPLOADS = int(os.environ.get("PODKAAST_MAX_OPEN_UPLOADS", "32"))
+MAX_SPOOLED_BYTES = int(float(os.environ.get("PODKAAST_MAX_SPOOLED_UPLOAD_MB", "1024")) * 1024 * 1024)
+CHUNK_SIZE = 1024 * 1024
+TAIL_WINDOW = 4096
+SESSION_TTL = 3600
+# a finished upload only has to outlive the request that submits it
+COMPLETED_SESSION_TTL = 300
+
+_STARTXREF = re.compile(rb"startxref\s+(\d+)\s+%%EOF", re.S)
+_TRAILER = re.compile(rb"trailer\s*<<(.*?)>>\s*startxref", re.S)
+_XREF_SUBSECTION = re.compile(rb"(\d+)\s+(\d+)\s*[\r\n]+")
+
+
+def _parse_dict_entries(raw):
+    info = {}
+    size = re.search(rb"/Size\s+(\d+)", raw)
+    root = re.search(rb"/Root\s+(\d+)\s+(\d+)\s+R", raw)
+    prev = re.search(rb"/Prev\s+(\d+)", raw)
+    if size:
+        info["size"] = int(size.group(1))
+    if root:
+        info["root"] = int(root.group(1))
+    if prev:
+        info["prev"] = int(prev.group(1))
+    info["encrypted"] = b"/Encrypt" in raw
+    return info
+
+
+class UploadsFull(Exception):
+    """Raised when a new upload would exceed the open session or spooled byte limits"""
+
+
+class UploadSession:
+    """One chunked upload spooled to disk.
+
+    Chunks may arrive in any order (clients can send the tail first so the
+    trailer is parsed early). The SHA-256 advances over the contiguous prefix
+    as bytes land, and extraction starts the moment the last byte is written.
+    """
+
+    def __init__(self, total_size, filename="", on_complete=None):
+        self.upload_id = uuid.uuid4().hex
+        self.total_size = total_size
+        self.filename = filename
+        self.created = time.time()
+        self.last_activity = self.created
+        self.sha256 = None
+        self.trailer = None
+        self.xref = None
+        self.page_count = None
+        self.cached = False
+        self.future = None
+        self._on_complete = on_complete
+        self._ranges = []
+        self._hasher = hashlib.sha256()
+        self._hashed = 0
+        self._lock = threading.Lock()
+
+        UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+        self.path = UPLOAD_DIR / f"{self.upload_id}.pdf"
+        self._file = open(self.path, "w+b")
+        self._file.truncate(total_size)
+
+    @property
+    def received(self):
+        return sum(end - start for start, end in self._ranges)
+
+    @property
+    def complete(self):
+        return self._ranges == [[0, self.total_size]]
+
+    def _has(self, start, end):
+        return any(s <= start and end <= e for s, e in self._ranges)
+
+    def _read(self, start, end):
+        self._file.seek(start)
+        return self._file.read(end - start)
+
+    def _add_range(self, start, end):
+        ranges = sorted(self._ranges + [[start, end]])
+        merged = [ranges[0]]
+        for s, e in ranges[1:]:
+            if s <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], e)
+            else:
+                merged.append([s, e])
+        self._ranges = merged
+
+    def _advance_hash(self):
+        for start, end in self._ranges:
+            if start <= self._hashed < end:
+                position = self._hashed
+                while position < end:
+                    block_end = min(end, position + CHUNK_SIZE)
+                    self._hasher.update(self._read(position, block_end))
+                    position = block_end
+                self._hashed = end
+                break
+
+    def _parse_tail(self):
+        suffix = [start for start, end in self._ranges if end == self.total_size]
+        if not suffix:
+            return
+
+        tail_start = max(suffix[0], self.total_size - TAIL_WINDOW)
+        tail = self._read(tail_start, self.total_size)
+        match = None
+        for match in _STARTXREF.finditer(tail):
+            pass
+        if match is None:
+            if tail_start == max(0, self.total_size - TAIL_WINDOW):
+                self.trailer = {"valid": False}
+            return
+
+        self.trailer = {"valid": True, "startxref": int(match.group(1))}
+        trailer = None
+        for trailer in _TRAILER.finditer(tail):
+            pass
+        if trailer:
+            self.trailer.update(_parse_dict_entries(trailer.group(1)))
+
+    def _parse_xref(self):
+        startxref = self.trailer.get("startxref") if self.trailer else None
+        if startxref is None or startxref >= self.total_size:
+            return
+
+        end = min(self.total_size, startxref + 20 * self.trailer.get("size", 1) + 1024)
+        if not self._has(startxref, end):
+            return
+
+        section = self._read(startxref, end)
+        if not section.startswith(b"xref"):
+            # cross-reference stream: its dictionary doubles as the trailer
+            self.xref = {}
+            self.trailer.update(_parse_dict_entries(section[:1024]))
+            return
+
+        offsets = {}
+        position = 4
+        while True:
+            while section[position:position + 1].isspace():
+                position += 1
+            header = _XREF_SUBSECTION.match(section, position)
+            if not header:
+                break
+            first, count = int(header.group(1)), int(header.group(2))
+            position = header.end()
+            for number in range(first, first + count):
+                entry = section[position:position + 20]
+                if len(entry) < 18:
+                    break
+                if entry[17:18] == b"n":
+                    offsets[number] = int(entry[:10])
+                position += 20
+        self.xref = offsets
+
+    def _object_bytes(self, number, size=2048):
+        offset = (self.xref or {}).get(number)
+        if offset is None:
+            return None
+        for start, end in self._ranges:
+            if start <= offset < end:
+                data = self._read(offset, min(end, offset + size))
+                return data if b"endobj" in data else None
+        return None
+
+    def _resolve_page_count(self):
+        catalog = self._object_bytes(self.trailer.get("root"))
+        pages_ref = re.search(rb"/Pages\s+(\d+)\s+\d+\s+R", catalog or b"")
+        if not pages_ref:
+            return
+        pages = self._object_bytes(int(pages_ref.group(1)))
+        count = re.search(rb"/Count\s+(\d+)", pages or b"")
+        if count:
+            self.page_count = int(count.group(1))
+
+    def touch(self):
+        self.last_activity = time.time()
+
+    def write(self, offset, data):
+        with self._lock:
+            self.touch()
+            if self.sha256 is not None:
+                raise ValueError("upload already complete")
+            if offset < 0 or offset + len(data) > self.total_size:
+                raise ValueError("chunk outside the declared upload size")
+
+            self._file.seek(offset)
+            self._file.write(data)
+            self._add_range(offset, offset + len(data))
+            self._advance_hash()
+
+            if self.trailer is None:
+                self._parse_tail()
+            if self.trailer and self.trailer.get("valid") and self.xref is None:
+                self._parse_xref()
+            if self.xref and self.page_count is None:
+                self._resolve_page_count()
+
+            if self.complete:
+                self._file.flush()
+                self.sha256 = self._hasher.hexdigest()
+                if self._on_complete:
+                    self._on_complete(self)
+
+    def text(self, timeout=None):
+        if self.future is None:
+            raise ValueError("upload is not complete")
+        return self.future.result(timeout=timeout)
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+
+    def status(self):
+        with self._lock:
+            if self.future is None:
+                extraction = "waiting"
+            elif not self.future.done():
+                extraction = "running"
+            elif self.future.exception():
+                extraction = "failed"
+            else:
+                extraction = "done"
+
+            return {
+                "upload_id": self.upload_id,
+                "size": self.total_size,
+                "received": self.received,
+                "complete": self.sha256 is not None,
+                "sha256": self.sha256,
+                "cached": self.cached,
+                "trailer": self.trailer,
+                "page_count": self.page_count,
+                "extraction": extraction,
+            }
+
+
+class UploadRegistry:
+    """Open upload sessions, capped at ``max_sessions`` and ``max_bytes`` declared bytes.
+
+    Sessions idle for ``ttl``, or ``completed_ttl`` once all their bytes have
+    arrived, are discarded whenever an upload is created or a chunk arrives.
+    """
+
+    def __init__(self, extract_path, lookup_text, max_workers=2, max_sessions=MAX_OPEN_UPLOADS,
+                 max_bytes=MAX_SPOOLED_BYTES, ttl=SESSION_TTL,
+                 completed_ttl=COMPLETED_SESSION_TTL):
+        self.extract_path = extract_path
+        self.lookup_text = lookup_text
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.completed_ttl = completed_ttl
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="upload-extract")
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def _on_complete(self, session):
+        cached = self.lookup_text(session.sha256)
+        if cached is not None:
+            session.cached = True
+            session.future = Future()
+            session.future.set_result(cached)
+            logger.info(f"Upload {session.upload_id} hit the text cache")
+        else:
+            session.future = self.executor.submit(self.extract_path, str(session.path), session.sha256)
+
+    def create(self, total_size, filename=""):
+        if total_size <= 0 or total_size > MAX_UPLOAD_BYTES:
+            raise ValueError(f"upload size must be between 1 and {MAX_UPLOAD_BYTES} bytes")
+
+        self.expire()
+        with self._lock:
+            if len(self._sessions) >= self.max_sessions:
+                raise UploadsFull(f"too many uploads in progress ({self.max_sessions}), try again later")
+            spooled = sum(session.total_size for session in self._sessions.values())
+            if spooled + total_size > self.max_bytes:
+                raise UploadsFull("not enough upload space left, try again later")
+            # created under the lock, so concurrent requests cannot both take the last slot
+            session = UploadSession(total_size, filename, on_complete=self._on_complete)
+            self._sessions[session.upload_id] = session
+        return session
+
+    def get(self, upload_id):
+        with self._lock:
+            return self._sessions.get(upload_id)
+
+    def discard(self, upload_id):
+        with self._lock:
+            session = self._sessions.pop(upload_id, None)
+        if session:
+            session.close()
+
+    def _expired(self, session, now):
+        idle = now - session.last_activity
+        if session.sha256 is None:
+            return idle > self.ttl
+        # the spooled file is still being read while extraction runs
+        return idle > self.completed_ttl and (session.future is None or session.future.done())
+
+    def expire(self, now=None):
+        now = now or time.time()
+        with self._lock:
+            expired = [upload_id for upload_id, session in self._sessions.items() if self._expired(session, now)]
+        for upload_id in expired:
+            self.discard(upload_id)
+
+    def router(self, prefix="/podkaast/uploads"):
+        router = APIRouter(prefix=prefix)
+
+        def lookup(upload_id):
+            session = self.get(upload_id)
+            if session is None:
+                raise HTTPException(status_code=404, detail="Unknown upload")
+            session.touch()
+            return session
+
+        @router.post("")
+        async def create_upload(payload: dict):
+            try:
+                session = self.create(int(payload.get("size", 0)), str(payload.get("filename", "")))
+            except (TypeError, ValueError) as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            except UploadsFull as e:
+                raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "60"})
+            return {"upload_id": session.upload_id, "chunk_size": CHUNK_SIZE}
+
+        @router.put("/{upload_id}")
+        async def upload_chunk(upload_id: str, request: Request, offset: int = 0):
+            self.expire()
+            session = lookup(upload_id)
+            try:
+                # process the body as it streams in instead of waiting for the whole chunk
+                async for data in request.stream():
+                    if data:
+                        await run_in_threadpool(session.write, offset, data)
+                        offset += len(data)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            return session.status()
+
+        @router.get("/{upload_id}")
+        async def upload_status(upload_id: str):
+            return lookup(upload_id).status()
+
+        @router.delete("/{upload_id}")
+        async def cancel_upload(upload_id: str):
+            lookup(upload_id)
+            self.discard(upload_id)
+            return {"upload_id": upload_id, "deleted": True}
+
+        return router